@@ -1,64 +1,161 @@
+import time
+from collections.abc import Mapping
 from datetime import datetime
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Optional, List
+import numpy as np
 from .data_models import SensorReading, AlarmEvent
-from .config import SENSORS_CONFIG
+from .config import SENSORS_CONFIG, STATUS_OK, STATUS_ALARM, STATUS_DEGRADED
+from .alarm_rules import RuleTable, STATE_NAMES, ALARM_TYPES, STATE_LOW, STATE_ROC, SCALAR_MAX_BATCH
+from .metrics import REGISTRY
+
+CHECK_SECONDS = REGISTRY.histogram("alarm_check_seconds", "Time to evaluate one batch of readings")
+ALARMS_RAISED = REGISTRY.counter("alarms_raised_total", "Alarm events raised", ["type"])
+
+class _AlarmStates(Mapping):
+    """Read-only name -> state string view ("ALARM_LOW", "FAULTY", None...) over the rule table."""
+    def __init__(self, rules: RuleTable):
+        self._rules = rules
+
+    def __getitem__(self, name):
+        return STATE_NAMES[int(self._rules.state[self._rules.index[name]])]
+
+    def __iter__(self):
+        return iter(self._rules.names)
+
+    def __len__(self):
+        return len(self._rules)
 
 class AlarmManager:
-    def __init__(self):
-        # Tracks the current alarm state for each sensor: None, "LOW", or "HIGH"
-        self.active_alarms: Dict[str, Optional[str]] = {name: None for name in SENSORS_CONFIG}
-        
+    """
+    Evaluates readings against the rules compiled from SENSORS_CONFIG
+    (limits, deadband, on/off delays, rate of change; see alarm_rules.RuleTable)
+    and returns an AlarmEvent whenever a sensor enters a new alarm state.
+
+    The rule table counts sensors per state on every transition, so the global
+    status is an O(1) read; status listeners are called only when it flips.
+    """
+    def __init__(self, sensors_config: Dict[str, dict] = SENSORS_CONFIG):
+        self.config = sensors_config
+        self.rules = RuleTable(sensors_config)
+        # Current state per sensor: None, "ALARM_LOW", "ALARM_HIGH", "ALARM_ROC" or "FAULTY"
+        self.active_alarms = _AlarmStates(self.rules)
+        self._status = self.system_status()
+        self._status_listeners: List[Callable[[str, str], None]] = []
+
+    def add_status_listener(self, callback: Callable[[str, str], None]):
+        """Registers callback(old_status, new_status), called when the global status changes."""
+        self._status_listeners.append(callback)
+
+    @property
+    def alarm_count(self) -> int:
+        return self.rules.alarm_count
+
+    @property
+    def faulty_count(self) -> int:
+        return self.rules.faulty_count
+
+    @property
+    def ok_count(self) -> int:
+        return len(self.rules) - self.rules.alarm_count - self.rules.faulty_count
+
+    def is_alarm(self, sensor_name: str) -> bool:
+        i = self.rules.index.get(sensor_name)
+        return i is not None and STATE_LOW <= self.rules.state[i] <= STATE_ROC
+
     def check_reading(self, reading: SensorReading) -> Optional[AlarmEvent]:
-        sensor_name = reading.sensor_name
-        if sensor_name not in SENSORS_CONFIG:
+        started = time.perf_counter()
+        i = self.rules.index.get(reading.sensor_name)
+        if i is None:
             return None
-            
-        # Priority: Faulty sensors should not trigger alarm events (Red), 
-        # they are handled as Yellow in the UI based on reading.status
-        if reading.status != "OK":
-            self.active_alarms[sensor_name] = "FAULTY"
+        transitions = self.rules.transitions((i,), (reading.value,), (reading.timestamp.timestamp(),),
+                                             (reading.status == STATUS_OK,))
+        if not transitions:
+            CHECK_SECONDS.observe(time.perf_counter() - started)
             return None
-            
-        config = SENSORS_CONFIG[sensor_name]
-        low_limit = config.get("low")
-        high_limit = config.get("high")
-        
-        current_state = self.active_alarms.get(sensor_name)
-        new_state = None
-        
-        if low_limit is not None and reading.value < low_limit:
-            new_state = "ALARM_LOW"
-        elif high_limit is not None and reading.value > high_limit:
-            new_state = "ALARM_HIGH"
-            
-        # Trigger AlarmEvent only for actual breaches
-        if new_state and "ALARM" in new_state and new_state != current_state:
-            self.active_alarms[sensor_name] = new_state
-            msg = f"{sensor_name} {new_state.split('_')[1]} limit violation: {reading.value:.2f} {config['unit']}"
-            return AlarmEvent(
-                timestamp=datetime.now(),
-                sensor_name=sensor_name,
-                value=reading.value,
-                alarm_type=new_state.split('_')[1],
-                message=msg
-            )
-            
-        self.active_alarms[sensor_name] = new_state
-        return None
-
-    def get_system_status(self, all_readings: Dict[str, SensorReading]) -> str:
+        alarms = self._raise([reading], transitions, True, started)
+        return alarms[0] if alarms else None
+
+    def check_batch(self, readings: List[SensorReading]) -> List[AlarmEvent]:
+        """
+        Evaluates readings in order; returns the new alarms. Small batches take
+        the rule table's scalar path, larger ones its vectorized pass.
+        """
+        started = time.perf_counter()
+        index = self.rules.index
+        known = [r for r in readings if r.sensor_name in index]
+        if not known:
+            return []
+        idx = [index[r.sensor_name] for r in known]
+        values = [r.value for r in known]
+        times = [r.timestamp.timestamp() for r in known]
+        # Faulty sensors never raise alarm events; the UI shows them as degraded
+        ok = [r.status == STATUS_OK for r in known]
+
+        if len(known) <= SCALAR_MAX_BATCH:
+            transitions = self.rules.transitions(idx, values, times, ok)
+            return self._raise(known, transitions, bool(transitions), started)
+        transitions = list(zip(*(column.tolist() for column in self.rules.evaluate(idx, values, times, ok))))
+        return self._raise(known, transitions, bool(transitions), started)
+
+    def _raise(self, readings: List[SensorReading], transitions, changed: bool, started: float) -> List[AlarmEvent]:
+        """AlarmEvents for the (position, sensor, old, new) transitions into an alarm state."""
+        if changed:
+            self._update_status()
+        events = [self._event(readings[p], new) for p, _, _, new in transitions if STATE_LOW <= new <= STATE_ROC]
+        for event in events:
+            ALARMS_RAISED.labels(event.alarm_type).inc()
+        CHECK_SECONDS.observe(time.perf_counter() - started)
+        return events
+
+    def check_arrays(self, idx: np.ndarray, values: np.ndarray, times: np.ndarray, ok: np.ndarray):
+        """Columnar entry point: returns (position, sensor index, old, new) transition arrays."""
+        transitions = self.rules.evaluate(idx, values, times, ok)
+        if len(transitions[0]):
+            self._update_status()
+        return transitions
+
+    def _update_status(self):
+        status = self.system_status()
+        if status != self._status:
+            old, self._status = self._status, status
+            for callback in list(self._status_listeners):
+                callback(old, status)
+
+    def _event(self, reading: SensorReading, state: int) -> AlarmEvent:
+        alarm_type = ALARM_TYPES[state]
+        unit = self.config[reading.sensor_name].get("unit", "")
+        if alarm_type == "ROC":
+            msg = f"{reading.sensor_name} rate-of-change limit violation: {reading.value:.2f} {unit}"
+        else:
+            msg = f"{reading.sensor_name} {alarm_type} limit violation: {reading.value:.2f} {unit}"
+        return AlarmEvent(
+            timestamp=datetime.now(),
+            sensor_name=reading.sensor_name,
+            value=reading.value,
+            alarm_type=alarm_type,
+            message=msg
+        )
+
+    def system_status(self) -> str:
         """
-        Calculates global status with strict priority:
+        Global status from the live state counters, with strict priority:
         1. ALARM (Red): any active limit violation
-        2. DEGRADED (Yellow): any sensor reporting 'Faulty' or non-OK status
+        2. DEGRADED (Yellow): any sensor in the faulty state
         3. OK (Green): everything is perfect
         """
-        states = self.active_alarms.values()
-        
-        if any(state and "ALARM" in state for state in states):
-            return "ALARM"
-            
-        if any(r.status != "OK" for r in all_readings.values()):
-            return "DEGRADED"
-            
-        return "OK"
+        if self.rules.alarm_count:
+            return STATUS_ALARM
+        if self.rules.faulty_count:
+            return STATUS_DEGRADED
+        return STATUS_OK
+
+    def get_system_status(self, all_readings: Optional[Dict[str, SensorReading]] = None) -> str:
+        """
+        Like system_status(), but when all_readings is given DEGRADED is taken
+        from those readings' statuses (including readings never checked here).
+        """
+        if all_readings is None or self.rules.alarm_count:
+            return self.system_status()
+        if any(r.status != STATUS_OK for r in all_readings.values()):
+            return STATUS_DEGRADED
+        return STATUS_OK
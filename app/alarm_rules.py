@@ -0,0 +1,273 @@
+import array
+from types import SimpleNamespace
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+# Integer-coded per-sensor states
+STATE_NORMAL = 0
+STATE_LOW = 1
+STATE_HIGH = 2
+STATE_ROC = 3  # rate-of-change limit exceeded
+STATE_FAULTY = 4
+
+# Legacy string form used by AlarmManager.active_alarms
+STATE_NAMES = {STATE_NORMAL: None, STATE_LOW: "ALARM_LOW", STATE_HIGH: "ALARM_HIGH",
+               STATE_ROC: "ALARM_ROC", STATE_FAULTY: "FAULTY"}
+ALARM_TYPES = {STATE_LOW: "LOW", STATE_HIGH: "HIGH", STATE_ROC: "ROC"}
+
+# Batches up to this size, and sensors with at least SCALAR_MIN_RUN readings in
+# a batch, are evaluated reading by reading in Python: one vectorized round costs
+# tens of microseconds however few readings it holds
+SCALAR_MAX_BATCH = 64
+SCALAR_MIN_RUN = 8
+
+Transition = Tuple[int, int, int, int]  # position in batch, sensor index, old state, new state
+
+def _is_alarm(state: np.ndarray) -> np.ndarray:
+    return (state >= STATE_LOW) & (state <= STATE_ROC)
+
+def _shared_column(typecode: str, dtype, values) -> Tuple[array.array, np.ndarray]:
+    """An array.array and a NumPy view of the same memory: fast item access and vectorized access."""
+    items = array.array(typecode, values)
+    view = np.frombuffer(items, dtype=dtype)
+    assert view.itemsize == items.itemsize
+    return items, view
+
+class RuleTable:
+    """
+    Alarm rules for a fixed set of sensors, compiled from a SENSORS_CONFIG-style
+    dict into NumPy arrays, plus the per-sensor evaluation state.
+
+    Optional per-sensor keys besides "low"/"high":
+      "deadband":  an active LOW/HIGH alarm only clears once the value is back
+                   inside the limit by this much (hysteresis)
+      "on_delay":  consecutive breaching samples needed to raise an alarm
+      "off_delay": consecutive normal samples needed to clear it
+      "max_rate":  largest allowed |change| per second, else a ROC alarm
+
+    The rule columns are read-only; the scalar path reads them from one tuple
+    per sensor. Each state column is a NumPy view over an array.array (kept
+    in `_items`), so the vectorized rounds and the scalar path share one state.
+    """
+    def __init__(self, sensors_config: Dict[str, dict]):
+        self.names: List[str] = list(sensors_config)
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        n = len(self.names)
+
+        def config(key, default, dtype=np.float64):
+            values = [cfg.get(key) for cfg in sensors_config.values()]
+            column = np.array([default if v is None else v for v in values], dtype=dtype)
+            column.setflags(write=False)
+            return column
+
+        self.low = config("low", -np.inf)
+        self.high = config("high", np.inf)
+        self.deadband = config("deadband", 0.0)
+        self.on_delay = np.maximum(config("on_delay", 1, np.int32), 1)
+        self.on_delay.setflags(write=False)
+        self.off_delay = np.maximum(config("off_delay", 1, np.int32), 1)
+        self.off_delay.setflags(write=False)
+        self.max_rate = config("max_rate", np.inf)
+        # The debounce counter saturates here: no delay needs more
+        self._max_count = np.maximum(self.on_delay, self.off_delay)
+        self._rules = list(zip(*(c.tolist() for c in (self.low, self.high, self.deadband, self.max_rate,
+                                                      self.on_delay, self.off_delay, self._max_count))))
+
+        self._items = SimpleNamespace()
+
+        def column(name, typecode, dtype, values):
+            items, view = _shared_column(typecode, dtype, values)
+            setattr(self._items, name, items)
+            setattr(self, name, view)
+
+        column("state", "b", np.int8, [STATE_NORMAL] * n)
+        column("candidate", "b", np.int8, [STATE_NORMAL] * n)  # state the debounce counter is counting towards
+        column("count", "i", np.intc, [0] * n)
+        column("last_value", "d", np.float64, [np.nan] * n)
+        column("last_time", "d", np.float64, [np.nan] * n)
+        # Sensors per state, kept up to date on every transition
+        self.state_counts = np.zeros(STATE_FAULTY + 1, dtype=np.int64)
+        self.state_counts[STATE_NORMAL] = n
+
+    @property
+    def alarm_count(self) -> int:
+        return int(self.state_counts[STATE_LOW:STATE_ROC + 1].sum())
+
+    @property
+    def faulty_count(self) -> int:
+        return int(self.state_counts[STATE_FAULTY])
+
+    def __len__(self):
+        return len(self.names)
+
+    def reset(self):
+        self.state[:] = STATE_NORMAL
+        self.candidate[:] = STATE_NORMAL
+        self.count[:] = 0
+        self.last_value[:] = np.nan
+        self.last_time[:] = np.nan
+        self.state_counts[:] = 0
+        self.state_counts[STATE_NORMAL] = len(self)
+
+    def evaluate(self, idx: np.ndarray, values: np.ndarray, times: np.ndarray,
+                 ok: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Applies a batch of readings (sensor index, value, epoch seconds, status OK)
+        in order. Returns the state transitions as (position in batch, sensor
+        index, old state, new state) arrays.
+
+        Sensors are independent, so only each sensor's own readings must be
+        applied in order. Small batches, and sensors with a long run of
+        readings in a large one, go through the scalar path; the remaining
+        readings are evaluated together in vectorized rounds, each holding at
+        most one reading per sensor (fewer than SCALAR_MIN_RUN rounds).
+        """
+        n = len(idx)
+        if n <= SCALAR_MAX_BATCH:
+            return self._arrays(self.transitions(*(np.asarray(c).tolist() for c in (idx, values, times, ok))))
+
+        idx = np.asarray(idx, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        times = np.asarray(times, dtype=np.float64)
+        ok = np.asarray(ok, dtype=bool)
+        order = np.argsort(idx, kind="stable")
+        sorted_idx = idx[order]
+        starts = np.flatnonzero(np.r_[True, sorted_idx[1:] != sorted_idx[:-1]])
+        lengths = np.diff(np.r_[starts, n])
+
+        parts = []
+        long_runs = lengths >= SCALAR_MIN_RUN
+        if long_runs.any():
+            found: List[Transition] = []
+            for start, length in zip(starts[long_runs].tolist(), lengths[long_runs].tolist()):
+                pos = order[start:start + length]  # the stable sort kept batch order
+                self._run(int(sorted_idx[start]), pos.tolist(), values[pos].tolist(), times[pos].tolist(),
+                          ok[pos].tolist(), found)
+            found.sort()
+            parts.append(self._arrays(found))
+        if not long_runs.all():
+            rank = np.empty(n, dtype=np.int64)
+            rank[order] = np.arange(n) - np.repeat(starts, lengths)
+            vectorized = np.empty(n, dtype=bool)
+            vectorized[order] = np.repeat(~long_runs, lengths)
+            for r in range(int(rank[vectorized].max()) + 1):
+                pos = np.flatnonzero(vectorized & (rank == r))
+                parts.append(self._step(pos, idx[pos], values[pos], times[pos], ok[pos]))
+        if len(parts) == 1:
+            return parts[0]
+        pos, sensors, old, new = (np.concatenate(columns) for columns in zip(*parts))
+        by_position = np.argsort(pos, kind="stable")
+        return pos[by_position], sensors[by_position], old[by_position], new[by_position]
+
+    def transitions(self, idx: Sequence[int], values: Sequence[float], times: Sequence[float],
+                    ok: Sequence[bool]) -> List[Transition]:
+        """Scalar form of evaluate() over plain lists: the transitions as tuples, in batch order."""
+        if len(idx) == 1:
+            found: List[Transition] = []
+            self._run(idx[0], [0], values, times, ok, found)
+            return found
+        runs: Dict[int, List[int]] = {}
+        for p, i in enumerate(idx):
+            runs.setdefault(i, []).append(p)
+        found = []
+        for i, pos in runs.items():
+            self._run(i, pos, [values[p] for p in pos], [times[p] for p in pos], [ok[p] for p in pos], found)
+        if len(runs) > 1:
+            found.sort()
+        return found
+
+    @staticmethod
+    def _arrays(found: List[Transition]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        if not found:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, empty.astype(np.int8), empty.astype(np.int8)
+        pos, sensors, old, new = zip(*found)
+        return (np.array(pos, dtype=np.int64), np.array(sensors, dtype=np.int64),
+                np.array(old, dtype=np.int8), np.array(new, dtype=np.int8))
+
+    def _run(self, i: int, positions: List[int], values: List[float], times: List[float], ok: List[bool],
+             found: List[Transition]):
+        """
+        Applies one sensor's readings in order, reading by reading, with its
+        state held in locals. Same rules as _step; transitions go to `found`.
+        """
+        c = self._items
+        low, high, band, max_rate, on_delay, off_delay, max_count = self._rules[i]
+        first_state, first_candidate = state, candidate = c.state[i], c.candidate[i]
+        count = c.count[i]
+        last_value, last_time = c.last_value[i], c.last_time[i]
+        for p, v, t, good in zip(positions, values, times, ok):
+            if not good:
+                raw = STATE_FAULTY
+            else:
+                if v < low:
+                    raw = STATE_LOW
+                elif v > high:
+                    raw = STATE_HIGH
+                # Hysteresis: an active limit alarm holds until the value clears the deadband
+                elif state == STATE_LOW and v < low + band:
+                    raw = STATE_LOW
+                elif state == STATE_HIGH and v > high - band:
+                    raw = STATE_HIGH
+                else:
+                    dt = t - last_time  # NaN before the first good reading
+                    raw = STATE_ROC if dt > 0 and abs(v - last_value) > max_rate * dt else STATE_NORMAL
+                last_value, last_time = v, t
+
+            # Debounce: count consecutive samples agreeing on the same target state
+            if raw != candidate:
+                count = 1
+            elif count < max_count:
+                count += 1
+            candidate = raw
+            if raw != state:
+                if STATE_LOW <= raw <= STATE_ROC:
+                    need = on_delay
+                elif raw == STATE_NORMAL and STATE_LOW <= state <= STATE_ROC:
+                    need = off_delay
+                else:
+                    need = 1
+                if count >= need:
+                    found.append((p, i, state, raw))
+                    self.state_counts[state] -= 1
+                    self.state_counts[raw] += 1
+                    state = raw
+        if state != first_state:
+            c.state[i] = state
+        if candidate != first_candidate:
+            c.candidate[i] = candidate
+        c.count[i] = count
+        c.last_value[i], c.last_time[i] = last_value, last_time
+
+    def _step(self, pos, i, v, t, ok):
+        """One round: each sensor index in `i` occurs at most once."""
+        cur = self.state[i]
+        low, high, band = self.low[i], self.high[i], self.deadband[i]
+
+        raw = np.where(v < low, STATE_LOW, np.where(v > high, STATE_HIGH, STATE_NORMAL)).astype(np.int8)
+        # Hysteresis: an active limit alarm holds until the value clears the deadband
+        raw[(raw == STATE_NORMAL) & (cur == STATE_LOW) & (v < low + band)] = STATE_LOW
+        raw[(raw == STATE_NORMAL) & (cur == STATE_HIGH) & (v > high - band)] = STATE_HIGH
+
+        dt = t - self.last_time[i]
+        with np.errstate(invalid="ignore"):
+            too_fast = np.abs(v - self.last_value[i]) > self.max_rate[i] * dt  # |change| / dt > max_rate
+        raw[(raw == STATE_NORMAL) & (dt > 0) & too_fast] = STATE_ROC
+        raw[~ok] = STATE_FAULTY
+
+        good = ok.astype(bool)
+        self.last_value[i[good]] = v[good]
+        self.last_time[i[good]] = t[good]
+
+        # Debounce: count consecutive samples agreeing on the same target state
+        count = np.where(raw == self.candidate[i], np.minimum(self.count[i] + 1, self._max_count[i]), 1)
+        self.count[i] = count
+        self.candidate[i] = raw
+        need = np.where(_is_alarm(raw), self.on_delay[i],
+                        np.where((raw == STATE_NORMAL) & _is_alarm(cur), self.off_delay[i], 1))
+        switch = (raw != cur) & (count >= need)
+        self.state[i[switch]] = raw[switch]
+        if switch.any():
+            np.subtract.at(self.state_counts, cur[switch], 1)
+            np.add.at(self.state_counts, raw[switch], 1)
+        return pos[switch], i[switch], cur[switch], raw[switch]
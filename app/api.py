@@ -1,28 +1,207 @@
+import json
+import math
 import threading
-from flask import Flask, jsonify
+import time
+from datetime import datetime
+import numpy as np
+from flask import Flask, Response, jsonify, request
 try:
-    from .config import API_PORT, SENSORS_CONFIG
+    from .config import (API_PORT, API_SERVER_MODE, SENSORS_CONFIG, STATUS_OK, STATUS_FAULTY,
+                         API_HISTORY_DEFAULT_SECONDS, API_HISTORY_MAX_POINTS, API_STREAM_CHUNK_ROWS,
+                         SNAPSHOT_LONG_POLL_S, SNAPSHOT_LONG_POLL_MAX_S)
+    from .snapshot import SnapshotPublisher
+    from .decimation import minmax_indices
+    from .rollups import bucket_stats
+    from .metrics import REGISTRY
     from .logger import logger
 except ImportError:
     import sys
     import os
     # Add parent directory to path to allow direct execution
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from app.config import API_PORT, SENSORS_CONFIG
+    from app.config import (API_PORT, API_SERVER_MODE, SENSORS_CONFIG, STATUS_OK, STATUS_FAULTY,
+                            API_HISTORY_DEFAULT_SECONDS, API_HISTORY_MAX_POINTS, API_STREAM_CHUNK_ROWS,
+                            SNAPSHOT_LONG_POLL_S, SNAPSHOT_LONG_POLL_MAX_S)
+    from app.snapshot import SnapshotPublisher
+    from app.decimation import minmax_indices
+    from app.rollups import bucket_stats
+    from app.metrics import REGISTRY
     from app.logger import logger
 
-# Global state to be updated by the main app
+# Global state to be updated by the main app (GUI thread only), then made
+# visible to requests through publish_status()
 latest_data = {}
 system_status = "UNKNOWN"
+snapshots = SnapshotPublisher()
+history_store = None  # HistoryStore for range queries, set by the main app
+rollup_engine = None  # RollupEngine for aggregate queries, set by the main app
+ws_server = None  # WebSocketServer, for broadcast metrics
 
 app = Flask(__name__)
 
+def publish_status():
+    """Encodes latest_data/system_status into a new snapshot for /api/status."""
+    return snapshots.publish({"status": system_status, "sensors": latest_data})
+
 @app.route('/api/status', methods=['GET'])
 def get_status():
-    return jsonify({
-        "status": system_status,
-        "sensors": latest_data
-    })
+    """
+    Serves the current pre-encoded snapshot. Supports If-None-Match (304) and
+    ?since_version=N long-polling, which waits until the version moves past N.
+    """
+    since = request.args.get("since_version")
+    if since is not None:
+        try:
+            since = int(since)
+            timeout = min(float(request.args.get("timeout", SNAPSHOT_LONG_POLL_S)), SNAPSHOT_LONG_POLL_MAX_S)
+        except ValueError:
+            return jsonify({"error": "since_version and timeout must be numbers"}), 400
+        snap = snapshots.wait_newer(since, max(0.0, timeout))
+    else:
+        snap = snapshots.current
+
+    if request.if_none_match.contains(snap.etag):
+        response = Response(status=304)
+    elif snap.gzipped is not None and "gzip" in request.accept_encodings:
+        response = Response(snap.gzipped, mimetype="application/json")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(snap.body, mimetype="application/json")
+    response.set_etag(snap.etag)
+    response.headers["X-Snapshot-Version"] = str(snap.version)
+    response.headers["Cache-Control"] = "no-cache"
+    response.vary.add("Accept-Encoding")
+    return response
+
+@app.route('/api/ws/stats', methods=['GET'])
+def get_ws_stats():
+    """WebSocket broadcast metrics: clients, queue depths, drops, evictions."""
+    if ws_server is None:
+        return jsonify({"error": "WebSocket server is not running"}), 503
+    return jsonify(ws_server.stats())
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Ingest, alarm, GUI, WebSocket and notification metrics in the Prometheus text format."""
+    return Response(REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+# "auto": raw samples if they fit in max_points, otherwise rollup "stats" buckets.
+# "raw": raw samples, min/max-downsampled to max_points.
+# "mean" / "min" / "max" / "stats": rollup buckets at the finest fitting resolution.
+HISTORY_AGGS = ("auto", "raw", "mean", "min", "max", "stats")
+
+def _parse_time(value, default: int) -> int:
+    """Epoch seconds or ISO-8601 string -> epoch nanoseconds (int64); raises ValueError on bad input."""
+    if not value:
+        return default
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = datetime.fromisoformat(value).timestamp()
+        except (OverflowError, OSError) as e:
+            raise ValueError(f"time out of range: {value}") from e
+    if not math.isfinite(seconds) or abs(seconds) * 1e9 >= 2**63:
+        raise ValueError(f"time out of range: {value}")
+    return int(seconds * 1e9)
+
+def _history_args():
+    """Parses from/to/max_points/agg; raises ValueError on bad input."""
+    t_to = _parse_time(request.args.get("to"), time.time_ns())
+    t_from = _parse_time(request.args.get("from"), t_to - int(API_HISTORY_DEFAULT_SECONDS * 1e9))
+    max_points = int(request.args.get("max_points", API_HISTORY_MAX_POINTS))
+    agg = request.args.get("agg", "auto")
+    if agg not in HISTORY_AGGS:
+        raise ValueError(f"agg must be one of {', '.join(HISTORY_AGGS)}")
+    if max_points < 1:
+        raise ValueError("max_points must be positive")
+    if t_from > t_to:
+        raise ValueError("from must not be after to")
+    return t_from, t_to, max_points, agg
+
+def _iso(t_ns) -> str:
+    return datetime.fromtimestamp(t_ns / 1e9).isoformat()
+
+def _chunks(rows):
+    """Joins row strings into blocks of API_STREAM_CHUNK_ROWS lines."""
+    for i in range(0, len(rows), API_STREAM_CHUNK_ROWS):
+        yield "".join(rows[i:i + API_STREAM_CHUNK_ROWS])
+
+def _raw_rows(records):
+    statuses = (STATUS_OK, STATUS_FAULTY)
+    return [f'{{"timestamp":"{_iso(t)}","value":{v!r},"status":"{statuses[min(s, 1)]}"}}\n'
+            for t, v, s in zip(records["t"].tolist(), records["v"].tolist(), records["s"].tolist())]
+
+def _bucket_rows(buckets, agg):
+    times = [_iso(t) for t in buckets["t"].tolist()]
+    if agg in ("min", "max"):
+        return [f'{{"timestamp":"{ts}","value":{v!r}}}\n' for ts, v in zip(times, buckets[agg].tolist())]
+    mean, std = bucket_stats(buckets)
+    if agg == "mean":
+        return [f'{{"timestamp":"{ts}","value":{v!r}}}\n' for ts, v in zip(times, mean.tolist())]
+    return [f'{{"timestamp":"{ts}","count":{n},"min":{lo!r},"max":{hi!r},"mean":{m!r},"std":{sd!r}}}\n'
+            for ts, n, lo, hi, m, sd in zip(times, buckets["count"].tolist(), buckets["min"].tolist(),
+                                             buckets["max"].tolist(), mean.tolist(), std.tolist())]
+
+def _series(sensor, t_from, t_to, max_points, agg):
+    """
+    Yields NDJSON for one sensor: a header line {"sensor", "resolution", "agg"}
+    followed by one line per point. Raw ranges are read and downsampled one
+    segment at a time, so memory stays bounded however long the range is.
+    """
+    if agg == "auto":
+        fits = history_store.count(sensor, t_from, t_to) <= max_points
+        agg = "raw" if fits or rollup_engine is None else "stats"
+
+    if agg == "raw":
+        yield json.dumps({"sensor": sensor, "resolution": "raw", "agg": agg}) + "\n"
+        total = history_store.count(sensor, t_from, t_to)
+        for records in history_store.iter_range(sensor, t_from, t_to):
+            if total > max_points:
+                # Share the point budget between segments by their sample count
+                n_buckets = max(1, round(max_points / 2 * len(records) / total))
+                if len(records) > 2 * n_buckets:
+                    records = records[np.unique(minmax_indices(records["v"], n_buckets))]
+            yield from _chunks(_raw_rows(records))
+        return
+
+    resolution, buckets = rollup_engine.query(sensor, t_from, t_to, max_points)
+    yield json.dumps({"sensor": sensor, "resolution": resolution, "agg": agg}) + "\n"
+    yield from _chunks(_bucket_rows(buckets, agg))
+
+def _history_response(sensors):
+    if history_store is None:
+        return jsonify({"error": "History store is not enabled"}), 503
+    try:
+        t_from, t_to, max_points, agg = _history_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if agg not in ("auto", "raw") and rollup_engine is None:
+        return jsonify({"error": "Rollups are not enabled"}), 503
+    known = set(SENSORS_CONFIG) | set(history_store.sensors())
+    unknown = [name for name in sensors if name not in known]
+    if unknown:
+        return jsonify({"error": f"Unknown sensor(s): {', '.join(unknown)}"}), 404
+
+    def generate():
+        for name in sensors:
+            yield from _series(name, t_from, t_to, max_points, agg)
+    # A generator body is sent with chunked transfer encoding, never built in memory
+    return Response(generate(), mimetype="application/x-ndjson")
+
+@app.route('/api/history/<sensor>', methods=['GET'])
+def get_history(sensor):
+    """History of one sensor as NDJSON. Query: from, to, max_points, agg."""
+    return _history_response([sensor])
+
+@app.route('/api/history', methods=['GET'])
+def get_history_bulk():
+    """History of several sensors in one stream: ?sensors=A,B (default: all)."""
+    names = request.args.get("sensors")
+    sensors = [name for name in names.split(",") if name] if names else list(SENSORS_CONFIG)
+    return _history_response(sensors)
+
+publish_status()
 
 def run_api():
     try:
@@ -37,6 +216,12 @@ def run_api():
         logger.error(f"API server failed to start: {e}")
 
 def start_api_thread():
+    if API_SERVER_MODE == "asyncio":
+        try:
+            from .api_server import ApiServer
+        except ImportError:
+            from app.api_server import ApiServer
+        return ApiServer(port=API_PORT).start()
     api_thread = threading.Thread(target=run_api, daemon=True)
     api_thread.start()
     return api_thread
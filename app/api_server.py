@@ -0,0 +1,289 @@
+import asyncio
+import io
+import json
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+import numpy as np
+from . import api
+from .logger import logger
+from .config import (API_PORT, API_MAX_CONNECTIONS, API_KEEPALIVE_TIMEOUT_S, API_WSGI_THREADS,
+                     API_LATENCY_WINDOW, SNAPSHOT_LONG_POLL_S, SNAPSHOT_LONG_POLL_MAX_S)
+
+Headers = List[Tuple[str, str]]
+
+def _etag_matches(header: str, etag: str) -> bool:
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == "*" or tag.strip('"') == etag:
+            return True
+    return False
+
+class ApiServer:
+    """
+    asyncio HTTP/1.1 server for the REST API.
+
+    /api/status (including ?since_version= long-polls) is answered directly
+    on the event loop from the pre-encoded snapshot, so pollers cost a few
+    microseconds of GIL time each. Every other route is passed to the Flask
+    app through a WSGI bridge on a small thread pool; bodies without a length
+    (e.g. streamed history) are sent with chunked transfer encoding.
+
+    Connections stay open between requests (keep-alive) until idle for
+    keepalive_timeout. Beyond max_connections new clients get a 503 and are closed.
+    """
+    def __init__(self, host: str = "0.0.0.0", port: int = API_PORT, wsgi_app=None, snapshots=None,
+                 max_connections: int = API_MAX_CONNECTIONS, keepalive_timeout: float = API_KEEPALIVE_TIMEOUT_S,
+                 wsgi_threads: int = API_WSGI_THREADS):
+        self.host = host
+        self.port = port
+        self.wsgi_app = wsgi_app or api.app
+        self.snapshots = snapshots or api.snapshots
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+        self.executor = ThreadPoolExecutor(max_workers=wsgi_threads, thread_name_prefix="api-wsgi")
+
+        self.connections = 0
+        self.rejected = 0
+        self.requests = 0
+        self.latencies = deque(maxlen=API_LATENCY_WINDOW)  # seconds, long-polls excluded
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- lifecycle -------------------------------------------------------
+    def start(self) -> threading.Thread:
+        self._thread = threading.Thread(target=lambda: asyncio.run(self.serve()), daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+        return self._thread
+
+    def stop(self):
+        if self._loop and self._stop_event:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.executor.shutdown(wait=False)
+
+    async def serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self._changed = asyncio.Event()
+        self.snapshots.add_listener(self._on_snapshot)
+        try:
+            server = await asyncio.start_server(self._handle, self.host, self.port, backlog=1024)
+            self.port = server.sockets[0].getsockname()[1]
+            logger.info(f"asyncio API server listening on {self.host}:{self.port}")
+            self._ready.set()
+            async with server:
+                await self._stop_event.wait()
+        except OSError as e:
+            logger.error(f"API server failed to start: {e}")
+            self._ready.set()
+        finally:
+            self.snapshots.remove_listener(self._on_snapshot)
+
+    def _on_snapshot(self, _snapshot):
+        # Called from the publishing thread; wake long-polls on the loop
+        self._loop.call_soon_threadsafe(self._notify)
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def stats(self) -> dict:
+        latencies = np.fromiter(self.latencies, dtype=np.float64) * 1000.0
+        if len(latencies):
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+            latency = {"p50": round(p50, 3), "p90": round(p90, 3), "p99": round(p99, 3),
+                       "max": round(float(latencies.max()), 3), "samples": len(latencies)}
+        else:
+            latency = {}
+        return {"mode": "asyncio", "connections": self.connections, "max_connections": self.max_connections,
+                "rejected": self.rejected, "requests": self.requests, "latency_ms": latency}
+
+    # --- connection handling ---------------------------------------------
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if self.connections >= self.max_connections:
+            self.rejected += 1
+            writer.write(self._head(503, [("Content-Length", "0")], keep_alive=False))
+            writer.close()
+            return
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keepalive_timeout)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    writer.write(self._head(431, [("Content-Length", "0")], keep_alive=False))
+                    break
+                start = time.perf_counter()
+                try:
+                    method, target, version, headers = self._parse_head(head)
+                except ValueError:
+                    writer.write(self._head(400, [("Content-Length", "0")], keep_alive=False))
+                    break
+                length = int(headers.get("content-length", 0))
+                body = await reader.readexactly(length) if length else b""
+
+                conn = headers.get("connection", "").lower()
+                keep_alive = conn != "close" if version == "HTTP/1.1" else conn == "keep-alive"
+                keep_alive = await self._dispatch(method, target, version, headers, body, writer, keep_alive)
+                self.requests += 1
+                if "since_version=" not in target:
+                    self.latencies.append(time.perf_counter() - start)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.error(f"API connection error: {e}")
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    @staticmethod
+    def _parse_head(head: bytes):
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, version = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        length = headers.get("content-length", "0")
+        if not (length.isascii() and length.isdigit()):
+            raise ValueError(f"Invalid Content-Length: {length!r}")
+        return method, target, version, headers
+
+    @staticmethod
+    def _head(status: int, headers: Headers, keep_alive: bool) -> bytes:
+        lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+        lines += [f"{name}: {value}" for name, value in headers]
+        lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    def _respond(self, writer, status: int, headers: Headers, body: bytes, keep_alive: bool):
+        headers = headers + [("Content-Length", str(len(body)))]
+        writer.write(self._head(status, headers, keep_alive) + body)
+
+    async def _dispatch(self, method, target, version, headers, body, writer, keep_alive) -> bool:
+        """Writes one response; returns whether the connection stays open."""
+        url = urlsplit(target)
+        if url.path == "/api/status" and method in ("GET", "HEAD"):
+            status, out_headers, out_body = await self._status(parse_qs(url.query), headers)
+            self._respond(writer, status, out_headers, b"" if method == "HEAD" else out_body, keep_alive)
+            return keep_alive
+        if url.path == "/api/server-stats" and method == "GET":
+            out_body = json.dumps(self.stats()).encode()
+            self._respond(writer, 200, [("Content-Type", "application/json")], out_body, keep_alive)
+            return keep_alive
+        return await self._wsgi(method, url, version, headers, body, writer, keep_alive)
+
+    # --- /api/status -----------------------------------------------------
+    async def _status(self, query: Dict[str, List[str]], headers: Dict[str, str]):
+        snap = self.snapshots.current
+        if "since_version" in query:
+            try:
+                since = int(query["since_version"][0])
+                timeout = min(float(query.get("timeout", [SNAPSHOT_LONG_POLL_S])[0]), SNAPSHOT_LONG_POLL_MAX_S)
+            except ValueError:
+                body = json.dumps({"error": "since_version and timeout must be numbers"}).encode()
+                return 400, [("Content-Type", "application/json")], body
+            snap = await self._wait_newer(since, max(0.0, timeout))
+
+        out = [("ETag", f'"{snap.etag}"'), ("X-Snapshot-Version", str(snap.version)),
+               ("Cache-Control", "no-cache"), ("Vary", "Accept-Encoding")]
+        if _etag_matches(headers.get("if-none-match", ""), snap.etag):
+            return 304, out, b""
+        out.append(("Content-Type", "application/json"))
+        if snap.gzipped is not None and "gzip" in headers.get("accept-encoding", ""):
+            return 200, out + [("Content-Encoding", "gzip")], snap.gzipped
+        return 200, out, snap.body
+
+    async def _wait_newer(self, since: int, timeout: float):
+        deadline = self._loop.time() + timeout
+        while True:
+            changed = self._changed  # take the event before reading, so no publish is missed
+            snap = self.snapshots.current
+            remaining = deadline - self._loop.time()
+            if snap.version != since or remaining <= 0:
+                return snap
+            try:
+                await asyncio.wait_for(changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    # --- WSGI bridge -----------------------------------------------------
+    async def _wsgi(self, method, url, version, headers, body, writer, keep_alive) -> bool:
+        environ = {
+            "REQUEST_METHOD": method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": unquote(url.path),
+            "QUERY_STRING": url.query,
+            "SERVER_NAME": self.host,
+            "SERVER_PORT": str(self.port),
+            "SERVER_PROTOCOL": version,
+            "CONTENT_LENGTH": str(len(body)),
+            "CONTENT_TYPE": headers.get("content-type", ""),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for name, value in headers.items():
+            if name not in ("content-length", "content-type"):
+                environ["HTTP_" + name.upper().replace("-", "_")] = value
+
+        started = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = list(response_headers)
+
+        def call():
+            result = self.wsgi_app(environ, start_response)
+            chunks = iter(result)
+            first = next(chunks, b"")  # generators call start_response lazily
+            return result, chunks, first
+
+        loop = self._loop
+        result, chunks, first = await loop.run_in_executor(self.executor, call)
+        try:
+            out_headers = [(k, v) for k, v in started["headers"] if k.lower() != "connection"]
+            has_length = any(k.lower() == "content-length" for k, _ in out_headers)
+            chunked = not has_length and version == "HTTP/1.1"
+            if not has_length and not chunked:
+                keep_alive = False  # HTTP/1.0 without a length: the body ends at close
+            if chunked:
+                out_headers.append(("Transfer-Encoding", "chunked"))
+            writer.write(self._head(started["status"], out_headers, keep_alive))
+
+            chunk = first
+            while chunk is not None:
+                if chunk and method != "HEAD":
+                    writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk) if chunked else chunk)
+                    await writer.drain()
+                chunk = await loop.run_in_executor(self.executor, next, chunks, None)
+            if chunked and method != "HEAD":  # a HEAD response has no body, not even the last chunk
+                writer.write(b"0\r\n\r\n")
+        finally:
+            if hasattr(result, "close"):
+                await loop.run_in_executor(self.executor, result.close)
+        return keep_alive
@@ -0,0 +1,181 @@
+import asyncio
+import threading
+from typing import Callable, Dict, List, Optional
+from .data_models import SensorReading
+from .logger import logger
+from .config import HOST, BATCH_MAX_READINGS, BATCH_FLUSH_MS
+from .parser import StreamDecoder
+from .metrics import REGISTRY
+
+# Shared by every ingest mode (sensor_worker, shm_ingest)
+INGEST_READINGS = REGISTRY.counter("sensor_readings_total", "Readings parsed per sensor", ["sensor"])
+INGEST_PARSE_ERRORS = REGISTRY.counter("sensor_parse_errors_total", "Malformed packets skipped per sensor", ["sensor"])
+INGEST_CONNECTS = REGISTRY.counter("sensor_connects_total", "Successful connections per sensor", ["sensor"])
+INGEST_CONNECT_FAILURES = REGISTRY.counter("sensor_connection_failures_total",
+                                           "Failed or lost connections per sensor", ["sensor"])
+SENSOR_CONNECTED = REGISTRY.gauge("sensor_connected", "1 while the sensor connection is up", ["sensor"])
+
+def shard_sensors(sensors_config: dict, n_shards: int) -> List[Dict[str, int]]:
+    """Splits SENSORS_CONFIG round-robin into n_shards {sensor_name: port} maps."""
+    shards = [{} for _ in range(max(1, n_shards))]
+    for i, (name, cfg) in enumerate(sensors_config.items()):
+        shards[i % len(shards)][name] = cfg['port']
+    return [shard for shard in shards if shard]
+
+class AsyncIngestEngine:
+    """
+    Ingestion engine that holds every sensor connection on a single asyncio
+    event loop with non-blocking streams, instead of one thread per sensor.
+    Parsed readings are handed to `on_reading` on the loop thread, or
+    collected and handed to `on_batch` as lists when batching is enabled.
+    """
+    def __init__(self, sensors: Dict[str, int],
+                 on_reading: Callable[[SensorReading], None],
+                 on_status: Optional[Callable[[str, bool], None]] = None,
+                 host: str = HOST,
+                 on_batch: Optional[Callable[[List[SensorReading]], None]] = None,
+                 protocols: Optional[Dict[str, str]] = None,
+                 capture=None):
+        self.sensors = sensors
+        self.protocols = protocols or {}
+        self.capture = capture  # CaptureWriter recording the raw streams, or None
+        self.on_reading = on_reading
+        self.on_status = on_status
+        self.on_batch = on_batch
+        self.host = host
+        self._pending = []
+        self._flush_handle = None
+        self.running = True
+        self.loop = None
+        self._stop_event = None
+        self._thread = None
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        if not self.running:
+            return
+        tasks = [asyncio.create_task(self._sensor_loop(name, port))
+                 for name, port in self.sensors.items()]
+        try:
+            await self._stop_event.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._flush()
+
+    def start(self):
+        """Runs the engine on its own daemon thread (non-Qt callers)."""
+        self._thread = threading.Thread(target=asyncio.run, args=(self.run(),), daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Thread-safe shutdown of every sensor connection."""
+        self.running = False
+        if self.loop and self._stop_event:
+            try:
+                self.loop.call_soon_threadsafe(self._stop_event.set)
+            except RuntimeError:
+                pass  # Loop already closed
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _set_status(self, name: str, connected: bool):
+        (INGEST_CONNECTS if connected else INGEST_CONNECT_FAILURES).labels(name).inc()
+        SENSOR_CONNECTED.labels(name).set(int(connected))
+        if self.on_status:
+            self.on_status(name, connected)
+
+    def _deliver(self, reading: SensorReading):
+        if self.on_batch is None:
+            self.on_reading(reading)
+            return
+        self._pending.append(reading)
+        if len(self._pending) >= BATCH_MAX_READINGS:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = self.loop.call_later(BATCH_FLUSH_MS / 1000.0, self._flush)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._pending:
+            batch, self._pending = self._pending, []
+            self.on_batch(batch)
+
+    async def _sensor_loop(self, name: str, port: int):
+        loop = asyncio.get_running_loop()
+        while self.running:
+            transport = None
+            try:
+                logger.info(f"Attempting to connect to {name} on port {port}...")
+                transport, protocol = await asyncio.wait_for(
+                    loop.create_connection(lambda: _SensorProtocol(self, name), self.host, port),
+                    timeout=5.0)
+                self._set_status(name, True)
+                logger.info(f"Connected to {name}")
+
+                # Watchdog: same 5s receive timeout as SensorWorker, but checked
+                # once per window instead of once per line.
+                while self.running:
+                    remaining = protocol.last_rx + 5.0 - loop.time()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    done, _ = await asyncio.wait({protocol.closed}, timeout=remaining)
+                    if done:
+                        break
+                continue
+
+            except asyncio.CancelledError:
+                raise
+            except (OSError, asyncio.TimeoutError):
+                self._set_status(name, False)
+                logger.warning(f"Connection lost/failed for {name}. Retrying in 2s...")
+            except Exception as e:
+                logger.error(f"Unexpected error in {name} ingest task: {e}")
+            finally:
+                if transport is not None:
+                    transport.close()
+                    SENSOR_CONNECTED.labels(name).set(0)
+            await asyncio.sleep(2.0)
+
+class _SensorProtocol(asyncio.BufferedProtocol):
+    """Receives one sensor connection straight into its StreamDecoder buffer."""
+    def __init__(self, engine: AsyncIngestEngine, sensor_name: str):
+        self.engine = engine
+        self.sensor_name = sensor_name
+        self.decoder = StreamDecoder(engine.protocols.get(sensor_name, "ndjson"), self._parse_error,
+                                     engine.capture.tap(sensor_name) if engine.capture else None)
+        self.m_readings = INGEST_READINGS.labels(sensor_name)
+        self.m_errors = INGEST_PARSE_ERRORS.labels(sensor_name)
+        loop = asyncio.get_running_loop()
+        self.last_rx = loop.time()
+        self.closed = loop.create_future()
+
+    def _parse_error(self, exc: Exception):
+        self.m_errors.inc()
+        logger.error(f"Error parsing data from {self.sensor_name}: {exc}")
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        return self.decoder.framer.writable()
+
+    def buffer_updated(self, nbytes: int):
+        self.last_rx = self.engine.loop.time()
+        self.decoder.commit(nbytes)
+        try:
+            readings = self.decoder.readings()
+        except ValueError as e:
+            self.m_errors.inc()
+            logger.error(f"Error framing data from {self.sensor_name}: {e}")
+            return
+        self.m_readings.inc(len(readings))
+        for reading in readings:
+            self.engine._deliver(reading)
+
+    def connection_lost(self, exc):
+        if not self.closed.done():
+            self.closed.set_result(exc)
@@ -0,0 +1,76 @@
+import struct
+from datetime import datetime
+from typing import Dict, List, Tuple
+from .data_models import SensorReading
+from .config import SENSORS_CONFIG, RECV_BUFFER_SIZE, STATUS_OK, STATUS_FAULTY
+from .framing import ReceiveBuffer
+
+# Wire format (little-endian), an alternative to NDJSON for high-rate sensors:
+#   frame  = header + count * sample
+#   header = magic b"SW" (2s), sample count (uint16)
+#   sample = sensor id (uint16), value (float64), epoch nanoseconds (int64), status (uint8)
+FRAME_MAGIC = b"SW"
+FRAME_HEADER = struct.Struct("<2sH")
+SAMPLE = struct.Struct("<HdqB")
+MAX_SAMPLES_PER_FRAME = 0xFFFF
+
+STATUS_CODES = {STATUS_OK: 0, STATUS_FAULTY: 1}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+def sensor_ids(sensors_config: Dict[str, dict]) -> Dict[str, int]:
+    """
+    Name -> wire id of every sensor configured with an "id". Only sensors
+    using the binary protocol must have one, so NDJSON-only setups need none.
+    """
+    missing = [name for name, cfg in sensors_config.items() if cfg.get("protocol") == "binary" and "id" not in cfg]
+    if missing:
+        raise ValueError(f"Binary protocol sensors need an 'id' in SENSORS_CONFIG: {', '.join(missing)}")
+    return {name: cfg["id"] for name, cfg in sensors_config.items() if "id" in cfg}
+
+# Sensor id <-> name mapping shared with the simulator's local config copy
+SENSOR_IDS = sensor_ids(SENSORS_CONFIG)
+SENSOR_NAMES = {sensor_id: name for name, sensor_id in SENSOR_IDS.items()}
+
+Sample = Tuple[int, float, int, int]  # sensor_id, value, epoch_ns, status_code
+
+def encode_frame(samples: List[Sample]) -> bytes:
+    """Packs up to MAX_SAMPLES_PER_FRAME samples into one length-prefixed frame."""
+    if len(samples) > MAX_SAMPLES_PER_FRAME:
+        raise ValueError(f"At most {MAX_SAMPLES_PER_FRAME} samples per frame")
+    out = bytearray(FRAME_HEADER.size + SAMPLE.size * len(samples))
+    FRAME_HEADER.pack_into(out, 0, FRAME_MAGIC, len(samples))
+    offset = FRAME_HEADER.size
+    for sample in samples:
+        SAMPLE.pack_into(out, offset, *sample)
+        offset += SAMPLE.size
+    return bytes(out)
+
+def sample_to_reading(sample: Sample) -> SensorReading:
+    sensor_id, value, epoch_ns, status = sample
+    return SensorReading(
+        sensor_name=SENSOR_NAMES[sensor_id],
+        value=value,
+        timestamp=datetime.fromtimestamp(epoch_ns / 1e9),
+        status=STATUS_NAMES.get(status, STATUS_FAULTY)
+    )
+
+class BinaryFramer(ReceiveBuffer):
+    """Splits a TCP byte stream into binary telemetry frames."""
+    def __init__(self, recv_size: int = RECV_BUFFER_SIZE):
+        super().__init__(recv_size)
+
+    def samples(self) -> List[Sample]:
+        """Returns the samples of every complete frame received so far."""
+        out = []
+        header_size = FRAME_HEADER.size
+        while self.end - self.start >= header_size:
+            magic, count = FRAME_HEADER.unpack_from(self.buf, self.start)
+            if magic != FRAME_MAGIC:
+                self.reset()
+                raise ValueError("Invalid frame header")
+            frame_end = self.start + header_size + count * SAMPLE.size
+            if frame_end > self.end:
+                break
+            out.extend(SAMPLE.iter_unpack(self.view[self.start + header_size:frame_end]))
+            self.start = frame_end
+        return out
@@ -0,0 +1,171 @@
+import gzip
+import json
+import os
+import struct
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from .logger import logger
+from .config import CAPTURE_DIR, CAPTURE_CHUNK_BYTES, CAPTURE_CHUNK_SECONDS
+from .history_store import _safe_name
+
+# Chunk file contents (gzip-compressed): records of receive time (epoch ns),
+# byte count, then the bytes exactly as they came off the socket
+CAPTURE_RECORD = struct.Struct("<qI")
+CHUNK_SUFFIX = ".cap.gz"
+MANIFEST = "manifest.json"
+
+Record = Tuple[int, bytes]  # receive epoch ns, raw bytes
+
+def new_session_dir(root: str = CAPTURE_DIR) -> str:
+    return os.path.join(root, datetime.now().strftime("%Y%m%d-%H%M%S"))
+
+def list_sessions(root: str = CAPTURE_DIR) -> List[str]:
+    """Session directories under root, oldest first."""
+    if not os.path.isdir(root):
+        return []
+    return sorted(os.path.join(root, d) for d in os.listdir(root) if os.path.isfile(os.path.join(root, d, MANIFEST)))
+
+def encode_records(records: List[Record]) -> bytes:
+    return b"".join(CAPTURE_RECORD.pack(t, len(data)) + data for t, data in records)
+
+def decode_records(raw: bytes) -> List[Record]:
+    out = []
+    offset, size = 0, CAPTURE_RECORD.size
+    while offset + size <= len(raw):
+        t, n = CAPTURE_RECORD.unpack_from(raw, offset)
+        offset += size
+        if offset + n > len(raw):
+            break  # truncated tail
+        out.append((t, raw[offset:offset + n]))
+        offset += n
+    return out
+
+def read_chunk(path: str) -> List[Record]:
+    with gzip.open(path, "rb") as f:
+        return decode_records(f.read())
+
+class CaptureWriter(threading.Thread):
+    """
+    Records each sensor's raw byte stream with receive timestamps. tap(sensor)
+    returns the callback handed to StreamDecoder(on_raw=...); it only queues
+    the bytes, and this thread compresses and writes them every second.
+
+    A session directory holds manifest.json (the sensors' ports and wire
+    protocols) and one directory per sensor of gzip chunk files named by the
+    receive time of their first record. Chunks are written whole (temp file
+    and rename), so a crash loses at most the open chunk.
+    """
+    def __init__(self, sensors_config: Dict[str, dict], session_dir: Optional[str] = None,
+                 chunk_bytes: int = CAPTURE_CHUNK_BYTES, chunk_seconds: float = CAPTURE_CHUNK_SECONDS,
+                 flush_interval: float = 1.0, write_manifest: bool = True):
+        super().__init__(daemon=True)
+        self.session_dir = session_dir or new_session_dir()
+        self.chunk_bytes = chunk_bytes
+        self.chunk_seconds = chunk_seconds
+        self.flush_interval = flush_interval
+        self.running = True
+        self.bytes_captured = 0
+        self._pending = deque()
+        self._open: Dict[str, list] = {}  # sensor -> [opened monotonic, records, raw size]
+        self._wakeup = threading.Event()
+        os.makedirs(self.session_dir, exist_ok=True)
+        if write_manifest:
+            manifest = {"started": datetime.now().isoformat(), "sensors": {
+                name: {k: cfg[k] for k in ("port", "protocol", "id") if k in cfg} for name, cfg in sensors_config.items()}}
+            tmp = os.path.join(self.session_dir, MANIFEST + ".tmp")
+            with open(tmp, "w") as f:
+                json.dump(manifest, f, indent=1)
+            os.replace(tmp, os.path.join(self.session_dir, MANIFEST))
+
+    def tap(self, sensor: str) -> Callable[[bytes], None]:
+        pending = self._pending
+        return lambda data: pending.append((sensor, time.time_ns(), data))
+
+    def submit(self, sensor: str, recv_ns: int, data: bytes):
+        self._pending.append((sensor, recv_ns, data))
+
+    def flush(self, close_all: bool = False):
+        pending = self._pending
+        now = time.monotonic()
+        while pending:
+            sensor, t, data = pending.popleft()
+            chunk = self._open.get(sensor)
+            if chunk is None:
+                chunk = self._open[sensor] = [now, [], 0]
+            chunk[1].append((t, data))
+            chunk[2] += len(data)
+            self.bytes_captured += len(data)
+            if chunk[2] >= self.chunk_bytes:
+                self._write_chunk(sensor)
+        for sensor, chunk in list(self._open.items()):
+            if close_all or now - chunk[0] >= self.chunk_seconds:
+                self._write_chunk(sensor)
+
+    def _write_chunk(self, sensor: str):
+        _, records, _ = self._open.pop(sensor)
+        directory = os.path.join(self.session_dir, _safe_name(sensor))
+        path = os.path.join(directory, f"{records[0][0]}{CHUNK_SUFFIX}")
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                f.write(gzip.compress(encode_records(records), compresslevel=6))
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            logger.error(f"Failed to write capture chunk {path}: {e}")
+
+    def run(self):
+        logger.info(f"Capturing raw sensor streams to {self.session_dir}")
+        while self.running:
+            self._wakeup.wait(self.flush_interval)
+            self.flush()
+
+    def stop(self):
+        self.running = False
+        self._wakeup.set()
+        if self.is_alive():
+            self.join()
+        self.flush(close_all=True)
+
+class CaptureReader:
+    """Reads a capture session: its manifest and each sensor's records in receive order."""
+    def __init__(self, session_dir: str):
+        self.session_dir = session_dir
+        with open(os.path.join(session_dir, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        self.sensors: Dict[str, dict] = self.manifest["sensors"]
+
+    def chunks(self, sensor: str) -> List[Tuple[int, str]]:
+        """(first receive ns, path) of each chunk, oldest first."""
+        directory = os.path.join(self.session_dir, _safe_name(sensor))
+        if not os.path.isdir(directory):
+            return []
+        out = []
+        for fname in os.listdir(directory):
+            if fname.endswith(CHUNK_SUFFIX):
+                try:
+                    out.append((int(fname[:-len(CHUNK_SUFFIX)]), os.path.join(directory, fname)))
+                except ValueError:
+                    continue
+        return sorted(out)
+
+    def records(self, sensor: str) -> Iterator[Record]:
+        for _, path in self.chunks(sensor):
+            yield from read_chunk(path)
+
+    def span(self) -> Tuple[int, int]:
+        """(first, last) receive time in epoch ns over every sensor."""
+        first, last = None, None
+        for sensor in self.sensors:
+            chunks = self.chunks(sensor)
+            if not chunks:
+                continue
+            first = chunks[0][0] if first is None else min(first, chunks[0][0])
+            tail = read_chunk(chunks[-1][1])
+            if tail:
+                last = tail[-1][0] if last is None else max(last, tail[-1][0])
+        if first is None:
+            raise ValueError(f"No captured data in {self.session_dir}")
+        return first, last
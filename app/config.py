@@ -2,14 +2,44 @@ import os
 
 # Networking Configuration
 HOST = "127.0.0.1"
+# "id" identifies the sensor in binary frames; "protocol" is "ndjson" (default) or
+# "binary" and must match the simulator's setting for that sensor.
+# Optional alarm rule keys (see app/alarm_rules.py): "deadband" (hysteresis before an
+# alarm clears), "on_delay"/"off_delay" (consecutive samples to raise/clear) and
+# "max_rate" (largest allowed change per second).
 SENSORS_CONFIG = {
-    "Temperature": {"port": 5001, "low": 10.0, "high": 80.0, "unit": "°C"},
-    "Pressure":    {"port": 5002, "low": 0.5,  "high": 12.0, "unit": "bar"},
-    "Speed":       {"port": 5003, "low": 0,    "high": 3000, "unit": "RPM"},
-    "Vibration":   {"port": 5004, "low": 0,    "high": 5.0,  "unit": "mm/s"},
-    "Counter":     {"port": 5005, "low": None, "high": None, "unit": "pcs"} # Counter usually has no limits
+    "Temperature": {"port": 5001, "id": 1, "low": 10.0, "high": 80.0, "unit": "°C"},
+    "Pressure":    {"port": 5002, "id": 2, "low": 0.5,  "high": 12.0, "unit": "bar"},
+    "Speed":       {"port": 5003, "id": 3, "low": 0,    "high": 3000, "unit": "RPM"},
+    "Vibration":   {"port": 5004, "id": 4, "low": 0,    "high": 5.0,  "unit": "mm/s", "protocol": "ndjson",
+                    "deadband": 0.2, "on_delay": 3, "off_delay": 5},
+    "Counter":     {"port": 5005, "id": 5, "low": None, "high": None, "unit": "pcs"} # Counter usually has no limits
 }
 
+# Ingestion Configuration
+# "threads": one SensorWorker QThread per sensor.
+# "asyncio": every sensor connection multiplexed on INGEST_LOOPS event loops.
+# "processes": sensors sharded across INGEST_PROCESSES worker processes that parse
+#              into shared-memory rings of SHM_RING_CAPACITY records each
+#              (app/shm_ingest.py); the app reads them without pickling.
+INGEST_MODE = "threads"
+INGEST_LOOPS = 1
+INGEST_PROCESSES = 2
+SHM_RING_CAPACITY = 65536
+
+# Batched delivery: workers hand readings to the GUI thread as one list per
+# BATCH_FLUSH_MS (or as soon as BATCH_MAX_READINGS are pending).
+BATCH_DELIVERY_ENABLED = False
+BATCH_MAX_READINGS = 100
+BATCH_FLUSH_MS = 50
+
+# Socket receive size per recv_into() call, and the longest accepted NDJSON line
+RECV_BUFFER_SIZE = 4096
+MAX_LINE_BYTES = 1024 * 1024
+
+# JSON decoder for sensor packets: "auto" (orjson > msgspec > json), or force one
+JSON_BACKEND = "auto"
+
 # SMTP Configuration
 # SET TO True to test implemented SMTP alert logic.
 # Feature is fully integrated but disabled by default to prevent "connection failed" logs with placeholders.
@@ -31,6 +61,13 @@ DESKTOP_NOTIFICATIONS_ENABLED = True
 # WebSocket Monitoring
 WS_PORT = 8765
 WS_HOST = "0.0.0.0"
+# Messages are serialized once and sent as one batch frame per WS_BATCH_INTERVAL_MS
+# (0 = one frame per broadcast call). Each client queues up to WS_CLIENT_QUEUE_FRAMES
+# frames, dropping the oldest when full; a client that keeps overflowing for
+# WS_SLOW_CLIENT_EVICT_S is disconnected.
+WS_BATCH_INTERVAL_MS = 100
+WS_CLIENT_QUEUE_FRAMES = 50
+WS_SLOW_CLIENT_EVICT_S = 10.0
 
 # Maintenance Configuration
 MAINTENANCE_PASSWORD = "admin"
@@ -38,16 +75,96 @@ MAINTENANCE_PASSWORD = "admin"
 # UI Configuration
 UPDATE_INTERVAL_MS = 200  # 5 times per second
 PLOT_HISTORY_SECONDS = 20
+# Expected samples/sec per sensor for sizing plot history (override per sensor
+# with a "rate_hz" key). Buffers grow automatically if a sensor runs faster,
+# up to PLOT_HISTORY_MAX_SAMPLES samples each.
+DEFAULT_SAMPLE_RATE_HZ = 2.0
+PLOT_HISTORY_MAX_SAMPLES = 1_000_000
+# Cache plot backgrounds and blit only the data line; axes redraw on limit changes
+PLOT_BLITTING_ENABLED = True
+# Reduce each plot to ~2 points per pixel of canvas width: "minmax", "lttb" or "none".
+# Samples breaching a sensor's low/high limits are always kept.
+PLOT_DECIMATION = "minmax"
 UI_REFRESH_RATE = 2       # Desired Hz for data consumption
 
 # API Configuration
 API_PORT = 5000
+# "flask": Flask development server in a thread.
+# "asyncio": event-loop HTTP/1.1 server (app/api_server.py) with keep-alive and a
+# connection limit; /api/status is answered on the loop, other routes run the
+# Flask app on API_WSGI_THREADS worker threads. Stats at /api/server-stats.
+API_SERVER_MODE = "flask"
+API_MAX_CONNECTIONS = 1000
+API_KEEPALIVE_TIMEOUT_S = 15.0
+API_WSGI_THREADS = 8
+API_LATENCY_WINDOW = 10000  # most recent requests kept for latency percentiles
+
+# History API: default range when "from" is omitted, default point budget per
+# sensor, and rows per streamed NDJSON chunk.
+API_HISTORY_DEFAULT_SECONDS = 3600
+API_HISTORY_MAX_POINTS = 1000
+API_STREAM_CHUNK_ROWS = 1000
+
+# /api/status serves a pre-encoded snapshot republished each UI tick when data
+# changed. Bodies of at least SNAPSHOT_GZIP_MIN_BYTES are also kept gzipped.
+# Long-poll (?since_version=N) waits up to SNAPSHOT_LONG_POLL_S (client "timeout" is capped).
+SNAPSHOT_GZIP_ENABLED = True
+SNAPSHOT_GZIP_MIN_BYTES = 1024
+SNAPSHOT_LONG_POLL_S = 25.0
+SNAPSHOT_LONG_POLL_MAX_S = 60.0
 
 # Paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Created on first use (by the logger), not when config is imported
 LOG_DIR = os.path.join(BASE_DIR, "logs")
-if not os.path.exists(LOG_DIR):
-    os.makedirs(LOG_DIR)
+
+# Sensor History Store
+# Append-only segment files per sensor under HISTORY_DIR; a new segment starts
+# every HISTORY_SEGMENT_SECONDS and segments older than the retention are deleted.
+HISTORY_ENABLED = True
+HISTORY_DIR = os.path.join(LOG_DIR, "history")
+HISTORY_SEGMENT_SECONDS = 3600
+HISTORY_RETENTION_DAYS = 7
+HISTORY_FLUSH_INTERVAL_S = 1.0
+
+# Rollups: count/min/max/sum/sumsq per sensor at each resolution (label -> seconds).
+# Closed buckets are stored under ROLLUP_DIR; queries pick the finest resolution
+# that fits in ROLLUP_MAX_POINTS buckets.
+ROLLUP_DIR = os.path.join(LOG_DIR, "rollups")
+ROLLUP_RESOLUTIONS = {"1s": 1, "1m": 60, "1h": 3600}
+ROLLUP_RETENTION_DAYS = {"1s": 7, "1m": 90, "1h": 3650}
+ROLLUP_MAX_POINTS = 2000
+
+# Raw Stream Capture (app/capture.py; replay with python -m app.replay)
+# Every byte received from each sensor, with its receive time, goes to gzip chunk files
+# under CAPTURE_DIR/<session>/<sensor>/. A chunk is closed after CAPTURE_CHUNK_BYTES of
+# raw data or CAPTURE_CHUNK_SECONDS, whichever comes first.
+CAPTURE_ENABLED = False
+CAPTURE_DIR = os.path.join(LOG_DIR, "captures")
+CAPTURE_CHUNK_BYTES = 4 * 1024 * 1024
+CAPTURE_CHUNK_SECONDS = 60.0
+
+# Metrics (app/metrics.py): scraped from /api/metrics in the Prometheus text format and
+# shown in the Maintenance tab, which recomputes rates and latencies every METRICS_REFRESH_MS
+METRICS_REFRESH_MS = 1000
+
+# Alarm Notification Dispatcher (email/webhook; see app/notifications.py)
+# Deliveries run on NOTIFY_WORKERS threads over one kept-alive connection per channel.
+# After a delivery, further alarms on that channel are collected for NOTIFY_DIGEST_WINDOW_S
+# and sent as one digest; each channel sends at most NOTIFY_RATE_LIMIT messages per
+# NOTIFY_RATE_PERIOD_S (alarms over the limit join the next digest).
+NOTIFY_WORKERS = 4
+NOTIFY_DIGEST_WINDOW_S = 10.0
+NOTIFY_RATE_LIMIT = 6
+NOTIFY_RATE_PERIOD_S = 60.0
+# Undelivered messages are kept in NOTIFY_OUTBOX_DIR (surviving restarts) and retried
+# with exponential backoff; after NOTIFY_MAX_ATTEMPTS they move to its "failed" folder.
+NOTIFY_OUTBOX_DIR = os.path.join(LOG_DIR, "outbox")
+NOTIFY_MAX_ATTEMPTS = 8
+NOTIFY_BACKOFF_S = 2.0
+NOTIFY_BACKOFF_MAX_S = 300.0
+# The SMTP connection is reused between emails and closed after this long idle
+SMTP_IDLE_TIMEOUT_S = 60.0
 
 # Status strings
 STATUS_OK = "OK"
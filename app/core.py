@@ -0,0 +1,229 @@
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from .data_models import SensorReading, AlarmEvent
+from .logger import logger
+from .config import (SENSORS_CONFIG, INGEST_MODE, INGEST_LOOPS, UPDATE_INTERVAL_MS, HISTORY_ENABLED,
+                     CAPTURE_ENABLED, WS_HOST, WS_PORT)
+from .alarm_manager import AlarmManager
+from .async_ingest import AsyncIngestEngine, shard_sensors
+from .capture import CaptureWriter
+from .shm_ingest import ShmIngest
+from .history_store import HistoryStore, HistoryWriter
+from .rollups import RollupEngine
+from .notifications import NotificationDispatcher
+from .ws_server import WebSocketServer
+from .metrics import REGISTRY
+from . import api
+
+BATCH_SECONDS = REGISTRY.histogram("core_batch_seconds", "Time to process one batch: history, alarms, API, broadcast")
+QUEUE_DEPTH = REGISTRY.gauge("core_queue_depth", "Batches waiting for the headless core thread")
+ALARMS_ACTIVE = REGISTRY.gauge("alarms_active", "Sensors currently in an alarm state")
+SENSORS_FAULTY = REGISTRY.gauge("sensors_faulty", "Sensors currently reporting a fault")
+WS_CLIENTS = REGISTRY.gauge("ws_clients", "Connected WebSocket clients")
+WS_DROPPED = REGISTRY.counter("ws_dropped_messages_total", "WebSocket messages dropped for slow clients")
+NOTIFY_PENDING = REGISTRY.gauge("notifications_pending", "Alerts queued or waiting for a retry")
+NOTIFY_SENT = REGISTRY.counter("notifications_sent_total", "Alerts delivered")
+NOTIFY_FAILED = REGISTRY.counter("notifications_failed_total", "Alerts given up on after retries")
+
+BatchListener = Callable[[List[SensorReading], List[AlarmEvent]], None]
+
+class SensorCore:
+    """
+    Everything the dashboard does except drawing it: alarm evaluation,
+    history and rollups, notifications, REST API state and WebSocket
+    broadcast. Imports no Qt, so it runs headless (app/server.py) and the GUI
+    (app/main.py) is just one more client, attached through add_batch_listener
+    and the alarm manager's status listeners.
+
+    process() must be called from one thread at a time: the GUI calls it from
+    the Qt thread; start() instead runs ingestion (asyncio, or the shared-memory
+    process pool) plus a core thread that processes the queued batches and
+    publishes the API snapshot.
+    """
+    def __init__(self, sensors_config: Dict[str, dict] = SENSORS_CONFIG, history: bool = HISTORY_ENABLED,
+                 notifier: Optional[NotificationDispatcher] = None, tick_interval: float = UPDATE_INTERVAL_MS / 1000.0,
+                 capture: bool = CAPTURE_ENABLED):
+        self.sensors_config = sensors_config
+        self.tick_interval = tick_interval
+        self.alarms = AlarmManager(sensors_config)
+        self.alarms.add_status_listener(self._on_status_change)
+        api.system_status = self.alarms.system_status()
+        self.all_readings: Dict[str, SensorReading] = {}  # sensor_name -> latest reading
+        self._snapshot_dirty = False  # api.latest_data changed since the last published snapshot
+        self._batch_listeners: List[BatchListener] = []
+
+        # Persistent history; range reads go through the store, never the ingest path
+        self.history = self.rollups = None
+        if history:
+            self.rollups = RollupEngine()
+            self.history = HistoryWriter(HistoryStore(), rollups=self.rollups)
+            api.history_store = self.history.store
+            api.rollup_engine = self.rollups
+
+        self.notifier = notifier if notifier is not None else NotificationDispatcher()
+        self.capture_enabled = capture
+        self.capture: Optional[CaptureWriter] = None  # raw stream recorder, created by start_services
+        self.ws_server: Optional[WebSocketServer] = None
+        self.engines = []  # AsyncIngestEngine or ShmIngest, each with stop()
+        self.running = False
+        self._queue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+
+        # Read when /api/metrics is scraped, never on the ingest path
+        QUEUE_DEPTH.set_function(self._queue.qsize)
+        ALARMS_ACTIVE.set_function(lambda: self.alarms.rules.alarm_count)
+        SENSORS_FAULTY.set_function(lambda: self.alarms.rules.faulty_count)
+        WS_CLIENTS.set_function(lambda: len(self.ws_server.clients) if self.ws_server else 0)
+        WS_DROPPED.set_function(lambda: self.ws_server.stats()["dropped_messages"] if self.ws_server else 0)
+        NOTIFY_PENDING.set_function(lambda: self.notifier.stats()["pending"])
+        NOTIFY_SENT.set_function(lambda: self.notifier.stats()["sent"])
+        NOTIFY_FAILED.set_function(lambda: self.notifier.stats()["failed"])
+
+    def add_batch_listener(self, callback: BatchListener):
+        """Registers callback(readings, new_alarms), called after each processed batch."""
+        self._batch_listeners.append(callback)
+
+    # --- lifecycle -------------------------------------------------------
+    def start_services(self, rest_api: bool = True, websocket: bool = True, ws_port: int = WS_PORT):
+        """Starts the writers and servers; ingestion stays with the caller."""
+        if self.history:
+            self.history.start()
+        if self.capture_enabled:
+            # Ingest workers pass their raw streams to self.capture (GUI: see setup_workers)
+            self.capture = CaptureWriter(self.sensors_config)
+            self.capture.start()
+        self.notifier.start()
+        if rest_api:
+            api.start_api_thread()
+            logger.info(f"REST API started on port {api.API_PORT}")
+        if websocket:
+            self.ws_server = WebSocketServer(WS_HOST, ws_port)
+            self.ws_server.start()
+            api.ws_server = self.ws_server
+            logger.info(f"WebSocket Server started on {WS_HOST}:{ws_port}")
+
+    def start_ingest(self, n_loops: int = INGEST_LOOPS, mode: str = INGEST_MODE):
+        """
+        Connects to every sensor and queues batches for the core thread: in a
+        process pool over shared memory when mode is "processes", otherwise
+        on n_loops asyncio loops in this process.
+        """
+        if mode == "processes":
+            ingest = ShmIngest(self.sensors_config,
+                               capture_dir=self.capture.session_dir if self.capture else None)
+            ingest.start()
+            threading.Thread(target=ingest.run, args=(self.submit,), name="shm-reader", daemon=True).start()
+            self.engines.append(ingest)
+            return
+        protocols = {name: cfg.get('protocol', 'ndjson') for name, cfg in self.sensors_config.items()}
+        for shard in shard_sensors(self.sensors_config, n_loops):
+            engine = AsyncIngestEngine(shard, lambda reading: self.submit([reading]),
+                                       on_batch=self.submit, protocols=protocols, capture=self.capture)
+            engine.start()
+            self.engines.append(engine)
+
+    def start(self, rest_api: bool = True, websocket: bool = True, ws_port: int = WS_PORT,
+              mode: str = INGEST_MODE):
+        """Headless mode: services, ingestion and the core processing thread."""
+        self.start_services(rest_api, websocket, ws_port)
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="sensor-core", daemon=True)
+        self._thread.start()
+        self.start_ingest(mode=mode)
+
+    def stop(self):
+        for engine in self.engines:
+            engine.stop()
+        self.engines = []
+        if self.capture:
+            self.capture.stop()  # Writes the open chunks
+            self.capture = None
+        self.running = False
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self.history:
+            self.history.stop()  # Flush readings and open rollup buckets to disk
+        self.notifier.stop()  # Unsent alerts stay in the outbox for the next start
+
+    def submit(self, readings: List[SensorReading]):
+        """Thread-safe: queues a batch for the core thread started by start()."""
+        self._queue.put(readings)
+
+    def _run(self):
+        next_tick = time.monotonic() + self.tick_interval
+        while self.running:
+            try:
+                readings = self._queue.get(timeout=max(0.0, next_tick - time.monotonic()))
+            except queue.Empty:
+                readings = None
+            if readings:
+                self.process(readings)
+            if time.monotonic() >= next_tick:
+                self.tick()
+                next_tick = time.monotonic() + self.tick_interval
+
+    # --- processing ------------------------------------------------------
+    def process(self, readings: List[SensorReading]) -> List[AlarmEvent]:
+        """
+        Handles a list of readings in one pass: history per reading, alarms
+        as one batch, then API state, WebSocket broadcast and notifications.
+        Returns the alarms raised by this batch.
+        """
+        started = time.perf_counter()
+        latest = {}
+        messages = []
+        if self.history:
+            self.history.submit_many(readings)
+        for reading in readings:
+            if self.rollups:
+                self.rollups.add(reading)
+            latest[reading.sensor_name] = reading
+            messages.append({
+                "type": "reading",
+                "sensor": reading.sensor_name,
+                "value": reading.value,
+                "timestamp": reading.timestamp.isoformat(),
+                "status": reading.status
+            })
+
+        # Check Alarms for the whole batch in one vectorized pass
+        alarms = self.alarms.check_batch(readings)
+
+        self.all_readings.update(latest)
+        for name, reading in latest.items():
+            api.latest_data[name] = {
+                "value": reading.value,
+                "timestamp": reading.timestamp.isoformat(),
+                "status": reading.status,
+                "alarm": self.alarms.active_alarms.get(name)
+            }
+        if latest:
+            self._snapshot_dirty = True
+
+        if self.ws_server:
+            self.ws_server.broadcast_many(messages)
+
+        for alarm in alarms:
+            logger.warning(f"ALARM TRIGGERED: {alarm.message}")
+            self.notifier.notify(alarm)
+
+        BATCH_SECONDS.observe(time.perf_counter() - started)
+        for callback in self._batch_listeners:
+            callback(readings, alarms)
+        return alarms
+
+    def tick(self):
+        """Periodic work: publish the API snapshot if anything changed since the last tick."""
+        if self._snapshot_dirty:
+            # One encode per tick, shared by every /api/status request until the next change
+            api.publish_status()
+            self._snapshot_dirty = False
+
+    def _on_status_change(self, old, status):
+        # Fired by the alarm manager only when the global status flips
+        logger.info(f"System status changed: {old} -> {status}")
+        api.system_status = status
+        self._snapshot_dirty = True
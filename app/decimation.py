@@ -0,0 +1,89 @@
+from typing import Optional, Tuple
+import numpy as np
+
+def _bucket_matrix(y: np.ndarray, n_buckets: int) -> Tuple[np.ndarray, int]:
+    """
+    Reshapes y into n_buckets rows of equal length (the last row padded with
+    the final value) so per-bucket reductions run as single NumPy calls.
+    """
+    size = -(-len(y) // n_buckets)  # ceil division
+    padded = np.empty(n_buckets * size, dtype=y.dtype)
+    padded[:len(y)] = y
+    padded[len(y):] = y[-1]
+    return padded.reshape(n_buckets, size), size
+
+def minmax_indices(y: np.ndarray, n_buckets: int) -> np.ndarray:
+    """Indices of the min and max sample of each bucket, in time order."""
+    rows, size = _bucket_matrix(y, n_buckets)
+    offsets = np.arange(n_buckets) * size
+    imin = rows.argmin(axis=1) + offsets
+    imax = rows.argmax(axis=1) + offsets
+    idx = np.sort(np.stack([imin, imax], axis=1), axis=1).ravel()
+    return np.minimum(idx, len(y) - 1)
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: keeps the first and last samples and, for
+    each bucket in between, the sample forming the largest triangle with the
+    previously kept sample and the next bucket's average.
+    """
+    n = len(x)
+    if n_out <= 2:
+        return np.array([0, n - 1], dtype=np.int64)
+    edges = np.floor(np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    # Next-bucket averages for every bucket at once
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    avg_x = np.append(avg_x[1:], x[-1])
+    avg_y = np.append(avg_y[1:], y[-1])
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - avg_x[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (avg_y[i] - ay))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+def breach_indices(y: np.ndarray, n_buckets: int, low: Optional[float], high: Optional[float]) -> np.ndarray:
+    """Per bucket, the index of the worst alarm-limit violation (if any)."""
+    lo = -np.inf if low is None else low
+    hi = np.inf if high is None else high
+    excess = np.maximum(y - hi, lo - y)
+    if not (excess > 0).any():
+        return np.empty(0, dtype=np.int64)
+    rows, size = _bucket_matrix(excess, n_buckets)
+    worst = rows.argmax(axis=1)
+    hit = rows[np.arange(n_buckets), worst] > 0
+    idx = worst[hit] + np.arange(n_buckets)[hit] * size
+    return np.minimum(idx, len(y) - 1)
+
+def decimate(x: np.ndarray, y: np.ndarray, n_pixels: int, mode: str = "minmax",
+             low: Optional[float] = None, high: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduces (x, y) to about two points per horizontal pixel so render cost is
+    bounded by canvas width instead of history length.
+
+    mode: "minmax" keeps each pixel bucket's extremes; "lttb" keeps its most
+    visually significant sample. Samples outside the [low, high] alarm limits
+    are always kept (the worst one per bucket), so alarm spikes stay visible.
+    """
+    n_buckets = max(1, int(n_pixels))
+    if mode == "none" or len(x) <= 2 * n_buckets:
+        return x, y
+
+    if mode == "lttb":
+        idx = lttb_indices(x, y, 2 * n_buckets)
+    elif mode == "minmax":
+        idx = minmax_indices(y, n_buckets)
+    else:
+        raise ValueError(f"Unknown decimation mode '{mode}'")
+
+    extra = breach_indices(y, n_buckets, low, high)
+    idx = np.unique(np.concatenate([idx, extra, [0, len(x) - 1]]))
+    return x[idx], y[idx]
@@ -0,0 +1,90 @@
+import socket
+from typing import List
+from .config import RECV_BUFFER_SIZE, MAX_LINE_BYTES
+
+class ReceiveBuffer:
+    """
+    Preallocated bytearray that a socket receives straight into (recv_into).
+    Subclasses consume complete frames between `start` and `end`; a trailing
+    partial frame is compacted to the front, or moved to a larger buffer.
+    """
+    def __init__(self, recv_size: int = RECV_BUFFER_SIZE):
+        self.recv_size = recv_size
+        self.buf = bytearray(recv_size * 2)
+        self.view = memoryview(self.buf)
+        self.start = 0  # first unconsumed byte
+        self.end = 0    # end of valid data
+
+    def recv_into(self, sock: socket.socket) -> int:
+        """Receives up to recv_size bytes from sock. Returns 0 on EOF."""
+        n = sock.recv_into(self.writable(), self.recv_size)
+        self.commit(n)
+        return n
+
+    def writable(self) -> memoryview:
+        """Returns a writable window of at least recv_size bytes at the end of the buffer."""
+        self._make_room()
+        return self.view[self.end:]
+
+    def commit(self, n: int):
+        """Marks n bytes written into the window returned by writable() as valid."""
+        self.end += n
+
+    def reset(self):
+        self.start = self.end = 0
+
+    def _shifted(self, offset: int):
+        """Called after pending data moved `offset` bytes towards the front."""
+
+    def _make_room(self):
+        if self.start == self.end:
+            self.reset()
+            return
+        if len(self.buf) - self.end >= self.recv_size:
+            return
+        pending = self.end - self.start
+        if len(self.buf) - pending < self.recv_size:
+            # Partial frame longer than the buffer: move it to a larger one.
+            # A fresh bytearray avoids resizing a buffer that may still be exported.
+            grown = bytearray(len(self.buf) * 2)
+            grown[:pending] = self.view[self.start:self.end]
+            self.buf = grown
+            self.view = memoryview(grown)
+        else:
+            # Compact the partial frame to the front of the buffer
+            self.buf[:pending] = self.view[self.start:self.end]
+        self._shifted(self.start)
+        self.start, self.end = 0, pending
+
+class LineFramer(ReceiveBuffer):
+    """
+    Splits a TCP byte stream into newline-delimited frames.
+
+    Only bytes that arrived since the last scan are searched for newlines.
+    Complete lines are handed out as bytes, ready for the JSON parser.
+    """
+    def __init__(self, recv_size: int = RECV_BUFFER_SIZE, max_line: int = MAX_LINE_BYTES):
+        super().__init__(recv_size)
+        self.max_line = max_line
+        self.scan = 0   # first byte not yet searched for a newline
+
+    def lines(self) -> List[bytes]:
+        """Returns the complete lines received so far, without their newlines."""
+        last = self.buf.rfind(b"\n", self.scan, self.end)
+        if last < 0:
+            self.scan = self.end
+            if self.end - self.start > self.max_line:
+                self.reset()
+                raise ValueError(f"Line exceeds {self.max_line} bytes")
+            return []
+        # One copy and one C-level split for the whole completed region
+        complete = self.view[self.start:last].tobytes()
+        self.start = self.scan = last + 1
+        return complete.split(b"\n")
+
+    def reset(self):
+        super().reset()
+        self.scan = 0
+
+    def _shifted(self, offset: int):
+        self.scan -= offset
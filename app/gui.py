@@ -1,8 +1,6 @@
 import sys
+import time
 from datetime import datetime
-from collections import deque
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QTableWidget, QTableWidgetItem, QLabel, QHeaderView,
                              QScrollArea, QFrame, QTabWidget, QPushButton, QLineEdit,
@@ -10,37 +8,12 @@ from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
 from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QColor, QFont
 
-from .config import SENSORS_CONFIG, PLOT_HISTORY_SECONDS, UPDATE_INTERVAL_MS, MAINTENANCE_PASSWORD
+from .config import (SENSORS_CONFIG, PLOT_HISTORY_SECONDS, UPDATE_INTERVAL_MS, MAINTENANCE_PASSWORD,
+                     DEFAULT_SAMPLE_RATE_HZ, PLOT_HISTORY_MAX_SAMPLES, PLOT_DECIMATION)
 from .data_models import SensorReading, AlarmEvent
 from .logger import logger
-
-class MplCanvas(FigureCanvas):
-    def __init__(self, title, unit, parent=None, width=5, height=3, dpi=100):
-        # We use a dark theme for a professional "industrial" look
-        plt.style.use('dark_background')
-        self.fig, self.ax = plt.subplots(figsize=(width, height), dpi=dpi)
-        super().__init__(self.fig)
-        self.setParent(parent)
-        self.ax.set_title(title, fontsize=10)
-        self.ax.set_ylabel(unit, fontsize=8)
-        self.ax.tick_params(axis='both', which='major', labelsize=8)
-        self.xdata = []
-        self.ydata = []
-        self.line, = self.ax.plot([], [], '#00ff00', linewidth=1)
-        self.fig.tight_layout()
-
-    def update_plot(self, new_x, new_y):
-        self.xdata = new_x
-        self.ydata = new_y
-        self.line.set_data(self.xdata, self.ydata)
-        if self.xdata:
-            self.ax.set_xlim(min(self.xdata), max(self.xdata))
-            # Dynamic Y-axis with some padding
-            if self.ydata:
-                ymin, ymax = min(self.ydata), max(self.ydata)
-                padding = max(0.1, (ymax - ymin) * 0.1)
-                self.ax.set_ylim(ymin - padding, ymax + padding)
-        self.draw()
+from .ring_buffer import SensorRingBuffer
+from .decimation import decimate
 
 class DashboardWindow(QMainWindow):
     def __init__(self):
@@ -48,11 +21,51 @@ class DashboardWindow(QMainWindow):
         self.setWindowTitle("Industrial Sensor Monitor - Si-Ware Systems")
         self.resize(1200, 800)
         
-        # Data storage
-        self.readings = {name: deque(maxlen=int(PLOT_HISTORY_SECONDS * 5)) for name in SENSORS_CONFIG}
+        # Data storage: per-sensor NumPy ring buffers sized by sample rate
+        self.readings = {
+            name: SensorRingBuffer.for_rate(PLOT_HISTORY_SECONDS, cfg.get("rate_hz", DEFAULT_SAMPLE_RATE_HZ),
+                                            max_capacity=PLOT_HISTORY_MAX_SAMPLES)
+            for name, cfg in SENSORS_CONFIG.items()
+        }
         self.latest_readings = {}
-        
+
+        # Redraw bookkeeping: ring buffer append counts at the last draw
+        self._plotted = {name: -1 for name in SENSORS_CONFIG}
+        self.plot_frame_ms = 0.0
+        self.skipped_plots = 0
+
+        # Table bookkeeping: row per sensor, and the last applied row/global styles
+        self._rows = {name: row for row, name in enumerate(SENSORS_CONFIG)}
+        self._row_status = {}
+        self._global_status = None
+
         self.setup_ui()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.canvases:
+            # Let the window paint first; matplotlib loads on the next loop iteration
+            QTimer.singleShot(0, self.create_plots)
+
+    def create_plots(self):
+        """Builds one plot per sensor, importing matplotlib on first use."""
+        if self.canvases:
+            return
+        from .plotting import MplCanvas
+        for i, (name, cfg) in enumerate(SENSORS_CONFIG.items()):
+            canvas = MplCanvas(name, cfg['unit'], width=3, height=2)
+            self.canvases[name] = canvas
+            # 2 columns grid
+            row, col = divmod(i, 2)
+            self.plots_grid.addWidget(canvas, row, col)
+
+    def load_history(self, store):
+        """Refills the plot buffers with the last PLOT_HISTORY_SECONDS from a HistoryStore."""
+        now_ns = time.time_ns()
+        for name, buffer in self.readings.items():
+            records = store.query(name, now_ns - int(PLOT_HISTORY_SECONDS * 1e9), now_ns)
+            for t, v, s in zip((records["t"] / 1e9).tolist(), records["v"].tolist(), records["s"].tolist()):
+                buffer.append_sample(t, v, s)
         
     def setup_ui(self):
         central_widget = QWidget()
@@ -116,15 +129,9 @@ class DashboardWindow(QMainWindow):
         plots_scroll = QScrollArea()
         plots_widget = QWidget()
         self.plots_grid = QGridLayout(plots_widget)
+        # Canvases are built right after the window first shows (see create_plots)
         self.canvases = {}
         
-        for i, (name, cfg) in enumerate(SENSORS_CONFIG.items()):
-            canvas = MplCanvas(name, cfg['unit'], width=3, height=2)
-            self.canvases[name] = canvas
-            # 2 columns grid
-            row, col = divmod(i, 2)
-            self.plots_grid.addWidget(canvas, row, col)
-            
         plots_scroll.setWidget(plots_widget)
         plots_scroll.setWidgetResizable(True)
         content_layout.addWidget(plots_scroll, 3)
@@ -186,6 +193,17 @@ class DashboardWindow(QMainWindow):
         h_cmd_layout.addWidget(self.clearlog_btn)
         ctrl_layout.addLayout(h_cmd_layout)
 
+        # Live Metrics: rates and latencies over the last refresh interval
+        ctrl_layout.addWidget(QLabel("Live Metrics"))
+        self.metrics_table = QTableWidget(0, 2)
+        self.metrics_table.setHorizontalHeaderLabels(["Metric", "Value"])
+        self.metrics_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.metrics_table.verticalHeader().setVisible(False)
+        self.metrics_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.metrics_table.setSelectionMode(QTableWidget.NoSelection)
+        self.metrics_table.setFixedHeight(200)
+        ctrl_layout.addWidget(self.metrics_table)
+
         # Log Viewer (A3)
         ctrl_layout.addWidget(QLabel("Live System Logs"))
         self.log_display = QTextEdit()
@@ -226,6 +244,16 @@ class DashboardWindow(QMainWindow):
         self.control_frame.setVisible(False)
         self.login_frame.setVisible(True)
 
+    def metrics_visible(self) -> bool:
+        return self.control_frame.isVisible() and self.tabs.currentWidget() is self.maintenance_tab
+
+    def update_metrics(self, rows):
+        """rows: (label, formatted value) pairs for the Live Metrics table."""
+        self.metrics_table.setRowCount(len(rows))
+        for i, (label, value) in enumerate(rows):
+            self.metrics_table.setItem(i, 0, QTableWidgetItem(label))
+            self.metrics_table.setItem(i, 1, QTableWidgetItem(value))
+
     def append_log(self, text):
         if self.log_pause_cb.isChecked():
             return
@@ -237,6 +265,9 @@ class DashboardWindow(QMainWindow):
             )
 
     def set_global_status(self, status):
+        if status == self._global_status:
+            return
+        self._global_status = status
         # Priority: ALARM (Red) > DEGRADED/FAULTY (Yellow) > ALL OK (Green)
         if status == "OK":
             self.status_label.setText("🟢 SYSTEM STATUS: ALL OK")
@@ -249,27 +280,32 @@ class DashboardWindow(QMainWindow):
             self.status_label.setStyleSheet("background-color: #c62828; color: white; border-radius: 5px; padding: 10px;")
 
     def update_sensor_row(self, reading: SensorReading, is_alarm: bool):
-        # find row
-        row = list(SENSORS_CONFIG.keys()).index(reading.sensor_name)
+        row = self._rows[reading.sensor_name]
         
         self.table.item(row, 1).setText(f"{reading.value:.2f} {SENSORS_CONFIG[reading.sensor_name]['unit']}")
         self.table.item(row, 2).setText(reading.timestamp.strftime("%H:%M:%S.%f")[:-3])
         
         # Strict Priority: Faulty (Yellow) > Alarm (Red) > OK (Green)
-        bg_color = QColor(Qt.transparent)
-        text_color = QColor(Qt.white)
-        status_text = "OK"
-        
         if reading.status != "OK":
-            bg_color = QColor("#f9a825") # Yellow
-            text_color = QColor(Qt.black)
             status_text = "FAULTY"
         elif is_alarm:
-            bg_color = QColor("#c62828") # Red
             status_text = "ALARM"
         else:
-            bg_color = QColor("#2e7d32") # Green
             status_text = "OK"
+        # Restyle only when the row's state actually changes
+        if self._row_status.get(reading.sensor_name) == status_text:
+            return
+        self._row_status[reading.sensor_name] = status_text
+
+        if status_text == "FAULTY":
+            bg_color = QColor("#f9a825") # Yellow
+            text_color = QColor(Qt.black)
+        elif status_text == "ALARM":
+            bg_color = QColor("#c62828") # Red
+            text_color = QColor(Qt.white)
+        else:
+            bg_color = QColor("#2e7d32") # Green
+            text_color = QColor(Qt.white)
 
         self.table.item(row, 3).setText(status_text)
         
@@ -292,12 +328,26 @@ class DashboardWindow(QMainWindow):
             self.alarm_log.removeRow(50)
 
     def update_plots(self):
-        for name, data_deque in self.readings.items():
-            if not data_deque:
+        if not self.canvases:
+            return  # Not built yet; the buffers keep filling meanwhile
+        start = time.perf_counter()
+        dashboard_visible = self.tabs.currentWidget() is self.dashboard_tab
+        for name, history in self.readings.items():
+            if not len(history) or history.appended == self._plotted[name]:
+                continue  # No new samples since the last draw
+
+            canvas = self.canvases[name]
+            if not dashboard_visible or not canvas.is_on_screen():
+                # Drawn on the first tick after it becomes visible again
+                self.skipped_plots += 1
                 continue
-            
+
             # Use relative time for X-axis
-            start_time = data_deque[0].timestamp.timestamp()
-            x = [r.timestamp.timestamp() - start_time for r in data_deque]
-            y = [r.value for r in data_deque]
-            self.canvases[name].update_plot(x, y)
+            t, y, _status = history.window(PLOT_HISTORY_SECONDS)
+            x = t - t[0]
+            if PLOT_DECIMATION != "none":
+                cfg = SENSORS_CONFIG[name]
+                x, y = decimate(x, y, canvas.pixel_width(), PLOT_DECIMATION, cfg.get("low"), cfg.get("high"))
+            canvas.update_plot(x, y)
+            self._plotted[name] = history.appended
+        self.plot_frame_ms = (time.perf_counter() - start) * 1000.0
@@ -0,0 +1,231 @@
+import mmap
+import os
+import re
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+from .data_models import SensorReading
+from .logger import logger
+from .config import (HISTORY_DIR, HISTORY_SEGMENT_SECONDS, HISTORY_RETENTION_DAYS,
+                     HISTORY_FLUSH_INTERVAL_S, STATUS_OK)
+
+# Fixed-width on-disk record: epoch nanoseconds, value, status (0 = OK, 1 = faulty)
+RECORD_DTYPE = np.dtype([("t", "<i8"), ("v", "<f8"), ("s", "u1")])
+SEGMENT_SUFFIX = ".seg"
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+class _Segment:
+    """One append-only file of records, starting at `start_ns`."""
+    def __init__(self, path: str, start_ns: int):
+        self.path = path
+        self.start_ns = start_ns
+        self._mmap = None
+        self._mapped_size = 0
+        self._lock = threading.Lock()  # guards the cached mapping, shared by reader threads
+
+    def records(self, dtype: np.dtype) -> np.ndarray:
+        """Read-only view over the whole records currently in the file."""
+        size = os.path.getsize(self.path)
+        size -= size % dtype.itemsize
+        if size == 0:
+            return np.empty(0, dtype=dtype)
+        with self._lock:
+            mapped, mapped_size = self._mmap, self._mapped_size
+        # Whole records are never removed, so a larger cached mapping still covers them
+        if mapped_size < size:
+            with open(self.path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+            with self._lock:
+                if size > self._mapped_size:
+                    self._mmap, self._mapped_size = mapped, size
+        # The view keeps its own mapping alive, whatever the cache holds next
+        return np.frombuffer(mapped, dtype=dtype, count=size // dtype.itemsize)
+
+class HistoryStore:
+    """
+    Append-only time-series store: one directory per sensor holding segment
+    files of fixed-width records, named by the timestamp of their first record.
+
+    Writes go to the newest segment and roll over every `segment_seconds`.
+    Reads map segments with mmap and binary-search the time column, so range
+    queries never touch the ingest path. Segments whose newest record is
+    older than the retention window are deleted by `enforce_retention`.
+    Any structured dtype whose first field is an int64 "t" in epoch ns works.
+    """
+    def __init__(self, root: str = HISTORY_DIR, segment_seconds: float = HISTORY_SEGMENT_SECONDS,
+                 retention_seconds: float = HISTORY_RETENTION_DAYS * 86400, dtype: np.dtype = RECORD_DTYPE):
+        self.root = root
+        self.dtype = np.dtype(dtype)
+        self.segment_ns = int(segment_seconds * 1e9)
+        self.retention_ns = int(retention_seconds * 1e9)
+        self._segments: Dict[str, List[_Segment]] = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _sensor_dir(self, sensor: str) -> str:
+        return os.path.join(self.root, _safe_name(sensor))
+
+    def _load(self, sensor: str) -> List[_Segment]:
+        """Returns the sorted segment list for a sensor, scanning disk on first use."""
+        segments = self._segments.get(sensor)
+        if segments is None:
+            segments = []
+            directory = self._sensor_dir(sensor)
+            if os.path.isdir(directory):
+                for fname in os.listdir(directory):
+                    if fname.endswith(SEGMENT_SUFFIX):
+                        try:
+                            start = int(fname[:-len(SEGMENT_SUFFIX)])
+                        except ValueError:
+                            continue
+                        segments.append(_Segment(os.path.join(directory, fname), start))
+            segments.sort(key=lambda seg: seg.start_ns)
+            self._segments[sensor] = segments
+        return segments
+
+    def sensors(self) -> List[str]:
+        with self._lock:
+            known = set(self._segments)
+        if os.path.isdir(self.root):
+            known.update(d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d)))
+        return sorted(known)
+
+    def append(self, sensor: str, records: np.ndarray):
+        """Appends a batch of records (RECORD_DTYPE, sorted by time) for one sensor."""
+        if not len(records):
+            return
+        with self._lock:
+            segments = self._load(sensor)
+            first_t = int(records["t"][0])
+            if not segments or first_t - segments[-1].start_ns >= self.segment_ns:
+                directory = self._sensor_dir(sensor)
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, f"{first_t}{SEGMENT_SUFFIX}")
+                segments.append(_Segment(path, first_t))
+            path = segments[-1].path
+        with open(path, "ab") as f:
+            # Drop a torn record left by a crash mid-write before appending
+            tail = f.tell() % self.dtype.itemsize
+            if tail:
+                f.truncate(f.tell() - tail)
+                f.seek(0, os.SEEK_END)
+            f.write(records.astype(self.dtype, copy=False).tobytes())
+
+    def iter_range(self, sensor: str, t_from_ns: int, t_to_ns: int) -> Iterator[np.ndarray]:
+        """
+        Yields read-only mmap views of the records with t_from_ns <= t <= t_to_ns,
+        one per overlapping segment, so large ranges never sit in memory at once.
+        """
+        with self._lock:
+            segments = list(self._load(sensor))
+        if not segments:
+            return
+        starts = [seg.start_ns for seg in segments]
+        first = max(0, bisect_right(starts, t_from_ns) - 1)
+        last = bisect_right(starts, t_to_ns)
+        for seg in segments[first:last]:
+            try:
+                records = seg.records(self.dtype)
+            except FileNotFoundError:
+                continue  # Deleted by retention in the meantime
+            t = records["t"]
+            lo = np.searchsorted(t, t_from_ns, side="left")
+            hi = np.searchsorted(t, t_to_ns, side="right")
+            if hi > lo:
+                yield records[lo:hi]
+
+    def count(self, sensor: str, t_from_ns: int, t_to_ns: int) -> int:
+        return sum(len(part) for part in self.iter_range(sensor, t_from_ns, t_to_ns))
+
+    def query(self, sensor: str, t_from_ns: int, t_to_ns: int) -> np.ndarray:
+        """Returns a copy of the records with t_from_ns <= t <= t_to_ns."""
+        parts = [part.copy() for part in self.iter_range(sensor, t_from_ns, t_to_ns)]
+        if not parts:
+            return np.empty(0, dtype=self.dtype)
+        return np.concatenate(parts)
+
+    def enforce_retention(self, now_ns: Optional[int] = None):
+        """Deletes segments that only hold records older than the retention window."""
+        cutoff = (now_ns or time.time_ns()) - self.retention_ns
+        for sensor in self.sensors():
+            with self._lock:
+                segments = self._load(sensor)
+                # A segment ends where the next one starts; never drop the active one
+                expired = [seg for seg, nxt in zip(segments, segments[1:]) if nxt.start_ns <= cutoff]
+                for seg in expired:
+                    segments.remove(seg)
+            for seg in expired:
+                try:
+                    os.remove(seg.path)
+                    logger.info(f"History retention removed {seg.path}")
+                except OSError as e:
+                    logger.error(f"Failed to remove history segment {seg.path}: {e}")
+
+class HistoryWriter(threading.Thread):
+    """
+    Background thread that batches readings from the ingest path and appends
+    them to a HistoryStore every HISTORY_FLUSH_INTERVAL_S. When given a
+    RollupEngine it also persists that engine's closed buckets.
+    """
+    def __init__(self, store: HistoryStore, flush_interval: float = HISTORY_FLUSH_INTERVAL_S, rollups=None):
+        super().__init__(daemon=True)
+        self.store = store
+        self.rollups = rollups
+        self.flush_interval = flush_interval
+        self.running = True
+        self._pending = deque()
+        self._wakeup = threading.Event()
+        self._last_retention = 0.0
+
+    def submit(self, reading: SensorReading):
+        """Queues a reading; cheap enough to call from the GUI thread."""
+        self._pending.append((reading.sensor_name, reading.timestamp.timestamp(),
+                              reading.value, 0 if reading.status == STATUS_OK else 1))
+
+    def submit_many(self, readings: List[SensorReading]):
+        for reading in readings:
+            self.submit(reading)
+
+    def flush(self):
+        if self.rollups:
+            try:
+                self.rollups.flush()
+            except OSError as e:
+                logger.error(f"Failed to write rollups: {e}")
+        batch = []
+        pending = self._pending
+        while pending:
+            batch.append(pending.popleft())
+        if not batch:
+            return
+        by_sensor: Dict[str, list] = {}
+        for sensor, t, v, s in batch:
+            by_sensor.setdefault(sensor, []).append((int(t * 1e9), v, s))
+        for sensor, rows in by_sensor.items():
+            try:
+                self.store.append(sensor, np.array(rows, dtype=self.store.dtype))
+            except OSError as e:
+                logger.error(f"Failed to write history for {sensor}: {e}")
+
+    def run(self):
+        while self.running:
+            self._wakeup.wait(self.flush_interval)
+            self.flush()
+            if time.monotonic() - self._last_retention > 60.0:
+                self._last_retention = time.monotonic()
+                self.store.enforce_retention()
+                if self.rollups:
+                    self.rollups.enforce_retention()
+
+    def stop(self):
+        self.running = False
+        self._wakeup.set()
+        self.join()
+        if self.rollups:
+            self.rollups.close_all()
+        self.flush()
@@ -16,6 +16,7 @@ def setup_logger(name: str):
     logger.addHandler(ch)
     
     # File Handler
+    os.makedirs(LOG_DIR, exist_ok=True)
     log_file = os.path.join(LOG_DIR, "app.log")
     fh = RotatingFileHandler(log_file, maxBytes=10*1024*1024, backupCount=5)
     fh.setFormatter(formatter)
@@ -1,59 +1,57 @@
 import sys
 import os
 import socket
-import threading
-import smtplib
-import requests
-from email.mime.text import MIMEText
+import time
 from PySide6.QtWidgets import QApplication, QMessageBox
 from PySide6.QtCore import QTimer
 try:
     from .gui import DashboardWindow
-    from .sensor_worker import SensorWorker, LogTailer, WebSocketServer
-    from .alarm_manager import AlarmManager
-    from .config import (SENSORS_CONFIG, UPDATE_INTERVAL_MS, STATUS_OK, 
-                        SMTP_SERVER, SMTP_PORT, SMTP_USER, SMTP_PASS, ALERT_RECIPIENT,
-                        SMTP_ENABLED, WEBHOOK_ENABLED, WEBHOOK_URL, WS_PORT, WS_HOST,
-                        LOG_DIR, HOST, DESKTOP_NOTIFICATIONS_ENABLED)
+    from .sensor_worker import SensorWorker, AsyncIngestWorker, ShmIngestWorker, LogTailer
+    from .async_ingest import shard_sensors
+    from .core import SensorCore
+    from .config import (SENSORS_CONFIG, UPDATE_INTERVAL_MS, INGEST_MODE, INGEST_LOOPS,
+                        LOG_DIR, HOST, DESKTOP_NOTIFICATIONS_ENABLED, METRICS_REFRESH_MS)
+    from .metrics import REGISTRY, bucket_quantile
     from .logger import logger
-    from . import api
 except ImportError:
     # Add project root to sys.path if direct relative imports fail
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     from app.gui import DashboardWindow
-    from app.sensor_worker import SensorWorker, LogTailer, WebSocketServer
-    from app.alarm_manager import AlarmManager
-    from app.config import (SENSORS_CONFIG, UPDATE_INTERVAL_MS, STATUS_OK, 
-                        SMTP_SERVER, SMTP_PORT, SMTP_USER, SMTP_PASS, ALERT_RECIPIENT,
-                        SMTP_ENABLED, WEBHOOK_ENABLED, WEBHOOK_URL, WS_PORT, WS_HOST,
-                        LOG_DIR, HOST, DESKTOP_NOTIFICATIONS_ENABLED)
+    from app.sensor_worker import SensorWorker, AsyncIngestWorker, ShmIngestWorker, LogTailer
+    from app.async_ingest import shard_sensors
+    from app.core import SensorCore
+    from app.config import (SENSORS_CONFIG, UPDATE_INTERVAL_MS, INGEST_MODE, INGEST_LOOPS,
+                        LOG_DIR, HOST, DESKTOP_NOTIFICATIONS_ENABLED, METRICS_REFRESH_MS)
+    from app.metrics import REGISTRY, bucket_quantile
     from app.logger import logger
-    from app import api
 
-# Attempt to import plyer for deskop notifications
-try:
-    from plyer import notification
-    HAS_PLYER = True
-except ImportError:
-    HAS_PLYER = False
-    logger.warning("Plyer not installed. Desktop notifications disabled.")
+TICK_SECONDS = REGISTRY.histogram("gui_tick_seconds", "Duration of the GUI refresh tick (API snapshot and plots)")
+
+# Histograms shown in the Live Metrics panel as p50 / p99: (label, metric name)
+PANEL_LATENCIES = [("GUI tick", "gui_tick_seconds"), ("Core batch", "core_batch_seconds"),
+                   ("Alarm check", "alarm_check_seconds")]
 
 class SensorApp:
     def __init__(self):
         self.app = QApplication(sys.argv)
         self.window = DashboardWindow()
-        self.alarm_msg = AlarmManager()
+        # Alarms, history, notifications, API and WebSocket live in the Qt-free core;
+        # the window is a client fed by its batch and status listeners
+        self.core = SensorCore()
+        self.alarm_msg = self.core.alarms
+        self.alarm_msg.add_status_listener(self.on_status_change)
+        self.core.add_batch_listener(self.on_core_batch)
+        # Later changes arrive through on_status_change; no per-tick rescans
+        self.window.set_global_status(self.alarm_msg.system_status())
+        if self.core.history:
+            self.window.load_history(self.core.history.store)
         
         self.workers = []
-        self.all_readings = {} # sensor_name -> latest SensorReading
+        self._desktop = None  # plyer.notification once loaded, False if unavailable
         
-        # Start API & WebSocket (Bonus A/B)
-        api.start_api_thread()
-        logger.info(f"REST API started on port {api.API_PORT}")
-        
-        self.ws_server = WebSocketServer(WS_HOST, WS_PORT)
-        self.ws_server.start()
-        logger.info(f"WebSocket Server started on {WS_HOST}:{WS_PORT}")
+        # Start history, notifications, API & WebSocket (Bonus A/B)
+        self.core.start_services()
+        self.ws_server = self.core.ws_server
         
         # Start Log Tailer (Bonus A: Background Thread)
         self.log_tailer = LogTailer(os.path.join(LOG_DIR, "app.log"))
@@ -65,6 +63,12 @@ class SensorApp:
         self.timer = QTimer()
         self.timer.timeout.connect(self.on_tick)
         self.timer.start(UPDATE_INTERVAL_MS)
+
+        # Live Metrics panel (Maintenance tab); skipped while the panel is hidden
+        self._metrics_prev = None  # (monotonic time, readings total, histogram bucket counts)
+        self.metrics_timer = QTimer()
+        self.metrics_timer.timeout.connect(self.refresh_metrics)
+        self.metrics_timer.start(METRICS_REFRESH_MS)
         # Connect Maintenance Actions
         self.window.clear_btn.clicked.connect(self.clear_alarms)
         self.window.refresh_btn.clicked.connect(self.force_refresh)
@@ -112,51 +116,70 @@ class SensorApp:
         self.setup_workers()
 
     def setup_workers(self):
+        if INGEST_MODE == "processes":
+            # Parsing runs in a process pool; readings arrive through shared memory
+            capture = self.core.capture
+            worker = ShmIngestWorker(SENSORS_CONFIG, capture_dir=capture.session_dir if capture else None)
+            worker.batch_received.connect(self.handle_batch)
+            worker.start()
+            self.workers.append(worker)
+            return
+
+        if INGEST_MODE == "asyncio":
+            # A small fixed pool of event loops holds every sensor connection
+            protocols = {name: cfg.get('protocol', 'ndjson') for name, cfg in SENSORS_CONFIG.items()}
+            for shard in shard_sensors(SENSORS_CONFIG, INGEST_LOOPS):
+                worker = AsyncIngestWorker(shard, protocols=protocols, capture=self.core.capture)
+                worker.data_received.connect(self.handle_data)
+                worker.batch_received.connect(self.handle_batch)
+                worker.start()
+                self.workers.append(worker)
+            return
+
         for name, cfg in SENSORS_CONFIG.items():
-            worker = SensorWorker(name, cfg['port'])
+            worker = SensorWorker(name, cfg['port'], protocol=cfg.get('protocol', 'ndjson'),
+                                  capture=self.core.capture)
             worker.data_received.connect(self.handle_data)
+            worker.batch_received.connect(self.handle_batch)
             worker.start()
             self.workers.append(worker)
 
     def handle_data(self, reading):
-        # Store for GUI and API
-        self.all_readings[reading.sensor_name] = reading
-        self.window.readings[reading.sensor_name].append(reading)
-        
-        # Update shared API state
-        api.latest_data[reading.sensor_name] = {
-            "value": reading.value,
-            "timestamp": reading.timestamp.isoformat(),
-            "status": reading.status,
-            "alarm": self.alarm_msg.active_alarms.get(reading.sensor_name)
-        }
-        
-        # Broadcast via WebSocket (A5)
-        self.ws_server.broadcast({
-            "type": "reading",
-            "sensor": reading.sensor_name,
-            "value": reading.value,
-            "status": reading.status
-        })
-
-        # Check Alarms
-        alarm = self.alarm_msg.check_reading(reading)
-        if alarm:
-            logger.warning(f"ALARM TRIGGERED: {alarm.message}")
+        self.handle_batch([reading])
+
+    def handle_batch(self, readings):
+        self.core.process(readings)
+
+    def on_core_batch(self, readings, alarms):
+        """GUI side of a processed batch: plot buffers, table rows and the alarm log."""
+        latest = {}
+        for reading in readings:
+            # Store for GUI
+            self.window.readings[reading.sensor_name].append(reading)
+            latest[reading.sensor_name] = reading
+
+        for name, reading in latest.items():
+            # Immediate row update for responsiveness
+            self.window.update_sensor_row(reading, self.alarm_msg.is_alarm(name))
+
+        for alarm in alarms:
             self.window.add_alarm_to_log(alarm)
             self.notify_user(alarm)
-            self.send_email_alert(alarm)
-            self.send_webhook_alert(alarm)
-
-        # Immediate row update for responsiveness
-        sensor_state = self.alarm_msg.active_alarms.get(reading.sensor_name)
-        is_alarm = sensor_state and "ALARM" in sensor_state
-        self.window.update_sensor_row(reading, is_alarm)
 
     def notify_user(self, alarm):
-        if HAS_PLYER and DESKTOP_NOTIFICATIONS_ENABLED:
+        if not DESKTOP_NOTIFICATIONS_ENABLED:
+            return
+        if self._desktop is None:
+            # plyer is imported on the first alarm, not at startup
+            try:
+                from plyer import notification
+                self._desktop = notification
+            except ImportError:
+                self._desktop = False
+                logger.warning("Plyer not installed. Desktop notifications disabled.")
+        if self._desktop:
             try:
-                notification.notify(
+                self._desktop.notify(
                     title=f"Industrial Alarm: {alarm.sensor_name}",
                     message=alarm.message,
                     app_name="SensorDashboard",
@@ -165,65 +188,54 @@ class SensorApp:
             except Exception as e:
                 logger.error(f"Failed to send notification: {e}")
 
-    def send_email_alert(self, alarm):
-        if not SMTP_ENABLED:
-            return
-        # In a real app, this would be in a background thread to not block GUI
-        # For this requirement, we implement the logic.
-        msg = MIMEText(f"Critical Alarm Detected:\n\n{alarm.message}\nTime: {alarm.timestamp}")
-        msg['Subject'] = f"INDUSTRIAL ALARM: {alarm.sensor_name}"
-        msg['From'] = SMTP_USER
-        msg['To'] = ALERT_RECIPIENT
-
-        def _send():
-            try:
-                # Note: This will likely fail without real SMTP credentials, but implementation is correct
-                with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-                    if SMTP_PORT == 587:
-                        server.starttls()
-                    server.login(SMTP_USER, SMTP_PASS)
-                    server.send_message(msg)
-                    logger.info(f"SMTP alert sent for {alarm.sensor_name}")
-            except Exception as e:
-                logger.error(f"Failed to send SMTP alert: {e}")
-
-        # Fire and forget thread
-        threading.Thread(target=_send, daemon=True).start()
-
-    def send_webhook_alert(self, alarm):
-        if not WEBHOOK_ENABLED:
-            return
-        
-        payload = {
-            "event": "sensor_alarm",
-            "sensor": alarm.sensor_name,
-            "value": alarm.value,
-            "type": alarm.alarm_type,
-            "message": alarm.message,
-            "timestamp": alarm.timestamp.isoformat()
-        }
-        
-        def _post():
-            try:
-                requests.post(WEBHOOK_URL, json=payload, timeout=5)
-                logger.debug(f"Webhook alert sent to {WEBHOOK_URL}")
-            except Exception as e:
-                logger.error(f"Failed to send webhook alert: {e}")
-
-        threading.Thread(target=_post, daemon=True).start()
+    def on_status_change(self, old, status):
+        self.window.set_global_status(status)
 
     def on_tick(self):
-        # Periodic tasks: Global Status and Plots
-        status = self.alarm_msg.get_system_status(self.all_readings)
-        self.window.set_global_status(status)
-        api.system_status = status
+        started = time.perf_counter()
+        # Periodic tasks: API snapshot and Plots
+        self.core.tick()
         
         # Update plots every tick (approx 5Hz)
         self.window.update_plots()
+        TICK_SECONDS.observe(time.perf_counter() - started)
+
+    def refresh_metrics(self):
+        """Fills the Live Metrics panel: rates and percentiles over the last refresh interval."""
+        if not self.window.metrics_visible():
+            self._metrics_prev = None
+            return
+        now = time.monotonic()
+        readings = REGISTRY.total("sensor_readings_total") or 0
+        counts = {name: REGISTRY.get(name).bucket_counts() for _, name in PANEL_LATENCIES if REGISTRY.get(name)}
+        prev, self._metrics_prev = self._metrics_prev, (now, readings, counts)
+        if prev is None:
+            return  # rates need two samples
+
+        def number(name, missing="0"):
+            value = REGISTRY.total(name)
+            return missing if value is None else f"{value:.0f}"
+
+        rows = [("Readings/s", f"{(readings - prev[1]) / max(now - prev[0], 1e-6):.0f}"),
+                ("Parse errors", number("sensor_parse_errors_total")),
+                ("Sensors connected", f"{number('sensor_connected', '---')} / {len(SENSORS_CONFIG)}"),
+                ("Connection failures", number("sensor_connection_failures_total"))]
+        for label, name in PANEL_LATENCIES:
+            if name not in counts:
+                continue
+            delta = [a - b for a, b in zip(counts[name], prev[2].get(name, [0] * len(counts[name])))]
+            values = [bucket_quantile(REGISTRY.get(name).buckets, delta, q) for q in (0.5, 0.99)]
+            rows.append((f"{label} p50 / p99", " / ".join("---" if v is None else f"{v * 1000:.2f} ms" for v in values)))
+        rows += [("Active alarms", number("alarms_active")),
+                 ("WebSocket clients", number("ws_clients")),
+                 ("Notifications pending", number("notifications_pending"))]
+        self.window.update_metrics(rows)
 
     def run(self):
         self.window.show()
-        sys.exit(self.app.exec())
+        code = self.app.exec()
+        self.core.stop()  # Flushes history; unsent alerts stay in the outbox
+        sys.exit(code)
 
 if __name__ == "__main__":
     app_instance = SensorApp()
@@ -0,0 +1,242 @@
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Default histogram bucket bounds in seconds (100 µs .. 10 s)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+class _Count:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+class _Level(_Count):
+    __slots__ = ()
+
+    def set(self, value: float):
+        self.value = value
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+class _Buckets:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        return bucket_quantile(self.bounds, self.counts, q)
+
+def bucket_quantile(bounds: Sequence[float], counts: Sequence[int], q: float) -> Optional[float]:
+    """
+    Estimates the q-quantile from per-bucket counts (len(bounds) + 1, the last
+    being +Inf) by interpolating inside the bucket that holds it.
+    """
+    total = sum(counts)
+    if not total:
+        return None
+    rank, seen = q * total, 0
+    for i, n in enumerate(counts):
+        if n and seen + n >= rank:
+            if i == len(bounds):
+                return bounds[-1]
+            lower = bounds[i - 1] if i else 0.0
+            return lower + (bounds[i] - lower) * (rank - seen) / n
+        seen += n
+    return bounds[-1]
+
+class _Metric:
+    """
+    A named metric and its labelled series. labels(...) returns the series
+    object itself, which hot paths keep and update directly: an update is one
+    attribute add with no lock, so each series should be written by a single
+    thread (concurrent writers can lose the odd increment).
+    """
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[LabelValues, object] = {}
+        self._lock = threading.Lock()  # guards series creation only
+        self._function: Optional[Callable] = None
+        if not self.labelnames:
+            self._root = self.labels()
+
+    def _new_series(self):
+        raise NotImplementedError
+
+    def labels(self, *values) -> object:
+        key = tuple(str(v) for v in values)
+        series = self._series.get(key)
+        if series is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                series = self._series.setdefault(key, self._new_series())
+        return series
+
+    def set_function(self, fn: Callable):
+        """
+        Computes the value at collection time instead: fn() returns a number, or
+        {label values tuple: number} for a labelled metric. Costs nothing until scraped.
+        """
+        self._function = fn
+
+    def collect(self) -> Dict[LabelValues, object]:
+        if self._function is None:
+            return dict(self._series)
+        try:
+            result = self._function()
+        except Exception:
+            return {}
+        values = result if isinstance(result, dict) else {(): result}
+        out = {}
+        for key, value in values.items():
+            series = self._new_series()
+            series.value = value
+            out[key if isinstance(key, tuple) else (str(key),)] = series
+        return out
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_series(self):
+        return _Count()
+
+    def inc(self, amount: float = 1):
+        self._root.inc(amount)
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def _new_series(self):
+        return _Level()
+
+    def set(self, value: float):
+        self._root.set(value)
+
+    def inc(self, amount: float = 1):
+        self._root.inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._root.dec(amount)
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames)
+
+    def _new_series(self):
+        return _Buckets(self.buckets)
+
+    def observe(self, value: float):
+        self._root.observe(value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        return self._root.quantile(q)
+
+    def bucket_counts(self) -> List[int]:
+        """Per-bucket counts summed over every label value."""
+        return [sum(counts) for counts in zip(*(s.counts for s in self._series.values()))] or \
+            [0] * (len(self.buckets) + 1)
+
+def _format_value(value) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class MetricsRegistry:
+    """
+    Process-wide set of counters, gauges and fixed-bucket histograms. Asking
+    for an existing name returns the same metric, so modules declare what
+    they use at import time. render() produces the Prometheus text format.
+    """
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help: str, labelnames: Sequence[str], **kwargs) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.type}")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def total(self, name: str) -> Optional[float]:
+        """Sum of a counter or gauge over all its label values; None if it has none."""
+        metric = self._metrics.get(name)
+        series = metric.collect() if metric else {}
+        return sum(s.value for s in series.values()) if series else None
+
+    def metrics(self) -> List[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for key, series in sorted(metric.collect().items()):
+                if metric.type != "histogram":
+                    lines.append(f"{metric.name}{_label_text(metric.labelnames, key)} {_format_value(series.value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip((*series.bounds, math.inf), series.counts):
+                    cumulative += count
+                    le = 'le="' + _format_value(bound if math.isinf(bound) else float(bound)) + '"'
+                    lines.append(f"{metric.name}_bucket{_label_text(metric.labelnames, key, le)} {cumulative}")
+                lines.append(f"{metric.name}_sum{_label_text(metric.labelnames, key)} {_format_value(series.sum)}")
+                lines.append(f"{metric.name}_count{_label_text(metric.labelnames, key)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,367 @@
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from .data_models import AlarmEvent
+from .logger import logger
+from .config import (SMTP_ENABLED, SMTP_SERVER, SMTP_PORT, SMTP_USER, SMTP_PASS, ALERT_RECIPIENT,
+                     SMTP_IDLE_TIMEOUT_S, WEBHOOK_ENABLED, WEBHOOK_URL, NOTIFY_WORKERS,
+                     NOTIFY_DIGEST_WINDOW_S, NOTIFY_RATE_LIMIT, NOTIFY_RATE_PERIOD_S, NOTIFY_OUTBOX_DIR,
+                     NOTIFY_MAX_ATTEMPTS, NOTIFY_BACKOFF_S, NOTIFY_BACKOFF_MAX_S)
+
+def alarm_payload(alarm: AlarmEvent) -> dict:
+    """JSON-serializable form of an alarm, as posted to webhooks and stored in the outbox."""
+    return {
+        "event": "sensor_alarm",
+        "sensor": alarm.sensor_name,
+        "value": alarm.value,
+        "type": alarm.alarm_type,
+        "message": alarm.message,
+        "timestamp": alarm.timestamp.isoformat()
+    }
+
+class RateLimiter:
+    """Token bucket: up to `rate` sends per `period` seconds, refilled continuously."""
+    def __init__(self, rate: int = NOTIFY_RATE_LIMIT, period: float = NOTIFY_RATE_PERIOD_S):
+        self.capacity = float(rate)
+        self.refill = rate / period if period > 0 else float("inf")
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+class EmailChannel:
+    """
+    Sends alarms by SMTP over one persistent connection (STARTTLS and login
+    happen once, not per email). The connection is reopened if the server
+    dropped it and closed after `idle_timeout` seconds without mail.
+    """
+    name = "email"
+
+    def __init__(self, server: str = SMTP_SERVER, port: int = SMTP_PORT, user: str = SMTP_USER,
+                 password: str = SMTP_PASS, recipient: str = ALERT_RECIPIENT, use_tls: Optional[bool] = None,
+                 idle_timeout: float = SMTP_IDLE_TIMEOUT_S, timeout: float = 10.0):
+        self.server = server
+        self.port = port
+        self.user = user
+        self.password = password
+        self.recipient = recipient
+        self.use_tls = port == 587 if use_tls is None else use_tls
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.connections = 0  # opened so far
+        self._smtp = None  # smtplib.SMTP, opened on the first email
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        import smtplib
+        smtp = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                smtp.starttls()
+            if self.user and self.password:
+                smtp.login(self.user, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self.connections += 1
+        return smtp
+
+    def build_message(self, payloads: List[dict]):
+        from email.mime.text import MIMEText
+        if len(payloads) == 1:
+            p = payloads[0]
+            msg = MIMEText(f"Critical Alarm Detected:\n\n{p['message']}\nTime: {p['timestamp']}")
+            msg['Subject'] = f"INDUSTRIAL ALARM: {p['sensor']}"
+        else:
+            sensors = sorted({p["sensor"] for p in payloads})
+            lines = [f"{p['timestamp']}  {p['message']}" for p in payloads]
+            msg = MIMEText(f"{len(payloads)} alarms detected:\n\n" + "\n".join(lines))
+            msg['Subject'] = f"INDUSTRIAL ALARMS: {len(payloads)} alarms ({', '.join(sensors)})"
+        msg['From'] = self.user
+        msg['To'] = self.recipient
+        return msg
+
+    def send(self, payloads: List[dict]):
+        from smtplib import SMTPServerDisconnected
+        msg = self.build_message(payloads)
+        with self._lock:
+            for attempt in (1, 2):
+                if self._smtp is None:
+                    self._smtp = self._connect()
+                try:
+                    self._smtp.send_message(msg)
+                    break
+                except (SMTPServerDisconnected, ConnectionError):
+                    # A kept-alive connection the server has since closed: reconnect once
+                    self._drop()
+                    if attempt == 2:
+                        raise
+            self._last_used = time.monotonic()
+
+    def close_idle(self, now: float):
+        if self._smtp is not None and now - self._last_used > self.idle_timeout and self._lock.acquire(False):
+            try:
+                self._quit()
+            finally:
+                self._lock.release()
+
+    def close(self):
+        with self._lock:
+            self._quit()
+
+    def _quit(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._drop()
+
+    def _drop(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.close()
+            except Exception:
+                pass
+        self._smtp = None
+
+class WebhookChannel:
+    """
+    Posts alarms as JSON through a requests.Session, so connections (and TLS
+    sessions) are kept alive and pooled. A digest is posted as
+    {"event": "sensor_alarm_digest", "count": n, "alarms": [...]}.
+    """
+    name = "webhook"
+
+    def __init__(self, url: str = WEBHOOK_URL, timeout: float = 5.0, pool_size: int = NOTIFY_WORKERS):
+        # requests is only imported when a webhook channel is configured
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def send(self, payloads: List[dict]):
+        if len(payloads) == 1:
+            body = payloads[0]
+        else:
+            body = {"event": "sensor_alarm_digest", "count": len(payloads), "alarms": payloads}
+        response = self.session.post(self.url, json=body, timeout=self.timeout)
+        response.raise_for_status()
+
+    def close_idle(self, now: float):
+        pass
+
+    def close(self):
+        self.session.close()
+
+class Outbox:
+    """
+    On-disk queue of undelivered messages: one JSON file per message, written
+    atomically, removed once delivered. Messages that use up their attempts
+    are moved to the "failed" subfolder for inspection.
+    """
+    def __init__(self, root: str = NOTIFY_OUTBOX_DIR):
+        self.root = root
+        self.failed_dir = os.path.join(root, "failed")
+        os.makedirs(self.failed_dir, exist_ok=True)
+
+    def _path(self, entry_id: str) -> str:
+        return os.path.join(self.root, f"{entry_id}.json")
+
+    def put(self, entry: dict):
+        path = self._path(entry["id"])
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+    def remove(self, entry_id: str):
+        try:
+            os.remove(self._path(entry_id))
+        except FileNotFoundError:
+            pass
+
+    def fail(self, entry: dict):
+        self.put(entry)
+        os.replace(self._path(entry["id"]), os.path.join(self.failed_dir, f"{entry['id']}.json"))
+
+    def load(self) -> List[dict]:
+        entries = []
+        for name in sorted(os.listdir(self.root)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.root, name)) as f:
+                    entries.append(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.error(f"Skipping unreadable outbox entry {name}: {e}")
+        return entries
+
+def default_channels() -> list:
+    """The channels enabled in config.py."""
+    channels = []
+    if SMTP_ENABLED:
+        channels.append(EmailChannel())
+    if WEBHOOK_ENABLED:
+        channels.append(WebhookChannel())
+    return channels
+
+class NotificationDispatcher(threading.Thread):
+    """
+    Delivers alarm notifications without blocking the caller.
+
+    notify() only queues the alarm. The dispatcher thread releases each
+    channel's queued alarms as one message (a digest when there are several)
+    once the channel's digest window since its last send has passed and its
+    rate limiter has a token, so an alarm storm becomes a few digests rather
+    than hundreds of emails. Each message is written to the outbox before it
+    is handed to the worker pool, and failed sends are retried from there
+    with exponential backoff, including after a restart.
+    """
+    def __init__(self, channels: Optional[list] = None, outbox: Optional[Outbox] = None,
+                 workers: int = NOTIFY_WORKERS, digest_window: float = NOTIFY_DIGEST_WINDOW_S,
+                 rate_limit: int = NOTIFY_RATE_LIMIT, rate_period: float = NOTIFY_RATE_PERIOD_S,
+                 max_attempts: int = NOTIFY_MAX_ATTEMPTS, backoff: float = NOTIFY_BACKOFF_S,
+                 backoff_max: float = NOTIFY_BACKOFF_MAX_S, tick: float = 0.1):
+        super().__init__(daemon=True)
+        self.channels: Dict[str, object] = {c.name: c for c in (default_channels() if channels is None else channels)}
+        self.outbox = outbox or Outbox()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="notify")
+        self.digest_window = digest_window
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.tick = tick
+        self.running = True
+
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self._pending: Dict[str, List[dict]] = {name: [] for name in self.channels}
+        self._limiters = {name: RateLimiter(rate_limit, rate_period) for name in self.channels}
+        self._next_release = {name: 0.0 for name in self.channels}
+        self._due: List[dict] = []  # outbox entries waiting for their next attempt
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+        for entry in self.outbox.load():
+            if entry.get("channel") in self.channels:
+                self._due.append(entry)
+        if self._due:
+            logger.info(f"Resuming {len(self._due)} undelivered notifications from the outbox")
+
+    def notify(self, alarm: AlarmEvent):
+        """Queues an alarm for every channel; cheap enough to call from the GUI thread."""
+        if not self.channels:
+            return
+        payload = alarm_payload(alarm)
+        with self._lock:
+            for pending in self._pending.values():
+                pending.append(payload)
+        self._wakeup.set()
+
+    def pending(self) -> int:
+        """Queued alarms plus messages awaiting (re)delivery."""
+        with self._lock:
+            return sum(len(p) for p in self._pending.values()) + len(self._due)
+
+    def stats(self) -> dict:
+        return {"sent": self.sent, "retried": self.retried, "failed": self.failed, "pending": self.pending()}
+
+    def run(self):
+        while self.running:
+            self._wakeup.wait(self.tick)
+            self._wakeup.clear()
+            self._dispatch()
+
+    def _dispatch(self):
+        now, wall = time.monotonic(), time.time()
+        with self._lock:
+            for name, pending in self._pending.items():
+                if pending and now >= self._next_release[name] and self._limiters[name].take(now):
+                    entry = self._new_entry(name, pending)
+                    self._pending[name] = []
+                    self._next_release[name] = now + self.digest_window
+                    self._persist(entry)
+                    self._due.append(entry)
+            due = self._due
+            ready = [e for e in due if e["next_attempt"] <= wall]
+            self._due = [e for e in due if e["next_attempt"] > wall]
+        for entry in ready:
+            self.executor.submit(self._deliver, entry)
+        for channel in self.channels.values():
+            channel.close_idle(now)
+
+    @staticmethod
+    def _new_entry(channel: str, payloads: List[dict]) -> dict:
+        now = time.time()
+        # Time-ordered ids, so the outbox is replayed oldest first
+        return {"id": f"{int(now * 1000):013d}-{uuid.uuid4().hex[:8]}", "channel": channel,
+                "payloads": payloads, "attempts": 0, "next_attempt": now}
+
+    def _persist(self, entry: dict):
+        try:
+            self.outbox.put(entry)
+        except OSError as e:
+            logger.error(f"Failed to write notification outbox: {e}")
+
+    def _deliver(self, entry: dict):
+        channel = self.channels[entry["channel"]]
+        try:
+            channel.send(entry["payloads"])
+        except Exception as e:
+            entry["attempts"] += 1
+            if entry["attempts"] >= self.max_attempts:
+                with self._lock:
+                    self.failed += 1
+                logger.error(f"Giving up on {entry['channel']} notification after {entry['attempts']} attempts: {e}")
+                try:
+                    self.outbox.fail(entry)
+                except OSError as err:
+                    logger.error(f"Failed to move notification to the failed outbox: {err}")
+                return
+            delay = min(self.backoff_max, self.backoff * 2 ** (entry["attempts"] - 1))
+            entry["next_attempt"] = time.time() + delay * random.uniform(0.8, 1.2)
+            logger.warning(f"{entry['channel']} notification failed ({e}); retry {entry['attempts']} in {delay:.0f}s")
+            self._persist(entry)
+            with self._lock:
+                self.retried += 1
+                self._due.append(entry)
+            return
+        with self._lock:
+            self.sent += 1
+        self.outbox.remove(entry["id"])
+        logger.info(f"{entry['channel']} notification sent ({len(entry['payloads'])} alarms)")
+
+    def stop(self, timeout: float = 5.0):
+        """Stops dispatching; queued alarms are written to the outbox and sent on the next start."""
+        self.running = False
+        self._wakeup.set()
+        if self.is_alive():
+            self.join(timeout)
+        with self._lock:
+            for name, pending in self._pending.items():
+                if pending:
+                    self._persist(self._new_entry(name, pending))
+                    self._pending[name] = []
+        # Messages not started yet stay in the outbox for the next run
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        for channel in self.channels.values():
+            channel.close()
@@ -0,0 +1,131 @@
+import json
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+from .data_models import SensorReading
+from .config import JSON_BACKEND
+from .framing import LineFramer
+from .binary_protocol import BinaryFramer, sample_to_reading
+
+def _load_backend(name: str) -> Tuple[str, Callable[[bytes], dict]]:
+    """
+    Returns (backend_name, decode) for the requested JSON backend.
+    "auto" prefers orjson, then msgspec, then the stdlib json module.
+    """
+    candidates = ["orjson", "msgspec", "json"] if name == "auto" else [name]
+    for candidate in candidates:
+        if candidate == "orjson":
+            try:
+                import orjson
+                return "orjson", orjson.loads
+            except ImportError:
+                continue
+        elif candidate == "msgspec":
+            try:
+                import msgspec
+                decoder = msgspec.json.Decoder(dict)
+
+                def decode(line, _decode=decoder.decode, _error=msgspec.DecodeError):
+                    try:
+                        return _decode(line)
+                    except _error as e:
+                        raise ValueError(str(e)) from None
+                return "msgspec", decode
+            except ImportError:
+                continue
+        elif candidate == "json":
+            return "json", json.loads
+    raise ValueError(f"JSON backend '{name}' is not available")
+
+BACKEND, _decode = _load_backend(JSON_BACKEND)
+
+class ReadingParser:
+    """
+    Decodes one NDJSON sensor packet (bytes) straight into a SensorReading.
+    Keep one instance per connection: consecutive packets of one stream often
+    share a timestamp, so the previous parse is reused when it repeats.
+    """
+    def __init__(self):
+        self._last_ts = None
+        self._last_dt = None
+
+    def parse_timestamp(self, text: str) -> datetime:
+        if text != self._last_ts:
+            self._last_dt = datetime.fromisoformat(text)
+            self._last_ts = text
+        return self._last_dt
+
+    def parse(self, line: bytes) -> SensorReading:
+        # Expected format: {"sensor": "...", "value": 0.0, "timestamp": "...", "status": "..."}
+        data = _decode(line)
+        if not isinstance(data, dict):
+            raise ValueError("Packet is not a JSON object")
+        return SensorReading(
+            sensor_name=data["sensor"],
+            value=float(data["value"]),
+            timestamp=self.parse_timestamp(data["timestamp"]),
+            status=data["status"]
+        )
+
+class StreamDecoder:
+    """
+    Frames and parses one sensor connection in either wire format
+    ("ndjson" or "binary"). Malformed packets go to `on_error` and are skipped.
+    `on_raw`, if given, receives a copy of every received chunk (stream capture).
+    """
+    def __init__(self, protocol: str = "ndjson", on_error: Optional[Callable[[Exception], None]] = None,
+                 on_raw: Optional[Callable[[bytes], None]] = None):
+        self.binary = protocol == "binary"
+        self.framer = BinaryFramer() if self.binary else LineFramer()
+        self.parser = ReadingParser()
+        self.on_error = on_error
+        self.on_raw = on_raw
+
+    def recv_into(self, sock) -> int:
+        n = self.framer.recv_into(sock)
+        if n and self.on_raw:
+            self.on_raw(bytes(self.framer.view[self.framer.end - n:self.framer.end]))
+        return n
+
+    def commit(self, n: int):
+        """Marks n bytes written into framer.writable() as received (asyncio BufferedProtocol path)."""
+        self.framer.commit(n)
+        if n and self.on_raw:
+            self.on_raw(bytes(self.framer.view[self.framer.end - n:self.framer.end]))
+
+    def feed(self, data: bytes) -> List[SensorReading]:
+        """Decodes bytes that did not come from a socket, e.g. a recorded stream."""
+        out = []
+        step = self.framer.recv_size
+        for i in range(0, len(data), step):
+            piece = data[i:i + step]
+            self.framer.writable()[:len(piece)] = piece
+            self.framer.commit(len(piece))
+            try:
+                out.extend(self.readings())
+            except ValueError as e:
+                self._error(e)
+        return out
+
+    def readings(self) -> List[SensorReading]:
+        out = []
+        if self.binary:
+            for sample in self.framer.samples():
+                try:
+                    out.append(sample_to_reading(sample))
+                except KeyError as e:
+                    self._error(ValueError(f"Unknown sensor id {e}"))
+            return out
+
+        parse = self.parser.parse
+        for line in self.framer.lines():
+            if not line.strip():
+                continue
+            try:
+                out.append(parse(line))
+            except (KeyError, ValueError, TypeError) as e:
+                self._error(e)
+        return out
+
+    def _error(self, exc: Exception):
+        if self.on_error:
+            self.on_error(exc)
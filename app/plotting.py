@@ -0,0 +1,110 @@
+"""
+Matplotlib plot widgets. Imported by the dashboard only when the plots are
+first built, so matplotlib's import cost is not paid before the window shows.
+"""
+import time
+import numpy as np
+from matplotlib import style
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+from .config import PLOT_HISTORY_SECONDS, PLOT_BLITTING_ENABLED
+
+# We use a dark theme for a professional "industrial" look
+style.use('dark_background')
+
+class MplCanvas(FigureCanvas):
+    """
+    Live plot of one sensor. In blitting mode the axes, ticks and labels are
+    rendered once into a cached background; each update only restores that
+    background and redraws the line artist. A full redraw happens only when
+    the axis limits actually change.
+    """
+    def __init__(self, title, unit, parent=None, width=5, height=3, dpi=100, blit=PLOT_BLITTING_ENABLED):
+        # A bare Figure: no pyplot state machine or figure manager per canvas
+        self.fig = Figure(figsize=(width, height), dpi=dpi)
+        self.ax = self.fig.add_subplot()
+        super().__init__(self.fig)
+        self.setParent(parent)
+        self.ax.set_title(title, fontsize=10)
+        self.ax.set_ylabel(unit, fontsize=8)
+        self.ax.tick_params(axis='both', which='major', labelsize=8)
+        self.xdata = []
+        self.ydata = []
+        self.blit_enabled = blit
+        self.line, = self.ax.plot([], [], '#00ff00', linewidth=1, animated=blit)
+        self.fig.tight_layout()
+
+        # Blitting state and frame-time counters
+        self._background = None
+        self.full_redraws = 0
+        self.blits = 0
+        self.last_frame_ms = 0.0
+        self.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        # Cache everything except the animated line, then paint the line on top
+        if self.blit_enabled:
+            self._background = self.copy_from_bbox(self.ax.bbox)
+            self.ax.draw_artist(self.line)
+
+    def resizeEvent(self, event):
+        self._background = None
+        super().resizeEvent(event)
+
+    def pixel_width(self) -> int:
+        """Width of the plot area in pixels, the decimation budget for this canvas."""
+        return max(1, int(self.ax.bbox.width))
+
+    def is_on_screen(self) -> bool:
+        """False when the canvas is hidden (inactive tab) or scrolled out of view."""
+        return self.isVisible() and not self.visibleRegion().isEmpty()
+
+    def _update_limits(self) -> bool:
+        """Adjusts axis limits with hysteresis. Returns True if they changed."""
+        changed = False
+        # X (relative time): grow in steps of a tenth of the history window
+        x_right = float(self.xdata[-1])
+        _, cur_right = self.ax.get_xlim()
+        if x_right > cur_right or x_right < cur_right * 0.5:
+            step = PLOT_HISTORY_SECONDS / 10.0
+            self.ax.set_xlim(0, max(step, np.ceil(x_right / step) * step))
+            changed = True
+
+        # Y: expand when data leaves the view, shrink when it would use under half of it
+        ymin, ymax = float(np.min(self.ydata)), float(np.max(self.ydata))
+        padding = max(0.1, (ymax - ymin) * 0.1)
+        cur_low, cur_high = self.ax.get_ylim()
+        if ymin < cur_low or ymax > cur_high:
+            # Extra headroom so a drifting signal doesn't force a redraw every tick
+            padding = max(0.1, (ymax - ymin) * 0.25)
+            self.ax.set_ylim(ymin - padding, ymax + padding)
+            changed = True
+        elif (ymax - ymin + 2 * padding) < (cur_high - cur_low) * 0.5:
+            self.ax.set_ylim(ymin - padding, ymax + padding)
+            changed = True
+        return changed
+
+    def update_plot(self, new_x, new_y):
+        start = time.perf_counter()
+        self.xdata = new_x
+        self.ydata = new_y
+        self.line.set_data(self.xdata, self.ydata)
+        if not self.blit_enabled:
+            if len(self.xdata):
+                self.ax.set_xlim(np.min(self.xdata), np.max(self.xdata))
+                # Dynamic Y-axis with some padding
+                if len(self.ydata):
+                    ymin, ymax = np.min(self.ydata), np.max(self.ydata)
+                    padding = max(0.1, (ymax - ymin) * 0.1)
+                    self.ax.set_ylim(ymin - padding, ymax + padding)
+            self.draw()
+            self.full_redraws += 1
+        elif (len(self.xdata) and self._update_limits()) or self._background is None:
+            self.draw()  # _on_draw recaptures the background
+            self.full_redraws += 1
+        else:
+            self.restore_region(self._background)
+            self.ax.draw_artist(self.line)
+            self.blit(self.ax.bbox)
+            self.blits += 1
+        self.last_frame_ms = (time.perf_counter() - start) * 1000.0
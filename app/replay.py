@@ -0,0 +1,253 @@
+"""
+Replays a raw stream capture (app/capture.py) on the sensor ports, or
+backfills the history store from it.
+
+Usage:
+    python -m app.replay [SESSION] [--speed 1|10|100|max] [--loop] [--no-wait]
+    python -m app.replay [SESSION] --backfill [--history-dir DIR]
+    python -m app.replay --list
+
+SESSION defaults to the newest session under CAPTURE_DIR.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+try:
+    from .capture import CaptureReader, list_sessions, read_chunk
+    from .config import HOST, CAPTURE_DIR, HISTORY_DIR, ROLLUP_DIR, STATUS_OK
+    from .history_store import HistoryStore, RECORD_DTYPE
+    from .logger import logger
+    from .parser import StreamDecoder
+    from .rollups import RollupEngine
+except ImportError:
+    # Add project root to sys.path if direct relative imports fail
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app.capture import CaptureReader, list_sessions, read_chunk
+    from app.config import HOST, CAPTURE_DIR, HISTORY_DIR, ROLLUP_DIR, STATUS_OK
+    from app.history_store import HistoryStore, RECORD_DTYPE
+    from app.logger import logger
+    from app.parser import StreamDecoder
+    from app.rollups import RollupEngine
+
+class ReplayServer:
+    """
+    Serves a capture session on each sensor's port (from the manifest, or
+    `ports`). Every sensor's bytes are written as they were received, at
+    their original receive times divided by `speed`; speed 0 sends as fast as
+    the clients read. All sensors share one clock, so their relative timing
+    is preserved. Every client of a port gets the same bytes.
+
+    With wait_clients, the clock starts once every sensor has a client, so a
+    dashboard that connects late misses nothing.
+    """
+    def __init__(self, session_dir: str, speed: float = 1.0, host: str = HOST,
+                 ports: Optional[Dict[str, int]] = None, wait_clients: bool = True, loop: bool = False):
+        self.reader = CaptureReader(session_dir)
+        self.speed = speed
+        self.host = host
+        self.ports = {name: (ports or {}).get(name, cfg["port"]) for name, cfg in self.reader.sensors.items()}
+        self.wait_clients = wait_clients
+        self.loop_forever = loop
+        self.clients: Dict[str, set] = {name: set() for name in self.ports}
+        self.bytes_sent = 0
+        self.records_sent = 0
+        self.max_lag = 0.0  # seconds behind the scaled schedule
+        self.ready = threading.Event()  # listening
+        self.done = threading.Event()  # every sensor played to the end
+        self.loop = None
+        self._thread = None
+        self._stop_event = None
+        self._all_connected = None
+
+    def _on_connect(self, name):
+        async def on_connect(reader, writer):
+            self.clients[name].add(writer)
+            if all(self.clients.values()):
+                self._all_connected.set()
+            try:
+                await reader.read()
+            except ConnectionError:
+                pass
+            finally:
+                self.clients[name].discard(writer)
+                writer.close()
+        return on_connect
+
+    async def _play(self, name: str, t0_ns: int, start: float):
+        loop = asyncio.get_running_loop()
+        clients = self.clients[name]
+        for _, path in self.reader.chunks(name):
+            records = await loop.run_in_executor(None, read_chunk, path)
+            i = 0
+            while i < len(records):
+                if self.speed > 0:
+                    due = start + (records[i][0] - t0_ns) / 1e9 / self.speed
+                    delay = due - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    else:
+                        self.max_lag = max(self.max_lag, -delay)
+                    # Everything else already due goes out in the same write
+                    now_ns = t0_ns + (loop.time() - start) * self.speed * 1e9
+                    j = i + 1
+                    while j < len(records) and records[j][0] <= now_ns:
+                        j += 1
+                else:
+                    j = len(records)
+                data = b"".join(data for _, data in records[i:j])
+                for writer in list(clients):
+                    writer.write(data)
+                    await writer.drain()  # a slow reader slows the replay rather than losing data
+                self.records_sent += j - i
+                self.bytes_sent += len(data)
+                i = j
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self._all_connected = asyncio.Event()
+        servers = [await asyncio.start_server(self._on_connect(name), self.host, port, reuse_address=True)
+                   for name, port in self.ports.items()]
+        self.ready.set()
+        t0_ns, t1_ns = self.reader.span()
+        logger.info(f"Replaying {self.reader.session_dir}: {len(self.ports)} sensors, "
+                    f"{(t1_ns - t0_ns) / 1e9:.1f} s of data at {'max' if not self.speed else f'{self.speed:g}x'} speed")
+        try:
+            while True:
+                if self.wait_clients:
+                    waiter = asyncio.ensure_future(self._all_connected.wait())
+                    stopper = asyncio.ensure_future(self._stop_event.wait())
+                    await asyncio.wait({waiter, stopper}, return_when=asyncio.FIRST_COMPLETED)
+                    waiter.cancel()
+                    stopper.cancel()
+                if self._stop_event.is_set():
+                    break
+                start = self.loop.time()
+                players = asyncio.gather(*(self._play(name, t0_ns, start) for name in self.ports))
+                stopper = asyncio.ensure_future(self._stop_event.wait())
+                await asyncio.wait({players, stopper}, return_when=asyncio.FIRST_COMPLETED)
+                stopper.cancel()
+                if not players.done():
+                    players.cancel()
+                    break
+                players.result()
+                if not self.loop_forever:
+                    break
+            self.done.set()
+            # Keep the connections open until stopped, so clients do not see a disconnect
+            await self._stop_event.wait()
+        finally:
+            for server in servers:
+                server.close()
+            for writers in self.clients.values():
+                for writer in list(writers):
+                    writer.close()
+
+    def start(self):
+        """Runs the server on its own daemon thread; returns once it is listening."""
+        self._thread = threading.Thread(target=asyncio.run, args=(self.serve(),), daemon=True)
+        self._thread.start()
+        self.ready.wait(10)
+        return self._thread
+
+    def stop(self):
+        if self.loop and self._stop_event:
+            try:
+                self.loop.call_soon_threadsafe(self._stop_event.set)
+            except RuntimeError:
+                pass  # Loop already closed
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+def decode_session(session_dir: str, sensor: str) -> List:
+    """Every reading of one captured sensor, decoded offline (no sockets)."""
+    reader = CaptureReader(session_dir)
+    decoder = StreamDecoder(reader.sensors[sensor].get("protocol", "ndjson"),
+                            lambda e: logger.error(f"Error parsing captured data from {sensor}: {e}"))
+    readings = []
+    for _, data in reader.records(sensor):
+        readings.extend(decoder.feed(data))
+    return readings
+
+def backfill(session_dir: str, store: HistoryStore, rollups: Optional[RollupEngine] = None) -> int:
+    """
+    Decodes a capture offline and appends its readings to the history store
+    (and rollups). Segments are append-only, so the store must not already
+    hold data for a sensor at or after that sensor's first captured reading.
+    Returns the number of readings written.
+    """
+    reader = CaptureReader(session_dir)
+    decoded = {}
+    for sensor in reader.sensors:
+        readings = decode_session(session_dir, sensor)
+        if not readings:
+            continue
+        rows = np.empty(len(readings), dtype=RECORD_DTYPE)
+        rows["t"] = [int(r.timestamp.timestamp() * 1e9) for r in readings]
+        rows["v"] = [r.value for r in readings]
+        rows["s"] = [0 if r.status == STATUS_OK else 1 for r in readings]
+        rows = rows[np.argsort(rows["t"], kind="stable")]
+        if store.count(sensor, int(rows["t"][0]), 2**63 - 1):
+            raise ValueError(f"History for {sensor} already extends past its first captured reading; "
+                             "backfill into an empty history directory")
+        decoded[sensor] = rows
+    for sensor, rows in decoded.items():
+        store.append(sensor, rows)
+        if rollups:
+            for t, v in zip(rows["t"].tolist(), rows["v"].tolist()):
+                rollups.add_sample(sensor, t / 1e9, v)
+    if rollups:
+        rollups.close_all()
+        rollups.flush()
+    return sum(len(rows) for rows in decoded.values())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("session", nargs="?", help="capture session directory (default: newest)")
+    parser.add_argument("--speed", default="1", help="playback speed: 1, 10, 100... or max")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--loop", action="store_true", help="start over at the end")
+    parser.add_argument("--no-wait", action="store_true", help="start the clock without waiting for clients")
+    parser.add_argument("--backfill", action="store_true", help="write the capture into the history store and exit")
+    parser.add_argument("--history-dir", default=HISTORY_DIR)
+    parser.add_argument("--list", action="store_true", help="list capture sessions and exit")
+    args = parser.parse_args()
+
+    sessions = list_sessions(CAPTURE_DIR)
+    if args.list:
+        for session in sessions:
+            print(session)
+        return
+    session = args.session or (sessions[-1] if sessions else None)
+    if session is None:
+        sys.exit(f"No capture sessions in {CAPTURE_DIR}; set CAPTURE_ENABLED = True and run the app first")
+
+    if args.backfill:
+        rollup_dir = ROLLUP_DIR if args.history_dir == HISTORY_DIR else os.path.join(args.history_dir, "rollups")
+        count = backfill(session, HistoryStore(args.history_dir), RollupEngine(rollup_dir))
+        print(f"Backfilled {count} readings from {session} into {args.history_dir}")
+        return
+
+    server = ReplayServer(session, speed=0.0 if args.speed == "max" else float(args.speed), host=args.host,
+                          wait_clients=not args.no_wait, loop=args.loop)
+    server.start()
+    print(f"Replaying {session} (Ctrl+C to stop)")
+    try:
+        while not server.done.wait(0.5):
+            pass
+        print(f"Replay finished: {server.records_sent} records, {server.bytes_sent} bytes, "
+              f"max lag {server.max_lag * 1000:.1f} ms")
+        # Keep serving the open connections until interrupted
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
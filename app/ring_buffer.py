@@ -0,0 +1,98 @@
+import math
+from typing import Tuple
+import numpy as np
+from .data_models import SensorReading
+from .config import STATUS_OK
+
+class SensorRingBuffer:
+    """
+    Preallocated history of (epoch time, value, status) samples for one sensor,
+    stored column-wise in NumPy arrays (float64, float64, uint8).
+
+    Every sample is written twice, at i and i + capacity, so the most recent
+    samples always form one contiguous slice and all views are zero-copy.
+    When the buffer fills before covering `window_seconds` (the sensor runs
+    faster than expected), capacity doubles up to `max_capacity`.
+    """
+    def __init__(self, capacity: int, window_seconds: float = None, max_capacity: int = None):
+        self.capacity = max(2, int(capacity))
+        self.window_seconds = window_seconds
+        self.max_capacity = max(self.capacity, max_capacity or self.capacity)
+        self._t = np.zeros(2 * self.capacity, dtype=np.float64)
+        self._v = np.zeros(2 * self.capacity, dtype=np.float64)
+        self._s = np.zeros(2 * self.capacity, dtype=np.uint8)
+        self._head = 0  # next write position in [0, capacity)
+        self._size = 0
+        self.appended = 0  # total samples ever appended, used as a change counter
+
+    @classmethod
+    def for_rate(cls, window_seconds: float, rate_hz: float, max_capacity: int = None):
+        """Sizes the buffer to hold window_seconds at rate_hz, with 25% headroom."""
+        capacity = math.ceil(window_seconds * rate_hz * 1.25) + 1
+        return cls(capacity, window_seconds=window_seconds, max_capacity=max_capacity)
+
+    def __len__(self):
+        return self._size
+
+    def append(self, reading: SensorReading):
+        self.append_sample(reading.timestamp.timestamp(), reading.value,
+                           0 if reading.status == STATUS_OK else 1)
+
+    def append_sample(self, t: float, value: float, status: int = 0):
+        if self._size == self.capacity and self._should_grow(t):
+            self._grow()
+        i, c = self._head, self.capacity
+        self._t[i] = self._t[i + c] = t
+        self._v[i] = self._v[i + c] = value
+        self._s[i] = self._s[i + c] = status
+        self._head = i + 1 if i + 1 < c else 0
+        if self._size < c:
+            self._size += 1
+        self.appended += 1
+
+    def _should_grow(self, t: float) -> bool:
+        if self.window_seconds is None or self.capacity >= self.max_capacity:
+            return False
+        return t - self.times[0] < self.window_seconds
+
+    def _grow(self):
+        n = self._size
+        capacity = min(self.capacity * 2, self.max_capacity)
+        columns = []
+        for old in (self.times, self.values, self.status):
+            column = np.zeros(2 * capacity, dtype=old.dtype)
+            column[:n] = old
+            column[capacity:capacity + n] = old
+            columns.append(column)
+        self._t, self._v, self._s = columns
+        self.capacity = capacity
+        self._head = n if n < capacity else 0
+
+    def _slice(self) -> slice:
+        stop = self._head + self.capacity
+        return slice(stop - self._size, stop)
+
+    @property
+    def times(self) -> np.ndarray:
+        return self._t[self._slice()]
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._v[self._slice()]
+
+    @property
+    def status(self) -> np.ndarray:
+        return self._s[self._slice()]
+
+    def window(self, seconds: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Zero-copy (times, values, status) views of the last `seconds` of history."""
+        sl = self._slice()
+        t = self._t[sl]
+        if not len(t):
+            return t, self._v[sl], self._s[sl]
+        first = int(np.searchsorted(t, t[-1] - seconds, side="left"))
+        return t[first:], self._v[sl][first:], self._s[sl][first:]
+
+    def clear(self):
+        self._head = self._size = 0
+        self.appended += 1
@@ -0,0 +1,140 @@
+import os
+from collections import deque
+from typing import Dict, List, Tuple
+import numpy as np
+from .data_models import SensorReading
+from .history_store import HistoryStore
+from .config import ROLLUP_DIR, ROLLUP_RESOLUTIONS, ROLLUP_RETENTION_DAYS, ROLLUP_MAX_POINTS
+
+# One closed bucket: start time (epoch ns) and running aggregates
+ROLLUP_DTYPE = np.dtype([("t", "<i8"), ("count", "<u4"), ("min", "<f8"), ("max", "<f8"),
+                         ("sum", "<f8"), ("sumsq", "<f8")])
+
+def _reduce(records: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Combines each run of records starting at `edges` into one bucket."""
+    out = np.empty(len(edges), dtype=records.dtype)
+    out["t"] = records["t"][edges]
+    out["count"] = np.add.reduceat(records["count"], edges)
+    out["min"] = np.minimum.reduceat(records["min"], edges)
+    out["max"] = np.maximum.reduceat(records["max"], edges)
+    out["sum"] = np.add.reduceat(records["sum"], edges)
+    out["sumsq"] = np.add.reduceat(records["sumsq"], edges)
+    return out
+
+def merge_buckets(records: np.ndarray, n_out: int) -> np.ndarray:
+    """Combines adjacent buckets into at most n_out buckets of equal record count."""
+    if len(records) <= n_out:
+        return records
+    edges = np.unique(np.linspace(0, len(records), n_out, endpoint=False).astype(np.int64))
+    return _reduce(records, edges)
+
+def combine_duplicates(records: np.ndarray) -> np.ndarray:
+    """
+    Combines records that share a bucket start: a partial bucket stored at
+    shutdown is continued by another record for the same bucket after a restart.
+    """
+    t = records["t"]
+    if len(records) < 2 or (t[1:] > t[:-1]).all():
+        return records
+    records = records[np.argsort(t, kind="stable")]
+    _, edges = np.unique(records["t"], return_index=True)
+    return _reduce(records, edges)
+
+def bucket_stats(records: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-bucket mean and standard deviation."""
+    count = np.maximum(records["count"], 1)
+    mean = records["sum"] / count
+    var = np.maximum(records["sumsq"] / count - mean * mean, 0.0)
+    return mean, np.sqrt(var)
+
+class RollupEngine:
+    """
+    Incremental aggregates per sensor at several resolutions (ROLLUP_RESOLUTIONS).
+
+    `add` is O(1) per reading: it updates the open bucket of each resolution
+    and, when a reading falls into a new bucket, queues the closed one. `flush`
+    (called from the history writer thread) appends closed buckets to one
+    HistoryStore per resolution.
+    """
+    def __init__(self, root: str = ROLLUP_DIR, resolutions: Dict[str, int] = ROLLUP_RESOLUTIONS,
+                 retention_days: Dict[str, float] = ROLLUP_RETENTION_DAYS):
+        # (width seconds, label, {sensor: [bucket key, count, min, max, sum, sumsq]}), finest first
+        self._levels = [(width, label, {}) for label, width in sorted(resolutions.items(), key=lambda kv: kv[1])]
+        self.stores = {
+            label: HistoryStore(os.path.join(root, label), segment_seconds=width * 3600,
+                                retention_seconds=retention_days.get(label, 3650) * 86400, dtype=ROLLUP_DTYPE)
+            for width, label, _ in self._levels
+        }
+        self._closed = deque()
+
+    @property
+    def resolutions(self) -> List[str]:
+        return [label for _, label, _ in self._levels]
+
+    def add(self, reading: SensorReading):
+        self.add_sample(reading.sensor_name, reading.timestamp.timestamp(), reading.value)
+
+    def add_sample(self, sensor: str, t: float, value: float):
+        for width, label, open_buckets in self._levels:
+            key = int(t // width)
+            b = open_buckets.get(sensor)
+            # Late samples are folded into the open bucket rather than reopening a closed one
+            if b is not None and key <= b[0]:
+                b[1] += 1
+                if value < b[2]:
+                    b[2] = value
+                elif value > b[3]:
+                    b[3] = value
+                b[4] += value
+                b[5] += value * value
+            else:
+                if b is not None:
+                    self._closed.append((label, sensor, width, b))
+                open_buckets[sensor] = [key, 1, value, value, value, value * value]
+
+    def close_all(self):
+        """Queues every open bucket (e.g. at shutdown) so `flush` persists partial buckets too."""
+        for width, label, open_buckets in self._levels:
+            for sensor, b in list(open_buckets.items()):
+                self._closed.append((label, sensor, width, b))
+            open_buckets.clear()
+
+    def flush(self):
+        grouped: Dict[Tuple[str, str], list] = {}
+        closed = self._closed
+        while closed:
+            label, sensor, width, b = closed.popleft()
+            grouped.setdefault((label, sensor), []).append((b[0] * width * 1_000_000_000, *b[1:]))
+        for (label, sensor), rows in grouped.items():
+            self.stores[label].append(sensor, np.array(rows, dtype=ROLLUP_DTYPE))
+
+    def enforce_retention(self):
+        for store in self.stores.values():
+            store.enforce_retention()
+
+    def query(self, sensor: str, t_from_ns: int, t_to_ns: int,
+              max_points: int = ROLLUP_MAX_POINTS) -> Tuple[str, np.ndarray]:
+        """
+        Returns (resolution label, buckets) covering [t_from_ns, t_to_ns], using the
+        finest resolution with at most max_points buckets in the range. If even
+        the coarsest is too dense, its buckets are merged down to max_points.
+        """
+        max_points = max(1, int(max_points))
+        span_s = max(0, t_to_ns - t_from_ns) / 1e9
+        level = self._levels[-1]
+        for candidate in self._levels:
+            if span_s / candidate[0] <= max_points:
+                level = candidate
+                break
+        width, label, open_buckets = level
+        width_ns = width * 1_000_000_000
+        records = self.stores[label].query(sensor, t_from_ns - t_from_ns % width_ns, t_to_ns)
+
+        # Include the still-open bucket so the newest data is never missing
+        b = open_buckets.get(sensor)
+        if b is not None:
+            start = b[0] * width_ns
+            if t_from_ns - width_ns < start <= t_to_ns:
+                current = np.array([(start, *b[1:])], dtype=ROLLUP_DTYPE)
+                records = np.concatenate([records, current])
+        return label, merge_buckets(combine_duplicates(records), max_points)
@@ -1,35 +1,74 @@
 import socket
-import json
 import time
 import os
 import asyncio
-import threading
 from PySide6.QtCore import QThread, Signal
 try:
     from .data_models import SensorReading
     from .logger import logger
-    from .config import HOST
+    from .config import HOST, BATCH_DELIVERY_ENABLED, BATCH_MAX_READINGS, BATCH_FLUSH_MS
+    from .async_ingest import (AsyncIngestEngine, INGEST_READINGS, INGEST_PARSE_ERRORS, INGEST_CONNECTS,
+                               INGEST_CONNECT_FAILURES, SENSOR_CONNECTED)
+    from .shm_ingest import ShmIngest
+    from .parser import StreamDecoder
+    from .ws_server import WebSocketServer  # noqa: F401  (moved; kept importable from here)
 except ImportError:
     import sys
     import os
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     from app.data_models import SensorReading
     from app.logger import logger
-    from app.config import HOST
+    from app.config import HOST, BATCH_DELIVERY_ENABLED, BATCH_MAX_READINGS, BATCH_FLUSH_MS
+    from app.async_ingest import (AsyncIngestEngine, INGEST_READINGS, INGEST_PARSE_ERRORS, INGEST_CONNECTS,
+                                  INGEST_CONNECT_FAILURES, SENSOR_CONNECTED)
+    from app.shm_ingest import ShmIngest
+    from app.parser import StreamDecoder
+    from app.ws_server import WebSocketServer  # noqa: F401  (moved; kept importable from here)
 
 class SensorWorker(QThread):
     """
     Worker thread that maintains a TCP connection to a single sensor simulator.
     Emits a signal whenever new data is received and parsed.
+    In batch mode, readings are emitted as one list per flush interval instead.
     """
     data_received = Signal(SensorReading)
+    batch_received = Signal(list)  # List[SensorReading]
     connection_status = Signal(str, bool)  # sensor_name, is_connected
 
-    def __init__(self, sensor_name: str, port: int):
+    def __init__(self, sensor_name: str, port: int, batch: bool = BATCH_DELIVERY_ENABLED,
+                 protocol: str = "ndjson", capture=None):
         super().__init__()
         self.sensor_name = sensor_name
         self.port = port
+        self.protocol = protocol
+        self.capture = capture  # CaptureWriter recording the raw stream, or None
         self.running = True
+        self.batch = batch
+        self.flush_interval = BATCH_FLUSH_MS / 1000.0
+        self._pending = []
+        self._pending_since = 0.0
+        self._m_readings = INGEST_READINGS.labels(sensor_name)
+        self._m_errors = INGEST_PARSE_ERRORS.labels(sensor_name)
+        self._m_connected = SENSOR_CONNECTED.labels(sensor_name)
+
+    def _deliver(self, reading: SensorReading):
+        if not self.batch:
+            self.data_received.emit(reading)
+            return
+        if not self._pending:
+            self._pending_since = time.monotonic()
+        self._pending.append(reading)
+        if len(self._pending) >= BATCH_MAX_READINGS:
+            self._flush()
+
+    def _flush(self):
+        if self._pending:
+            batch, self._pending = self._pending, []
+            self.batch_received.emit(batch)
+
+    def _parse_error(self, exc: Exception):
+        self._m_errors.inc()
+        logger.error(f"Error parsing data from {self.sensor_name}: {exc}")
 
     def run(self):
         while self.running:
@@ -39,28 +78,52 @@ class SensorWorker(QThread):
                     logger.info(f"Attempting to connect to {self.sensor_name} on port {self.port}...")
                     s.connect((HOST, self.port))
                     self.connection_status.emit(self.sensor_name, True)
+                    INGEST_CONNECTS.labels(self.sensor_name).inc()
+                    self._m_connected.set(1)
                     logger.info(f"Connected to {self.sensor_name}")
 
-                    buffer = ""
-                    while self.running:
-                        data = s.recv(1024).decode('utf-8')
-                        if not data:
-                            break
-                        
-                        buffer += data
-                        while "\n" in buffer:
-                            line, buffer = buffer.split("\n", 1)
-                            if not line.strip():
-                                continue
+                    # In batch mode the socket wakes up every flush interval so
+                    # pending readings never wait for the next packet.
+                    if self.batch:
+                        s.settimeout(self.flush_interval)
+                    last_rx = time.monotonic()
+
+                    # Frames stay bytes until the parser decodes them, so multibyte
+                    # characters split across receives are never decoded early.
+                    decoder = StreamDecoder(self.protocol, self._parse_error,
+                                            self.capture.tap(self.sensor_name) if self.capture else None)
+                    try:
+                        while self.running:
+                            try:
+                                n = decoder.recv_into(s)
+                            except socket.timeout:
+                                self._flush()
+                                if time.monotonic() - last_rx < 5.0:
+                                    continue
+                                raise
+                            if not n:
+                                break
+                            last_rx = time.monotonic()
+
                             try:
-                                payload = json.loads(line)
-                                reading = SensorReading.from_dict(payload)
-                                self.data_received.emit(reading)
-                            except (json.JSONDecodeError, KeyError, ValueError) as e:
-                                logger.error(f"Error parsing data from {self.sensor_name}: {e}")
+                                readings = decoder.readings()
+                            except ValueError as e:
+                                # The framer has dropped the bad data; the stream carries on
+                                self._parse_error(e)
+                                continue
+                            self._m_readings.inc(len(readings))
+                            for reading in readings:
+                                self._deliver(reading)
+
+                            if self._pending and last_rx - self._pending_since >= self.flush_interval:
+                                self._flush()
+                    finally:
+                        self._flush()
+                        self._m_connected.set(0)
 
             except (socket.error, socket.timeout):
                 self.connection_status.emit(self.sensor_name, False)
+                INGEST_CONNECT_FAILURES.labels(self.sensor_name).inc()
                 logger.warning(f"Connection lost/failed for {self.sensor_name}. Retrying in 2s...")
                 # Responsive sleep
                 for _ in range(20):
@@ -76,6 +139,54 @@ class SensorWorker(QThread):
         self.running = False
         self.wait()
 
+class AsyncIngestWorker(QThread):
+    """
+    Runs an AsyncIngestEngine for a shard of sensors on a single thread.
+    Exposes the same signals as SensorWorker so the app can swap it in.
+    """
+    data_received = Signal(SensorReading)
+    batch_received = Signal(list)  # List[SensorReading]
+    connection_status = Signal(str, bool)  # sensor_name, is_connected
+
+    def __init__(self, sensors: dict, batch: bool = BATCH_DELIVERY_ENABLED, protocols: dict = None,
+                 capture=None):
+        super().__init__()
+        self.sensors = sensors
+        self.engine = AsyncIngestEngine(sensors, self.data_received.emit, self.connection_status.emit,
+                                        on_batch=self.batch_received.emit if batch else None,
+                                        protocols=protocols, capture=capture)
+
+    def run(self):
+        asyncio.run(self.engine.run())
+
+    def stop(self):
+        self.engine.stop()
+        self.wait()
+
+class ShmIngestWorker(QThread):
+    """
+    Starts a ShmIngest process pool and emits the readings it collects from
+    shared memory as batches, like AsyncIngestWorker in batch mode.
+    """
+    data_received = Signal(SensorReading)
+    batch_received = Signal(list)  # List[SensorReading]
+    connection_status = Signal(str, bool)  # sensor_name, is_connected
+
+    def __init__(self, sensors_config: dict, processes: int = None, capture_dir: str = None):
+        super().__init__()
+        if processes is None:
+            self.ingest = ShmIngest(sensors_config, capture_dir=capture_dir)
+        else:
+            self.ingest = ShmIngest(sensors_config, processes, capture_dir=capture_dir)
+
+    def run(self):
+        self.ingest.start()
+        self.ingest.run(self.batch_received.emit)
+
+    def stop(self):
+        self.ingest.stop()
+        self.wait()
+
 class LogTailer(QThread):
     """
     Background worker that 'tails' the application log file.
@@ -124,53 +235,3 @@ class LogTailer(QThread):
     def stop(self):
         self.running = False
         self.wait()
-
-class WebSocketServer(threading.Thread):
-    """
-    Simple WebSocket server to stream sensor data and events.
-    Uses 'websockets' library if available, else logs a warning.
-    """
-    def __init__(self, host, port):
-        super().__init__(daemon=True)
-        self.host = host
-        self.port = port
-        self.clients = set()
-        self.loop = None
-
-    async def register(self, websocket):
-        self.clients.add(websocket)
-        try:
-            await websocket.wait_closed()
-        finally:
-            self.clients.remove(websocket)
-
-    async def main(self):
-        try:
-            import websockets
-            async with websockets.serve(self.handler, self.host, self.port):
-                await asyncio.Future()  # run forever
-        except ImportError:
-            logger.error("Websockets library not found. WS server disabled.")
-
-    async def handler(self, websocket):
-        await self.register(websocket)
-
-    def broadcast(self, message):
-        """Thread-safe way to send messages to all WS clients."""
-        if self.loop:
-            asyncio.run_coroutine_threadsafe(self._broadcast_coro(message), self.loop)
-
-    async def _broadcast_coro(self, message):
-        if not self.clients:
-            return
-        msg_json = json.dumps(message)
-        await asyncio.gather(*[client.send(msg_json) for client in self.clients], return_exceptions=True)
-
-    def run(self):
-        try:
-            import websockets
-            self.loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self.loop)
-            self.loop.run_until_complete(self.main())
-        except ImportError:
-            pass
@@ -0,0 +1,37 @@
+"""
+Headless collector: ingestion, alarms, notifications, history, REST API and
+WebSocket streaming on the Qt-free SensorCore, for machines without a display.
+Sensors are read by INGEST_PROCESSES processes over shared memory when
+INGEST_MODE is "processes", otherwise by the asyncio engine on INGEST_LOOPS loops.
+
+Usage:
+    python -m app.server
+"""
+import os
+import signal
+import sys
+import threading
+try:
+    from .core import SensorCore
+    from .logger import logger
+except ImportError:
+    # Add project root to sys.path if direct relative imports fail
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app.core import SensorCore
+    from app.logger import logger
+
+def main():
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    core = SensorCore()
+    core.start()
+    logger.info(f"Headless server running with {len(core.sensors_config)} sensors. Press Ctrl+C to stop.")
+    while not stop.wait(0.5):
+        pass
+    logger.info("Shutting down headless server...")
+    core.stop()
+
+if __name__ == "__main__":
+    main()
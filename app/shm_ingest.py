@@ -0,0 +1,236 @@
+import multiprocessing
+import threading
+import time
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from .data_models import SensorReading
+from .logger import logger
+from .config import (HOST, INGEST_PROCESSES, SHM_RING_CAPACITY, BATCH_FLUSH_MS, STATUS_OK, STATUS_FAULTY)
+from .async_ingest import AsyncIngestEngine, shard_sensors, INGEST_READINGS
+from .capture import CaptureWriter
+from .metrics import REGISTRY
+
+SHM_LOST = REGISTRY.counter("shm_ring_lost_total", "Readings overwritten in a shared-memory ring before being read")
+
+# One record per reading; the sensor is an index into the ingest's sensor list
+SHM_RECORD_DTYPE = np.dtype([("t", "<f8"), ("v", "<f8"), ("sensor", "<u2"), ("s", "u1")])
+HEADER_BYTES = 64  # published and reserved write sequences (uint64) padded to a cache line
+
+class ShmRing:
+    """
+    Single-producer ring of SHM_RECORD_DTYPE records in a SharedMemory block.
+
+    The header holds two counts of records ever written, seqlock-style: the
+    writer first raises `reserved` to the count it is about to reach, then
+    fills the slots, then publishes the same count. Each is one aligned
+    8-byte store, so on hardware that keeps stores (and loads) in order
+    (x86-64) a reader never sees a published count ahead of the data, and
+    after copying it can tell from `reserved` which slots a writer may have
+    been overwriting meanwhile. There are no locks: readers keep their own
+    position, and records the writer laps before or during a read are
+    dropped and counted in `lost`.
+    """
+    def __init__(self, shm: shared_memory.SharedMemory, capacity: int):
+        self.shm = shm
+        self.capacity = capacity
+        header = np.ndarray((2,), dtype="<u8", buffer=shm.buf)
+        self._seq, self._reserved = header[0:1], header[1:2]
+        self.records = np.ndarray((capacity,), dtype=SHM_RECORD_DTYPE, buffer=shm.buf, offset=HEADER_BYTES)
+        self._written = int(self._seq[0])  # writer side
+        self.read_seq = int(self._seq[0])  # reader side
+        self.lost = 0
+
+    @classmethod
+    def create(cls, capacity: int) -> "ShmRing":
+        shm = shared_memory.SharedMemory(create=True, size=HEADER_BYTES + capacity * SHM_RECORD_DTYPE.itemsize)
+        np.ndarray((2,), dtype="<u8", buffer=shm.buf)[:] = 0
+        return cls(shm, capacity)
+
+    @classmethod
+    def attach(cls, name: str, capacity: int) -> "ShmRing":
+        # Ingest processes share their parent's resource tracker, so attaching
+        # here does not give the block a second owner; the creator unlinks it
+        return cls(shared_memory.SharedMemory(name=name), capacity)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(self, records: np.ndarray):
+        total = len(records)
+        skipped = max(0, total - self.capacity)  # a batch larger than the ring keeps its newest records
+        records, n = records[skipped:], total - skipped
+        i = (self._written + skipped) % self.capacity
+        self._reserved[0] = self._written + total  # announce the slots before touching them
+        first = min(n, self.capacity - i)
+        self.records[i:i + first] = records[:first]
+        self.records[:n - first] = records[first:]
+        self._written += total
+        self._seq[0] = self._written  # publish after the data
+
+    def read(self) -> np.ndarray:
+        """Copies out every record published since the last read."""
+        seq = int(self._seq[0])
+        start = self.read_seq
+        if seq - start > self.capacity:
+            self.lost += seq - start - self.capacity
+            start = seq - self.capacity
+        if start == seq:
+            return self.records[:0].copy()
+        i, j = start % self.capacity, seq % self.capacity
+        if i < j:
+            out = self.records[i:j].copy()
+        else:
+            out = np.concatenate((self.records[i:], self.records[:j]))
+        # Records in slots a writer had started to overwrite (reserved, perhaps
+        # not yet published) before we finished copying are dropped
+        overwritten = int(self._reserved[0]) - self.capacity - start
+        if overwritten > 0:
+            out = out[overwritten:]
+            self.lost += overwritten
+        self.read_seq = seq
+        return out
+
+    def close(self):
+        self._seq = self._reserved = self.records = None
+        self.shm.close()
+
+def _shard_main(ring_name: str, capacity: int, sensors: Dict[str, int], ids: Dict[str, int],
+                protocols: Dict[str, str], host: str, stop_event, capture_dir: Optional[str] = None):
+    """Ingest process: asyncio connections for its sensors, parsed straight into the ring."""
+    ring = ShmRing.attach(ring_name, capacity)
+    # Each process records its own sensors into the session the parent created
+    capture = CaptureWriter({}, capture_dir, write_manifest=False) if capture_dir else None
+    if capture:
+        capture.start()
+
+    def on_batch(readings: List[SensorReading]):
+        # Packets naming a sensor outside SENSORS_CONFIG have no slot; drop them here
+        readings = [r for r in readings if r.sensor_name in ids]
+        if not readings:
+            return
+        records = np.empty(len(readings), dtype=SHM_RECORD_DTYPE)
+        records["t"] = [r.timestamp.timestamp() for r in readings]
+        records["v"] = [r.value for r in readings]
+        records["sensor"] = [ids[r.sensor_name] for r in readings]
+        records["s"] = [0 if r.status == STATUS_OK else 1 for r in readings]
+        ring.write(records)
+
+    engine = AsyncIngestEngine(sensors, lambda reading: on_batch([reading]), host=host,
+                               on_batch=on_batch, protocols=protocols, capture=capture)
+    engine.start()
+    try:
+        stop_event.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.stop()
+        if capture:
+            capture.stop()
+        ring.close()
+
+class ShmIngest:
+    """
+    Multi-process ingestion: SENSORS_CONFIG is sharded across `processes`
+    worker processes, each running the asyncio ingest engine for its sensors
+    and writing parsed readings into its own shared-memory ShmRing. Parsing
+    and socket I/O therefore run on other cores, outside this process's GIL.
+
+    This process reads the rings with poll_records() (NumPy copies, no
+    pickling) or poll() (SensorReading objects), or run() to deliver batches
+    every `interval` seconds until stop(). With capture_dir, each process
+    also records its raw streams into that capture session.
+
+    Readings are counted into sensor_readings_total as they leave the rings;
+    parse errors and reconnects happen in the worker processes and are only
+    logged.
+    """
+    def __init__(self, sensors_config: Dict[str, dict], processes: int = INGEST_PROCESSES,
+                 capacity: int = SHM_RING_CAPACITY, host: str = HOST, interval: float = BATCH_FLUSH_MS / 1000.0,
+                 capture_dir: Optional[str] = None):
+        self.sensors_config = sensors_config
+        self.capture_dir = capture_dir
+        self.names: List[str] = list(sensors_config)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self.processes = processes
+        self.capacity = capacity
+        self.host = host
+        self.interval = interval
+        self.rings: List[ShmRing] = []
+        self.workers: List[multiprocessing.Process] = []
+        self._m_readings = [INGEST_READINGS.labels(name) for name in self.names]
+        self._ctx = multiprocessing.get_context("spawn")
+        self._stop_event = self._ctx.Event()
+        self._running = threading.Event()
+        self._reader_done = threading.Event()  # run() is not inside a poll
+        self._reader_done.set()
+
+    @property
+    def lost(self) -> int:
+        """Records overwritten before this process read them."""
+        return sum(ring.lost for ring in self.rings)
+
+    def start(self):
+        protocols = {name: cfg.get('protocol', 'ndjson') for name, cfg in self.sensors_config.items()}
+        for shard in shard_sensors(self.sensors_config, self.processes):
+            ring = ShmRing.create(self.capacity)
+            proc = self._ctx.Process(target=_shard_main, name=f"ingest-{len(self.workers)}", daemon=True,
+                                     args=(ring.name, self.capacity, shard, self.ids,
+                                           {name: protocols[name] for name in shard}, self.host, self._stop_event,
+                                           self.capture_dir))
+            proc.start()
+            self.rings.append(ring)
+            self.workers.append(proc)
+        SHM_LOST.set_function(lambda: self.lost)
+        logger.info(f"Started {len(self.workers)} ingest processes for {len(self.names)} sensors")
+
+    def poll_records(self) -> np.ndarray:
+        """Every new record from all rings, as one SHM_RECORD_DTYPE array."""
+        parts = [ring.read() for ring in self.rings]
+        records = np.concatenate(parts) if parts else np.empty(0, dtype=SHM_RECORD_DTYPE)
+        if len(records):
+            counts = np.bincount(records["sensor"], minlength=len(self.names))
+            for i in np.flatnonzero(counts).tolist():
+                self._m_readings[i].inc(int(counts[i]))
+        return records
+
+    def to_readings(self, records: np.ndarray) -> List[SensorReading]:
+        names = self.names
+        fromtimestamp = datetime.fromtimestamp
+        return [SensorReading(names[i], v, fromtimestamp(t), STATUS_OK if s == 0 else STATUS_FAULTY)
+                for t, v, i, s in zip(records["t"].tolist(), records["v"].tolist(),
+                                      records["sensor"].tolist(), records["s"].tolist())]
+
+    def poll(self) -> List[SensorReading]:
+        return self.to_readings(self.poll_records())
+
+    def run(self, on_batch: Callable[[List[SensorReading]], None]):
+        """Blocking: hands each interval's new readings to on_batch until stop()."""
+        self._running.set()
+        self._reader_done.clear()
+        try:
+            while self._running.is_set():
+                readings = self.poll()
+                if readings:
+                    on_batch(readings)
+                time.sleep(self.interval)
+        finally:
+            self._reader_done.set()
+
+    def stop(self):
+        self._running.clear()
+        self._reader_done.wait(5)  # the rings are unmapped below
+        self._stop_event.set()
+        for proc in self.workers:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        for ring in self.rings:
+            ring.close()
+            try:
+                ring.shm.unlink()
+            except FileNotFoundError:
+                pass
+        self.rings, self.workers = [], []
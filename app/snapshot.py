@@ -0,0 +1,65 @@
+import gzip
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+from .config import SNAPSHOT_GZIP_ENABLED, SNAPSHOT_GZIP_MIN_BYTES
+
+@dataclass(frozen=True)
+class Snapshot:
+    version: int
+    etag: str  # unquoted entity tag, unique across restarts
+    body: bytes  # UTF-8 JSON
+    gzipped: Optional[bytes] = None  # gzip of body, when worth compressing
+
+class SnapshotPublisher:
+    """
+    Holds the latest pre-encoded status snapshot. `publish` encodes the payload
+    once and swaps in a new immutable Snapshot; readers just take `current`,
+    so serving a request costs no serialization and never sees a half-updated
+    dict. `wait_newer` blocks long-poll clients until the version changes;
+    listeners (e.g. an event loop) are called with each new snapshot instead.
+    """
+    def __init__(self, gzip_enabled: bool = SNAPSHOT_GZIP_ENABLED, gzip_min_bytes: int = SNAPSHOT_GZIP_MIN_BYTES):
+        self.gzip_enabled = gzip_enabled
+        self.gzip_min_bytes = gzip_min_bytes
+        self._boot = f"{time.time_ns():x}"  # keeps ETags from a previous run from matching
+        self._changed = threading.Condition()
+        self._current = Snapshot(0, f"{self._boot}-0", b"{}")
+        self._listeners: List[Callable[[Snapshot], None]] = []
+
+    def add_listener(self, callback: Callable[[Snapshot], None]):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[Snapshot], None]):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    @property
+    def current(self) -> Snapshot:
+        return self._current
+
+    def publish(self, payload: dict) -> Snapshot:
+        """Encodes payload (plus its "version") and makes it the current snapshot."""
+        version = self._current.version + 1
+        body = json.dumps({**payload, "version": version}, separators=(",", ":")).encode()
+        gzipped = None
+        if self.gzip_enabled and len(body) >= self.gzip_min_bytes:
+            gzipped = gzip.compress(body, compresslevel=6)
+        snapshot = Snapshot(version, f"{self._boot}-{version}", body, gzipped)
+        with self._changed:
+            self._current = snapshot
+            self._changed.notify_all()
+        for callback in list(self._listeners):
+            callback(snapshot)
+        return snapshot
+
+    def wait_newer(self, version: int, timeout: float) -> Snapshot:
+        """
+        Returns the current snapshot as soon as its version differs from
+        `version` (a newer one, or any after a server restart), or after timeout.
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self._current.version != version, timeout)
+            return self._current
@@ -0,0 +1,373 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from .logger import logger
+from .config import WS_BATCH_INTERVAL_MS, WS_CLIENT_QUEUE_FRAMES, WS_SLOW_CLIENT_EVICT_S
+
+class _Batch:
+    """Messages serialized once; the frame is built on first use and shared by every client."""
+    __slots__ = ("parts", "_frame")
+
+    def __init__(self, parts):
+        self.parts = parts
+        self._frame = None
+
+    @property
+    def frame(self) -> str:
+        if self._frame is None:
+            self._frame = _batch_frame(self.parts)
+        return self._frame
+
+def _batch_frame(parts) -> str:
+    return '{"type":"batch","messages":[' + ",".join(parts) + "]}"
+
+class _WsClient:
+    """
+    One connection: its subscription and a bounded frame queue drained by its
+    own sender task. By default a client gets every message at full rate.
+    """
+    def __init__(self, websocket, max_frames):
+        self.websocket = websocket
+        self.queue = deque()
+        self.max_frames = max_frames
+        self.ready = asyncio.Event()
+        self.behind_since = None  # monotonic time the queue first overflowed
+        self.dropped = 0  # messages
+        self.frames_sent = 0
+        # Subscription
+        self.sensors = None  # frozenset of sensor names, None = all
+        self.excluded = frozenset()  # unsubscribed sensors while sensors is None
+        self.min_interval = 0.0  # seconds between frames, 0 = every batch
+        self.delta = False
+        self.next_send = 0.0
+        self.timer = None  # pending rate-limited send
+        self.sent_seq = {}  # sensor -> server sequence number last sent (rate-limited)
+        self.last_fields = {}  # sensor -> last message sent (delta)
+
+    def wants(self, sensor) -> bool:
+        if sensor is None:
+            return True
+        if self.sensors is None:
+            return sensor not in self.excluded
+        return sensor in self.sensors
+
+    def names(self, known):
+        """The sensors of `known` (a sensor-keyed mapping) this client subscribes to."""
+        if self.sensors is None:
+            return [name for name in known if name not in self.excluded] if self.excluded else known
+        return self.sensors
+
+    def encode(self, msg: dict, text: str) -> str:
+        """The message as this client should see it: full, or only the fields that changed."""
+        if not self.delta:
+            return text
+        sensor = msg["sensor"]
+        prev = self.last_fields.get(sensor)
+        self.last_fields[sensor] = msg
+        if prev is None:
+            return text
+        changed = {k: v for k, v in msg.items() if k not in ("type", "sensor") and prev.get(k) != v}
+        return json.dumps({"type": "delta", "sensor": sensor, **changed})
+
+    def make_room(self, now: float):
+        """
+        Drop-oldest: a lagging dashboard wants the newest readings. The dropped
+        frame may hold values later deltas and rate-limited sends build on, so
+        those restart from full messages; delta clients call this before
+        encoding, so the next frame is already a full one.
+        """
+        if len(self.queue) < self.max_frames:
+            return
+        self.dropped += len(self.queue.popleft().parts)
+        if self.behind_since is None:
+            self.behind_since = now
+        self.last_fields.clear()
+        self.sent_seq.clear()
+
+    def push(self, batch: _Batch, now: float):
+        self.make_room(now)
+        self.queue.append(batch)
+        self.ready.set()
+
+class WebSocketServer(threading.Thread):
+    """
+    Simple WebSocket server to stream sensor data and events.
+    Uses 'websockets' library if available, else logs a warning.
+
+    Messages are JSON-encoded once on the event loop and sent as one batch
+    frame ({"type": "batch", "messages": [...]}) per WS_BATCH_INTERVAL_MS.
+    Each client has its own bounded queue and sender task, so a slow client
+    only loses its own oldest frames (several queued frames are coalesced into
+    one send) and is disconnected if it stays behind for WS_SLOW_CLIENT_EVICT_S.
+
+    Clients may send {"type": "subscribe", "sensors": [...], "max_rate_hz": 2,
+    "delta": true} to narrow the stream; see `_subscribe`. Unfiltered clients
+    share one frame per batch, clients with the same sensor set share theirs,
+    and per-client encoding is only paid for rate limits and deltas.
+    """
+    def __init__(self, host, port, batch_interval_ms=WS_BATCH_INTERVAL_MS,
+                 queue_frames=WS_CLIENT_QUEUE_FRAMES, evict_after=WS_SLOW_CLIENT_EVICT_S):
+        super().__init__(daemon=True)
+        self.host = host
+        self.port = port
+        self.batch_interval = batch_interval_ms / 1000.0
+        self.queue_frames = queue_frames
+        self.evict_after = evict_after
+        self.clients = {}  # websocket -> _WsClient; only touched on the event loop
+        self.loop = None
+        self._pending = []  # (sensor, message, serialized) waiting for the next batch frame
+        self._flush_handle = None
+        self._latest = {}  # sensor -> (message, serialized, sequence number), for rate-limited clients
+        self._seq = 0
+        self.messages_in = 0
+        self.frames_out = 0
+        self.evictions = 0
+        self._dropped_closed = 0  # drops of clients that have since disconnected
+
+    async def register(self, websocket):
+        client = _WsClient(websocket, self.queue_frames)
+        self.clients[websocket] = client
+        sender = asyncio.create_task(self._sender(client))
+        try:
+            async for raw in websocket:
+                await self._command(client, raw)
+        except Exception:
+            pass  # Connection closed
+        finally:
+            del self.clients[websocket]
+            self._dropped_closed += client.dropped
+            sender.cancel()
+            if client.timer:
+                client.timer.cancel()
+
+    async def main(self):
+        try:
+            import websockets
+            async with websockets.serve(self.handler, self.host, self.port):
+                await asyncio.Future()  # run forever
+        except ImportError:
+            logger.error("Websockets library not found. WS server disabled.")
+
+    async def handler(self, websocket):
+        await self.register(websocket)
+
+    async def _command(self, client, raw):
+        try:
+            cmd = json.loads(raw)
+            kind = cmd.get("type") if isinstance(cmd, dict) else None
+            if kind == "subscribe":
+                reply = self._subscribe(client, cmd)
+            elif kind == "unsubscribe":
+                reply = self._unsubscribe(client, cmd)
+            else:
+                raise ValueError("expected a 'subscribe' or 'unsubscribe' message")
+        except (ValueError, TypeError) as e:
+            reply = {"type": "error", "message": str(e)}
+        await client.websocket.send(json.dumps(reply))
+
+    def _subscribe(self, client, cmd) -> dict:
+        """
+        {"type": "subscribe", "sensors": ["A", "B"] | "*", "max_rate_hz": 2, "delta": true}
+        Every field is optional. With max_rate_hz the client gets at most that
+        many frames per second holding the latest value of each sensor that
+        changed; with delta, messages after the first carry only changed fields.
+        """
+        sensors = cmd.get("sensors", "*")
+        if sensors == "*" or sensors is None:
+            client.sensors = None
+        elif isinstance(sensors, list) and all(isinstance(name, str) for name in sensors):
+            client.sensors = frozenset(sensors)
+        else:
+            raise ValueError("sensors must be a list of names or '*'")
+        rate = float(cmd.get("max_rate_hz", 0) or 0)
+        if rate < 0:
+            raise ValueError("max_rate_hz must not be negative")
+        client.min_interval = 1.0 / rate if rate else 0.0
+        client.excluded = frozenset()
+        client.delta = bool(cmd.get("delta", False))
+        client.last_fields.clear()
+        client.sent_seq.clear()
+        return self._subscription(client)
+
+    def _unsubscribe(self, client, cmd) -> dict:
+        """
+        {"type": "unsubscribe", "sensors": ["A"]}: stop receiving these sensors.
+        A client subscribed to "*" keeps getting every other sensor, including
+        ones that have not reported yet.
+        """
+        sensors = cmd.get("sensors")
+        if not isinstance(sensors, list):
+            raise ValueError("sensors must be a list of names")
+        if client.sensors is None:
+            client.excluded = client.excluded | frozenset(sensors)
+        else:
+            client.sensors = client.sensors - frozenset(sensors)
+        return self._subscription(client)
+
+    @staticmethod
+    def _subscription(client) -> dict:
+        reply = {"type": "subscribed",
+                 "sensors": "*" if client.sensors is None else sorted(client.sensors),
+                 "max_rate_hz": round(1.0 / client.min_interval, 6) if client.min_interval else None,
+                 "delta": client.delta}
+        if client.sensors is None and client.excluded:
+            reply["excluded"] = sorted(client.excluded)
+        return reply
+
+    def broadcast(self, message):
+        """Thread-safe way to send messages to all WS clients."""
+        self.broadcast_many([message])
+
+    def broadcast_many(self, messages):
+        """Thread-safe way to send a list of messages with a single loop wakeup."""
+        if self.loop and messages:
+            self.loop.call_soon_threadsafe(self._enqueue, messages)
+
+    def _enqueue(self, messages):
+        if not self.clients:
+            return
+        self.messages_in += len(messages)
+        dumps = json.dumps
+        pending = self._pending
+        for m in messages:
+            sensor = m.get("sensor")
+            text = dumps(m)
+            pending.append((sensor, m, text))
+            if sensor is not None:
+                self._seq += 1
+                self._latest[sensor] = (m, text, self._seq)
+        if self._flush_handle is None:
+            self._flush_handle = self.loop.call_later(self.batch_interval, self._flush)
+
+    def _flush(self):
+        self._flush_handle = None
+        if not self._pending:
+            return
+        items = self._pending
+        self._pending = []
+        now = time.monotonic()
+
+        # Built lazily, once per flush, and only if some client needs them
+        everything = None
+        by_sensor = None
+        untargeted = None
+        shared = {}  # sensor set -> _Batch for filtered full-rate clients
+
+        for client in list(self.clients.values()):
+            if client.min_interval:
+                self._schedule_latest(client, now)
+                continue
+            if client.sensors is None and not client.excluded and not client.delta:
+                if everything is None:
+                    everything = _Batch([text for _, _, text in items])
+                batch = everything
+            else:
+                if by_sensor is None:
+                    by_sensor, untargeted = {}, []
+                    for item in items:
+                        if item[0] is None:
+                            untargeted.append(item)
+                        else:
+                            by_sensor.setdefault(item[0], []).append(item)
+                names = client.names(by_sensor)
+                if client.delta:
+                    client.make_room(now)
+                    parts = [text for _, _, text in untargeted]
+                    for name in names:
+                        parts.extend(client.encode(m, text) for _, m, text in by_sensor.get(name, ()))
+                    batch = _Batch(parts)
+                else:
+                    key = (client.sensors, client.excluded)
+                    batch = shared.get(key)
+                    if batch is None:
+                        parts = [text for _, _, text in untargeted]
+                        for name in names:
+                            parts.extend(text for _, _, text in by_sensor.get(name, ()))
+                        batch = shared[key] = _Batch(parts)
+            if batch.parts:
+                client.push(batch, now)
+            if client.behind_since is not None and now - client.behind_since > self.evict_after:
+                self._evict(client)
+
+    def _schedule_latest(self, client, now):
+        """Rate-limited clients get the latest values once their interval has elapsed."""
+        if client.timer is not None:
+            return
+        delay = max(0.0, client.next_send - now)
+        client.timer = self.loop.call_later(delay, self._send_latest, client)
+
+    def _send_latest(self, client):
+        client.timer = None
+        if client.websocket not in self.clients:
+            return
+        now = time.monotonic()
+        if client.delta:
+            client.make_room(now)
+        names = client.names(self._latest)
+        parts = []
+        for name in names:
+            latest = self._latest.get(name)
+            if latest is not None and client.sent_seq.get(name) != latest[2]:
+                client.sent_seq[name] = latest[2]
+                parts.append(client.encode(latest[0], latest[1]))
+        client.next_send = now + client.min_interval
+        if parts:
+            client.push(_Batch(parts), now)
+
+    def _evict(self, client):
+        logger.warning(f"Disconnecting slow WebSocket client {client.websocket.remote_address}: "
+                       f"{client.dropped} messages dropped")
+        self.evictions += 1
+        client.behind_since = None
+        client.queue.clear()
+        # Close in the background: the handshake may wait on the very send that is stuck
+        self.loop.create_task(client.websocket.close(code=1013, reason="Client too slow"))
+
+    async def _sender(self, client):
+        try:
+            while True:
+                await client.ready.wait()
+                client.ready.clear()
+                while client.queue:
+                    if len(client.queue) == 1:
+                        frame = client.queue.popleft().frame
+                    else:
+                        # Coalesce everything that piled up into one frame
+                        parts = []
+                        while client.queue:
+                            parts.extend(client.queue.popleft().parts)
+                        frame = _batch_frame(parts)
+                    await client.websocket.send(frame)
+                    client.frames_sent += 1
+                    self.frames_out += 1
+                client.behind_since = None
+        except Exception:
+            pass  # Connection closed; register() cleans up
+
+    def stats(self) -> dict:
+        """Broadcast metrics: client count, queue depths, dropped messages and subscriptions."""
+        clients = list(self.clients.values())
+        depths = [len(c.queue) for c in clients]
+        return {
+            "clients": len(clients),
+            "filtered_clients": sum(1 for c in clients if c.sensors is not None or c.excluded),
+            "rate_limited_clients": sum(1 for c in clients if c.min_interval),
+            "delta_clients": sum(1 for c in clients if c.delta),
+            "queue_depth_max": max(depths, default=0),
+            "queue_depth_total": sum(depths),
+            "dropped_messages": self._dropped_closed + sum(c.dropped for c in clients),
+            "evictions": self.evictions,
+            "messages_in": self.messages_in,
+            "frames_out": self.frames_out,
+        }
+
+    def run(self):
+        try:
+            import websockets
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self.main())
+        except ImportError:
+            pass
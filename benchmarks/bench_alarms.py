@@ -0,0 +1,137 @@
+"""
+Alarm evaluation throughput: vectorized RuleTable vs. the legacy per-reading
+check_reading loop, at --sensors sensors sampled at --rate Hz.
+
+Each tick delivers one reading per sensor (a batch of --sensors readings).
+The vectorized engine runs --seconds of ticks through the columnar
+check_arrays path; the legacy loop is timed on a sample of readings and
+extrapolated. A result above 1.0x real time keeps up with the stream.
+
+The single-sensor section replays one sensor's stream (--batch readings per
+check_batch call, e.g. a spindle sampled at 1 kHz) and per-reading
+check_reading calls, each against the legacy loop on the same readings.
+
+Usage:
+    python -m benchmarks.bench_alarms [--sensors 10000] [--rate 100] [--seconds 2] [--batch 1000]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.alarm_manager import AlarmManager
+from app.data_models import SensorReading
+
+def make_config(n_sensors):
+    return {f"S{i}": {"low": 0.0, "high": 100.0, "deadband": 2.0, "on_delay": 3, "off_delay": 3,
+                      "max_rate": 5000.0, "unit": "u"} for i in range(n_sensors)}
+
+def legacy_check(config, reading, states):
+    """The original AlarmManager.check_reading logic (static limits, string states)."""
+    cfg = config[reading.sensor_name]
+    if reading.status != "OK":
+        states[reading.sensor_name] = "FAULTY"
+        return None
+    new_state = None
+    if cfg["low"] is not None and reading.value < cfg["low"]:
+        new_state = "ALARM_LOW"
+    elif cfg["high"] is not None and reading.value > cfg["high"]:
+        new_state = "ALARM_HIGH"
+    if new_state and "ALARM" in new_state and new_state != states.get(reading.sensor_name):
+        states[reading.sensor_name] = new_state
+        return f"{reading.sensor_name} {new_state.split('_')[1]} limit violation: {reading.value:.2f}"
+    states[reading.sensor_name] = new_state
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sensors", type=int, default=10000)
+    parser.add_argument("--rate", type=float, default=100.0)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    n, ticks = args.sensors, int(args.rate * args.seconds)
+    config = make_config(n)
+    rng = np.random.default_rng(0)
+    idx = np.arange(n)
+    ok = rng.random(n) > 0.001
+    # Random walk around 50 with occasional excursions past the limits
+    values = rng.normal(50.0, 30.0, (ticks, n))
+    required = n * args.rate
+    print(f"{n} sensors x {args.rate:.0f} Hz = {required:,.0f} readings/s required")
+
+    manager = AlarmManager(config)
+    transitions = 0
+    start = time.perf_counter()
+    for k in range(ticks):
+        t = np.full(n, k / args.rate)
+        pos, _, _, _ = manager.check_arrays(idx, values[k], t, ok)
+        transitions += len(pos)
+    elapsed = time.perf_counter() - start
+    rate = ticks * n / elapsed
+    print(f"  vectorized RuleTable: {rate:>13,.0f} readings/s  ({rate / required:5.2f}x real time, "
+          f"{elapsed / ticks * 1000:.2f} ms per {n}-reading tick, {transitions} transitions)")
+
+    sample = min(ticks * n, 200_000)
+    now = datetime.now()
+    readings = [SensorReading(f"S{i % n}", float(values[(i // n) % ticks, i % n]), now, "OK") for i in range(sample)]
+    states = {}
+    start = time.perf_counter()
+    for reading in readings:
+        legacy_check(config, reading, states)
+    elapsed = time.perf_counter() - start
+    rate = sample / elapsed
+    print(f"  legacy check_reading: {rate:>13,.0f} readings/s  ({rate / required:5.2f}x real time)")
+
+    manager = AlarmManager(config)
+    start = time.perf_counter()
+    for k in range(0, sample, n):
+        manager.check_batch(readings[k:k + n])
+    elapsed = time.perf_counter() - start
+    rate = sample / elapsed
+    print(f"  AlarmManager.check_batch (SensorReading objects): {rate:>13,.0f} readings/s  "
+          f"({rate / required:5.2f}x real time)")
+
+    single_sensor(config, rng, args.batch)
+
+def _per_reading(label, elapsed, count, legacy=None):
+    us = elapsed / count * 1e6
+    versus = f"  ({legacy / us:4.2f}x legacy speed)" if legacy else ""
+    print(f"  {label:<34} {us:7.2f} us/reading{versus}")
+    return us
+
+def single_sensor(config, rng, batch, batches=20):
+    """One sensor's readings only: check_batch per --batch readings and check_reading per reading."""
+    count = batch * batches
+    t0 = datetime.now().timestamp()
+    values = rng.normal(50.0, 30.0, count)
+    readings = [SensorReading("S0", float(v), datetime.fromtimestamp(t0 + i / 1000.0), "OK")
+                for i, v in enumerate(values)]
+    print(f"single sensor, {count:,} readings:")
+
+    states = {}
+    start = time.perf_counter()
+    for reading in readings:
+        legacy_check(config, reading, states)
+    legacy = _per_reading("legacy check_reading", time.perf_counter() - start, count)
+
+    manager = AlarmManager(config)
+    start = time.perf_counter()
+    for k in range(0, count, batch):
+        manager.check_batch(readings[k:k + batch])
+    _per_reading(f"check_batch ({batch} per call)", time.perf_counter() - start, count, legacy)
+
+    manager = AlarmManager(config)
+    start = time.perf_counter()
+    for reading in readings:
+        manager.check_reading(reading)
+    _per_reading("check_reading", time.perf_counter() - start, count, legacy)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""
+End-to-end load and latency benchmark for the headless pipeline:
+simulator -> ingestion -> alarms -> REST API / WebSocket.
+
+For every (sensors, rate) combination:
+  1. A simulator process serves N NDJSON sensors on local ports, each sending
+     M readings/sec on a drift-free schedule, stamped with the send time.
+     Once a second each sensor spikes above its HIGH threshold, so alarms
+     are raised and cleared throughout the run.
+  2. A pipeline subprocess runs the real SensorCore (ingest mode --ingest,
+     REST API, WebSocket server) with notifications kept in a temporary outbox.
+  3. This process connects --clients WebSocket clients and an /api/status
+     poller, waits --warmup seconds, then measures for --duration seconds.
+
+Reported per run:
+  readings_per_sec   readings stamped inside the window that reached a WS client
+  latency_ms         p50/p99/max from sensor timestamp to WS delivery
+  dropped / late     readings sent in the window but never delivered / slower than --late-ms
+  api_latency_ms     p50/p99 of /api/status requests
+  cpu_percent, rss_mb  pipeline process and its children (Linux /proc)
+
+Results are written as JSON (--output, by default
+benchmarks/results/e2e_<commit>.json) so runs can be compared across
+commits with --compare OLD.json.
+
+Usage:
+    python -m benchmarks.bench_e2e [--sensors 10 100] [--rate 10 100] [--duration 10] [--ingest asyncio]
+    python -m benchmarks.bench_e2e --sensors 100 --rate 50 --compare benchmarks/results/e2e_1a2b3c4.json
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BASE_PORT = 17000
+HIGH = 50.0
+
+PIPELINE_CODE = """
+import json, sys, tempfile, threading, time
+from app import api
+from app.core import SensorCore
+from app.notifications import NotificationDispatcher, Outbox
+config, api_port, ws_port, mode = json.loads(sys.argv[1]), int(sys.argv[2]), int(sys.argv[3]), sys.argv[4]
+api.API_PORT = api_port
+core = SensorCore(config, history=False, notifier=NotificationDispatcher([], Outbox(tempfile.mkdtemp())))
+counts = {"readings": 0, "alarms": 0}
+lock = threading.Lock()
+since = time.monotonic()
+def on_batch(readings, alarms):
+    with lock:
+        counts["readings"] += len(readings)
+        counts["alarms"] += len(alarms)
+core.add_batch_listener(on_batch)
+core.start(ws_port=ws_port, mode=mode)
+print("READY", flush=True)
+for line in sys.stdin:
+    if line.strip() == "reset":
+        with lock:
+            counts["readings"] = counts["alarms"] = 0
+            since = time.monotonic()
+    elif line.strip() == "stop":
+        break
+with lock:
+    result = dict(counts, elapsed=time.monotonic() - since)
+result["ws"] = core.ws_server.stats()
+print("RESULT " + json.dumps(result), flush=True)
+core.stop()
+"""
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _simulator_main(n_sensors, rate_hz, ready, window, sent):
+    """N sensors at rate_hz; counts the readings stamped inside window[0]..window[1]."""
+    async def serve():
+        writers = {}
+
+        def handler(name):
+            async def on_connect(reader, writer):
+                writers[writer] = name
+                try:
+                    await reader.read()
+                except ConnectionError:
+                    pass
+                finally:
+                    writers.pop(writer, None)
+            return on_connect
+
+        for i in range(n_sensors):
+            await asyncio.start_server(handler(f"S{i}"), "127.0.0.1", BASE_PORT + i, backlog=1024)
+        ready.set()
+
+        interval = 1.0 / rate_hz
+        next_t = time.monotonic()
+        tick = 0
+        while True:
+            now = time.time()
+            stamp = datetime.fromtimestamp(now).isoformat()
+            value = HIGH * 2 if tick % max(1, round(rate_hz)) == 0 else 10.0
+            head = '{"value": %r, "timestamp": "%s", "status": "OK", "sensor": "' % (value, stamp)
+            for w, name in list(writers.items()):
+                w.write((head + name + '"}\n').encode())
+            if window[0] <= now < window[1]:
+                sent.value += len(writers)
+            tick += 1
+            next_t += interval
+            await asyncio.sleep(max(0.0, next_t - time.monotonic()))
+
+    asyncio.run(serve())
+
+class WsProbe(threading.Thread):
+    """WebSocket clients recording sensor-timestamp-to-delivery latency of in-window readings."""
+    def __init__(self, port, clients, window):
+        super().__init__(daemon=True)
+        self.port = port
+        self.clients = clients
+        self.window = window
+        self.latencies = [[] for _ in range(clients)]
+        self.connected = threading.Event()
+        self.loop = None
+        self._done = None
+
+    async def _client(self, index, connected):
+        import websockets
+        out = self.latencies[index]
+        for _ in range(50):  # the server thread may still be binding its port
+            try:
+                ws = await websockets.connect(f"ws://127.0.0.1:{self.port}", max_size=None)
+                break
+            except OSError:
+                await asyncio.sleep(0.1)
+        else:
+            raise RuntimeError(f"WebSocket server on port {self.port} never came up")
+        connected.append(index)
+        if len(connected) == self.clients:
+            self.connected.set()
+        async with ws:
+            while not self._done.is_set():
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), 0.2)
+                except asyncio.TimeoutError:
+                    continue
+                except websockets.ConnectionClosed:
+                    break
+                now = time.time()
+                frame = json.loads(raw)
+                for msg in frame.get("messages", [frame]):
+                    if msg.get("type") != "reading":
+                        continue
+                    t = datetime.fromisoformat(msg["timestamp"]).timestamp()
+                    if self.window[0] <= t < self.window[1]:
+                        out.append(now - t)
+
+    async def _main(self):
+        self._done = asyncio.Event()
+        connected = []
+        await asyncio.gather(*(self._client(i, connected) for i in range(self.clients)))
+
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        self.loop.run_until_complete(self._main())
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self._done.set)
+        self.join(5)
+
+class ApiProbe(threading.Thread):
+    """Polls /api/status on one keep-alive connection at `rate` Hz."""
+    def __init__(self, port, rate):
+        super().__init__(daemon=True)
+        self.port = port
+        self.interval = 1.0 / rate
+        self.latencies = []
+        self.errors = 0
+        self.running = True
+
+    def run(self):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+        while self.running:
+            start = time.perf_counter()
+            try:
+                conn.request("GET", "/api/status")
+                conn.getresponse().read()
+                self.latencies.append(time.perf_counter() - start)
+            except (OSError, http.client.HTTPException):
+                self.errors += 1
+                conn.close()
+            time.sleep(max(0.0, self.interval - (time.perf_counter() - start)))
+
+def _proc_tree(pid):
+    pids = [pid]
+    for p in pids:
+        try:
+            for tid in os.listdir(f"/proc/{p}/task"):
+                with open(f"/proc/{p}/task/{tid}/children") as f:
+                    pids.extend(int(c) for c in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+def tree_usage(pid):
+    """(cpu seconds, rss bytes) of pid and its descendants, or None without /proc."""
+    if not os.path.exists(f"/proc/{pid}/stat"):
+        return None
+    ticks, page = os.sysconf("SC_CLK_TCK"), os.sysconf("SC_PAGE_SIZE")
+    cpu = rss = 0
+    for p in _proc_tree(pid):
+        try:
+            with open(f"/proc/{p}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{p}/statm") as f:
+                rss += int(f.read().split()[1]) * page
+        except OSError:
+            continue
+        cpu += (int(fields[11]) + int(fields[12])) / ticks  # utime + stime
+    return cpu, rss
+
+def _ms(values, q):
+    return round(float(np.percentile(values, q)) * 1000.0, 3) if len(values) else None
+
+def run_one(n_sensors, rate, args):
+    config = {f"S{i}": {"port": BASE_PORT + i, "low": None, "high": HIGH, "unit": ""} for i in range(n_sensors)}
+    window = multiprocessing.Array("d", [float("inf"), float("inf")])
+    sent = multiprocessing.Value("q", 0)
+    ready = multiprocessing.Event()
+    sim = multiprocessing.Process(target=_simulator_main, args=(n_sensors, rate, ready, window, sent), daemon=True)
+    sim.start()
+    ready.wait(30)
+
+    api_port, ws_port = _free_port(), _free_port()
+    pipeline = subprocess.Popen([sys.executable, "-c", PIPELINE_CODE, json.dumps(config), str(api_port),
+                                 str(ws_port), args.ingest], cwd=ROOT, stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    ws = api_probe = None
+    try:
+        for line in pipeline.stdout:
+            if line.strip() == "READY":
+                break
+        ws = WsProbe(ws_port, args.clients, window)
+        ws.start()
+        ws.connected.wait(10)
+        api_probe = ApiProbe(api_port, args.api_rate)
+        api_probe.start()
+        time.sleep(args.warmup)
+
+        pipeline.stdin.write("reset\n")
+        pipeline.stdin.flush()
+        usage0 = tree_usage(pipeline.pid)
+        api_probe.latencies.clear()
+        t0 = time.time()
+        window[0], window[1] = t0, t0 + args.duration
+        rss_peak = 0
+        while time.time() < t0 + args.duration:
+            time.sleep(min(0.5, max(0.0, t0 + args.duration - time.time())))
+            usage = tree_usage(pipeline.pid)
+            if usage:
+                rss_peak = max(rss_peak, usage[1])
+        usage1 = tree_usage(pipeline.pid)
+        api_probe.running = False
+        time.sleep(args.drain)  # readings still in flight when the window closed
+        ws.stop()
+        pipeline.stdin.write("stop\n")
+        pipeline.stdin.flush()
+        result = {}
+        for line in pipeline.stdout:
+            if line.startswith("RESULT "):
+                result = json.loads(line[len("RESULT "):])
+                break
+    finally:
+        if ws and ws.is_alive():
+            ws.stop()
+        if pipeline.poll() is None:
+            try:
+                pipeline.stdin.close()
+            except OSError:
+                pass
+            try:
+                pipeline.wait(10)
+            except subprocess.TimeoutExpired:
+                pipeline.kill()
+        sim.terminate()
+        sim.join()
+
+    latencies = np.array(ws.latencies[0])
+    delivered = min(len(lat) for lat in ws.latencies)
+    return {
+        "sensors": n_sensors,
+        "rate_hz": rate,
+        "ingest": args.ingest,
+        "clients": args.clients,
+        "duration_s": args.duration,
+        "sent": sent.value,
+        "delivered": delivered,
+        "readings_per_sec": round(delivered / args.duration, 1),
+        "core_readings_per_sec": round(result["readings"] / result["elapsed"], 1) if result else None,
+        "alarms": result.get("alarms"),
+        "dropped": max(0, sent.value - delivered),
+        "late": int((latencies > args.late_ms / 1000.0).sum()),
+        "latency_ms": {"p50": _ms(latencies, 50), "p99": _ms(latencies, 99),
+                       "max": _ms(latencies, 100)},
+        "api_latency_ms": {"p50": _ms(api_probe.latencies, 50), "p99": _ms(api_probe.latencies, 99),
+                           "errors": api_probe.errors},
+        "ws_dropped_messages": result.get("ws", {}).get("dropped_messages"),
+        "cpu_percent": round(100.0 * (usage1[0] - usage0[0]) / args.duration, 1) if usage0 and usage1 else None,
+        "rss_mb": round(rss_peak / 2**20, 1) if rss_peak else None,
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def print_row(r):
+    lat = r["latency_ms"]
+    print(f"{r['sensors']:>7} {r['rate_hz']:>7g} {r['readings_per_sec']:>11.0f} {lat['p50'] or 0:>8.1f} "
+          f"{lat['p99'] or 0:>8.1f} {r['dropped']:>8} {r['late']:>7} {r['cpu_percent'] or 0:>6.1f} "
+          f"{r['rss_mb'] or 0:>7.1f}")
+
+def compare(results, path):
+    with open(path) as f:
+        old = {(r["sensors"], r["rate_hz"], r["ingest"]): r for r in json.load(f)["results"]}
+    print(f"\nChange vs {path}:")
+    for r in results:
+        prev = old.get((r["sensors"], r["rate_hz"], r["ingest"]))
+        if prev is None:
+            continue
+        deltas = []
+        for label, key in (("readings/s", lambda x: x["readings_per_sec"]), ("p99 ms", lambda x: x["latency_ms"]["p99"]),
+                           ("cpu %", lambda x: x["cpu_percent"]), ("rss MB", lambda x: x["rss_mb"])):
+            a, b = key(prev), key(r)
+            if a and b is not None:
+                deltas.append(f"{label} {b - a:+.1f} ({100.0 * (b - a) / a:+.0f}%)")
+        print(f"  {r['sensors']} sensors x {r['rate_hz']:g} Hz: " + ", ".join(deltas))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sensors", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--rate", type=float, nargs="+", default=[10.0, 100.0], help="readings/sec per sensor")
+    parser.add_argument("--duration", type=float, default=10.0, help="measurement window in seconds")
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--drain", type=float, default=1.0, help="seconds to wait for in-flight readings")
+    parser.add_argument("--ingest", choices=["asyncio", "processes"], default="asyncio")
+    parser.add_argument("--clients", type=int, default=1, help="WebSocket clients")
+    parser.add_argument("--api-rate", type=float, default=20.0, help="/api/status requests per second")
+    parser.add_argument("--late-ms", type=float, default=250.0,
+                        help="delivery slower than this counts as late (default: above the batching delays)")
+    parser.add_argument("--output", help="JSON results file (default benchmarks/results/e2e_<commit>.json)")
+    parser.add_argument("--compare", help="earlier JSON results file to diff against")
+    args = parser.parse_args()
+
+    commit = _git_commit()
+    print(f"commit {commit}, {os.cpu_count()} CPUs, ingest={args.ingest}, {args.clients} WS client(s)")
+    print(f"{'sensors':>7} {'Hz':>7} {'readings/s':>11} {'p50 ms':>8} {'p99 ms':>8} {'dropped':>8} "
+          f"{'late':>7} {'cpu %':>6} {'rss MB':>7}")
+    results = []
+    for n in args.sensors:
+        for rate in args.rate:
+            results.append(run_one(n, rate, args))
+            print_row(results[-1])
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"e2e_{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"commit": commit, "time": datetime.now().isoformat(), "python": platform.python_version(),
+                   "platform": platform.platform(), "cpus": os.cpu_count(), "args": vars(args),
+                   "results": results}, f, indent=2)
+    print(f"Results written to {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
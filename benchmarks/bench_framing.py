@@ -0,0 +1,91 @@
+"""
+Framing micro-benchmark: legacy str-concatenate-and-split loop vs. LineFramer.
+
+Replays a pre-generated NDJSON stream through a fake socket in chunks of the
+given receive size and reports lines/sec for framing alone.
+
+Usage:
+    python -m benchmarks.bench_framing [--lines 200000] [--recv-sizes 1024 4096 65536]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.framing import LineFramer
+
+class ReplaySocket:
+    """Serves a byte string in fixed-size chunks through recv/recv_into."""
+    def __init__(self, data: bytes, chunk: int):
+        self.data = memoryview(data)
+        self.chunk = chunk
+        self.pos = 0
+
+    def recv(self, size):
+        size = min(size, self.chunk)
+        out = self.data[self.pos:self.pos + size].tobytes()
+        self.pos += len(out)
+        return out
+
+    def recv_into(self, buf, size):
+        size = min(size, self.chunk, len(buf))
+        out = self.data[self.pos:self.pos + size]
+        buf[:len(out)] = out
+        self.pos += len(out)
+        return len(out)
+
+def legacy_framing(sock, recv_size):
+    count = 0
+    buffer = ""
+    while True:
+        data = sock.recv(recv_size).decode('utf-8')
+        if not data:
+            break
+        buffer += data
+        while "\n" in buffer:
+            line, buffer = buffer.split("\n", 1)
+            if not line.strip():
+                continue
+            count += 1
+    return count
+
+def framer_framing(sock, recv_size):
+    count = 0
+    framer = LineFramer(recv_size=recv_size)
+    while framer.recv_into(sock):
+        for line in framer.lines():
+            if not line.strip():
+                continue
+            count += 1
+    return count
+
+def make_stream(n_lines):
+    line = json.dumps({"sensor": "Vibration", "value": 1.23,
+                       "timestamp": "2026-01-01T12:00:00.123456", "status": "OK"}) + "\n"
+    return (line * n_lines).encode("utf-8")
+
+def bench(fn, data, recv_size):
+    sock = ReplaySocket(data, recv_size)
+    t0 = time.perf_counter()
+    count = fn(sock, recv_size)
+    return count, time.perf_counter() - t0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--recv-sizes", type=int, nargs="+", default=[1024, 4096, 65536])
+    args = parser.parse_args()
+
+    data = make_stream(args.lines)
+    print(f"{'recv size':>10} {'legacy lines/s':>16} {'framer lines/s':>16} {'speedup':>8}")
+    for recv_size in args.recv_sizes:
+        n1, t1 = bench(legacy_framing, data, recv_size)
+        n2, t2 = bench(framer_framing, data, recv_size)
+        assert n1 == n2 == args.lines
+        print(f"{recv_size:>10} {n1 / t1:>16,.0f} {n2 / t2:>16,.0f} {t1 / t2:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
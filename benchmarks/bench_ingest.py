@@ -0,0 +1,142 @@
+"""
+Ingestion benchmark: per-sensor QThreads vs. the asyncio ingestion engine.
+
+Starts a feeder process serving N synthetic sensors over TCP, then measures
+CPU use, OS thread count and delivered readings/sec for each ingest mode.
+
+Usage:
+    python -m benchmarks.bench_ingest [--sensors 10 100 1000] [--rate 10] [--duration 5]
+"""
+import argparse
+import asyncio
+import gc
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BASE_PORT = 15000
+
+def _feeder_main(n_sensors, rate_hz, ready):
+    async def serve():
+        writers = set()
+
+        async def on_connect(reader, writer):
+            writers.add(writer)
+            try:
+                await reader.read()
+            finally:
+                writers.discard(writer)
+
+        for i in range(n_sensors):
+            await asyncio.start_server(on_connect, "127.0.0.1", BASE_PORT + i, backlog=1024)
+        ready.set()
+
+        interval = 1.0 / rate_hz
+        next_t = time.monotonic()
+        while True:
+            line = (json.dumps({"sensor": "S", "value": 1.0,
+                                "timestamp": datetime.now().isoformat(), "status": "OK"}) + "\n").encode()
+            for w in list(writers):
+                w.write(line)
+            next_t += interval
+            await asyncio.sleep(max(0.0, next_t - time.monotonic()))
+
+    asyncio.run(serve())
+
+def os_thread_count():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return threading.active_count()
+
+def run_mode(mode, n_sensors, duration):
+    from PySide6.QtCore import Qt
+    from app.sensor_worker import SensorWorker
+    from app.async_ingest import AsyncIngestEngine
+
+    counter = {"n": 0}
+    lock = threading.Lock()
+
+    def on_reading(_reading):
+        with lock:
+            counter["n"] += 1
+
+    sensors = {f"S{i}": BASE_PORT + i for i in range(n_sensors)}
+    if mode == "threads":
+        workers = []
+        for name, port in sensors.items():
+            w = SensorWorker(name, port)
+            w.data_received.connect(on_reading, Qt.DirectConnection)
+            w.start()
+            workers.append(w)
+        def stop():
+            for w in workers:
+                w.stop()
+            workers.clear()
+    else:
+        engine = AsyncIngestEngine(sensors, on_reading)
+        engine.start()
+        stop = engine.stop
+
+    time.sleep(1.0)  # Let connections settle
+    with lock:
+        counter["n"] = 0
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    time.sleep(duration)
+    cpu1, wall1 = time.process_time(), time.perf_counter()
+    threads = os_thread_count()
+    with lock:
+        delivered = counter["n"]
+    stop()
+    wall = wall1 - wall0
+    return {
+        "mode": mode,
+        "sensors": n_sensors,
+        "cpu_percent": 100.0 * (cpu1 - cpu0) / wall,
+        "os_threads": threads,
+        "readings_per_sec": delivered / wall,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sensors", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--rate", type=float, default=10.0, help="Readings per second per sensor")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--modes", nargs="+", default=["threads", "asyncio"])
+    args = parser.parse_args()
+
+    import logging
+    from PySide6.QtCore import QCoreApplication
+    from app.logger import logger
+    logger.setLevel(logging.ERROR)
+    _qt_app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+    print(f"{'mode':<8} {'sensors':>8} {'cpu %':>8} {'threads':>8} {'readings/s':>12}")
+    for n in args.sensors:
+        ready = multiprocessing.Event()
+        feeder = multiprocessing.Process(target=_feeder_main, args=(n, args.rate, ready), daemon=True)
+        feeder.start()
+        ready.wait(30)
+        try:
+            for mode in args.modes:
+                r = run_mode(mode, n, args.duration)
+                print(f"{r['mode']:<8} {r['sensors']:>8} {r['cpu_percent']:>8.1f} "
+                      f"{r['os_threads']:>8} {r['readings_per_sec']:>12.0f}")
+        finally:
+            feeder.terminate()
+            feeder.join()
+    # Release QThread wrappers while Qt is still alive to avoid teardown crashes
+    gc.collect()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Wire-format benchmark: NDJSON vs. the binary telemetry frame.
+
+Encodes the same synthetic samples in both formats, then decodes them through
+StreamDecoder in receive-sized chunks. Reports bytes/sample, raw frame
+throughput and full decode-to-SensorReading throughput.
+
+Usage:
+    python -m benchmarks.bench_protocol [--samples 200000] [--batch 256]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.binary_protocol import encode_frame, SENSOR_IDS
+from app.config import RECV_BUFFER_SIZE
+from app.parser import StreamDecoder
+
+def make_samples(n):
+    start_ns = time.time_ns()
+    sensor_id = SENSOR_IDS["Vibration"]
+    return [(sensor_id, 1.0 + (i % 1000) * 1e-3, start_ns + i * 100_000, 0) for i in range(n)]
+
+def to_ndjson(samples):
+    lines = []
+    for _sensor_id, value, epoch_ns, _status in samples:
+        lines.append(json.dumps({"sensor": "Vibration", "value": value,
+                                 "timestamp": datetime.fromtimestamp(epoch_ns / 1e9).isoformat(),
+                                 "status": "OK"}))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+def to_binary(samples, batch):
+    return b"".join(encode_frame(samples[i:i + batch]) for i in range(0, len(samples), batch))
+
+def decode(protocol, data, full):
+    decoder = StreamDecoder(protocol)
+    framer = decoder.framer
+    view = memoryview(data)
+    count = 0
+    t0 = time.perf_counter()
+    for offset in range(0, len(data), RECV_BUFFER_SIZE):
+        chunk = view[offset:offset + RECV_BUFFER_SIZE]
+        framer.writable()[:len(chunk)] = chunk
+        framer.commit(len(chunk))
+        if full:
+            count += len(decoder.readings())
+        elif protocol == "binary":
+            count += len(framer.samples())
+        else:
+            count += len(framer.lines())
+    return count, time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--samples", type=int, default=200000)
+    ap.add_argument("--batch", type=int, default=256, help="Samples per binary frame")
+    args = ap.parse_args()
+
+    samples = make_samples(args.samples)
+    payloads = {"ndjson": to_ndjson(samples), "binary": to_binary(samples, args.batch)}
+
+    print(f"{'format':<8} {'bytes/sample':>13} {'framing samples/s':>18} {'decode readings/s':>18}")
+    for protocol, data in payloads.items():
+        n1, t1 = decode(protocol, data, full=False)
+        n2, t2 = decode(protocol, data, full=True)
+        assert n2 == args.samples
+        print(f"{protocol:<8} {len(data) / args.samples:>13.1f} {n1 / t1:>18,.0f} {n2 / t2:>18,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Alarm engine against recorded plant data, replayed faster than real time.
+
+Uses a capture session (app/capture.py; default: the newest one under
+CAPTURE_DIR) or, with --synthetic, writes one first: --sensors NDJSON
+sensors at --rate Hz for --minutes, drifting around 50 with excursions past
+the 0..100 limits. Alarm limits come from SENSORS_CONFIG for sensors it
+knows, otherwise from --low/--high.
+
+  offline  decode every chunk and run AlarmManager.check_batch over the
+           readings in time order, as fast as possible
+  replay   ReplayServer at --speed x -> asyncio ingest -> SensorCore (alarms,
+           no history/API/WebSocket); reports the speed actually achieved,
+           the replay's lag behind schedule, and whether the alarms raised
+           match the offline run
+
+Usage:
+    python -m benchmarks.bench_replay_alarms --synthetic [--sensors 50] [--rate 10] [--minutes 10] [--speed 100]
+    python -m benchmarks.bench_replay_alarms --session logs/captures/20260301-080000 --speed 100
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.alarm_manager import AlarmManager
+from app.capture import CaptureReader, CaptureWriter, list_sessions
+from app.config import CAPTURE_DIR, SENSORS_CONFIG
+from app.replay import ReplayServer, decode_session
+
+def synthesize(session_dir, n_sensors, rate, minutes, seed=0):
+    """A capture of NDJSON sensors, one receive per sensor per 100 ms of data."""
+    rng = np.random.default_rng(seed)
+    n = int(rate * minutes * 60)
+    start = datetime.now() - timedelta(minutes=minutes)
+    start_ns = int(start.timestamp() * 1e9)
+    step_ns = int(1e9 / rate)
+    per_recv = max(1, int(rate / 10))
+    writer = CaptureWriter({f"S{i}": {"port": 0, "protocol": "ndjson"} for i in range(n_sensors)}, session_dir)
+    stamps = [(start + timedelta(seconds=k / rate)).isoformat() for k in range(n)]
+    for i in range(n_sensors):
+        values = np.clip(50.0 + np.cumsum(rng.normal(0.0, 3.0, n)), -40.0, 140.0).round(2).tolist()
+        for k in range(0, n, per_recv):
+            data = "".join(json.dumps({"sensor": f"S{i}", "value": values[j], "timestamp": stamps[j],
+                                       "status": "OK"}) + "\n" for j in range(k, min(n, k + per_recv)))
+            writer.submit(f"S{i}", start_ns + (k + per_recv - 1) * step_ns, data.encode())
+        writer.flush()
+    writer.stop()
+    return n_sensors * n
+
+def alarm_config(reader, low, high):
+    return {name: {**{"low": low, "high": high, "unit": ""}, **SENSORS_CONFIG.get(name, {}), "port": cfg["port"],
+                   "protocol": cfg.get("protocol", "ndjson")} for name, cfg in reader.sensors.items()}
+
+def run_offline(session, config, batch_seconds=0.1):
+    t_start = time.perf_counter()
+    readings = [r for name in config for r in decode_session(session, name)]
+    readings.sort(key=lambda r: r.timestamp)
+    decoded = time.perf_counter()
+    manager = AlarmManager(config)
+    alarms = 0
+    stamps = np.array([r.timestamp.timestamp() for r in readings])
+    edges = np.searchsorted(stamps, np.arange(stamps[0], stamps[-1] + batch_seconds, batch_seconds), side="right")
+    lo = 0
+    for hi in [*edges.tolist(), len(readings)]:
+        if hi > lo:
+            alarms += len(manager.check_batch(readings[lo:hi]))
+            lo = hi
+    done = time.perf_counter()
+    span = stamps[-1] - stamps[0]
+    return {"readings": len(readings), "alarms": alarms, "span_s": span,
+            "decode_s": decoded - t_start, "alarm_s": done - decoded}
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def run_replay(session, config, speed, expected):
+    from app.core import SensorCore
+    from app.notifications import NotificationDispatcher, Outbox
+    ports = {name: _free_port() for name in config}
+    config = {name: dict(cfg, port=ports[name]) for name, cfg in config.items()}
+    core = SensorCore(config, history=False, notifier=NotificationDispatcher([], Outbox(tempfile.mkdtemp())),
+                      capture=False)
+    counts = {"readings": 0, "alarms": 0}
+    done = threading.Event()
+
+    def on_batch(readings, alarms):
+        counts["readings"] += len(readings)
+        counts["alarms"] += len(alarms)
+        if counts["readings"] >= expected:
+            done.set()
+
+    core.add_batch_listener(on_batch)
+    server = ReplayServer(session, speed=speed, ports=ports)
+    server.start()
+    core.start(rest_api=False, websocket=False, mode="asyncio")
+    t0 = time.perf_counter()  # the replay clock starts once every sensor has connected
+    done.wait(600)
+    wall = time.perf_counter() - t0
+    core.stop()
+    server.stop()
+    return {"readings": counts["readings"], "alarms": counts["alarms"], "wall_s": wall,
+            "max_lag_s": server.max_lag}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--session", help="capture session directory (default: newest under CAPTURE_DIR)")
+    parser.add_argument("--synthetic", action="store_true", help="generate a capture instead")
+    parser.add_argument("--sensors", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=10.0)
+    parser.add_argument("--minutes", type=float, default=10.0)
+    parser.add_argument("--low", type=float, default=0.0)
+    parser.add_argument("--high", type=float, default=100.0)
+    parser.add_argument("--speed", type=float, default=100.0, help="replay speed (0 = as fast as possible)")
+    parser.add_argument("--offline-only", action="store_true")
+    args = parser.parse_args()
+
+    import logging
+    from app.logger import logger
+    logger.setLevel(logging.ERROR)
+
+    session = args.session
+    if args.synthetic:
+        session = os.path.join(tempfile.mkdtemp(), "synthetic")
+        t = time.perf_counter()
+        n = synthesize(session, args.sensors, args.rate, args.minutes)
+        print(f"Synthetic capture: {n} readings from {args.sensors} sensors in {time.perf_counter() - t:.1f} s")
+    elif session is None:
+        sessions = list_sessions(CAPTURE_DIR)
+        if not sessions:
+            sys.exit(f"No capture sessions in {CAPTURE_DIR}; pass --session or --synthetic")
+        session = sessions[-1]
+
+    reader = CaptureReader(session)
+    config = alarm_config(reader, args.low, args.high)
+    off = run_offline(session, config)
+    print(f"Session {session}: {len(config)} sensors, {off['readings']} readings over {off['span_s']:.0f} s")
+    print(f"offline  decode {off['readings'] / off['decode_s']:>10.0f} readings/s, alarms "
+          f"{off['readings'] / off['alarm_s']:>10.0f} readings/s "
+          f"({off['span_s'] / off['alarm_s']:.0f}x real time), {off['alarms']} alarms")
+    if args.offline_only:
+        return
+
+    rep = run_replay(session, config, args.speed, off["readings"])
+    achieved = off["span_s"] / rep["wall_s"]
+    target = f"{args.speed:g}x" if args.speed else "max"
+    print(f"replay   target {target}: achieved {achieved:.1f}x real time, {rep['readings'] / rep['wall_s']:.0f} readings/s, "
+          f"max lag {rep['max_lag_s'] * 1000:.0f} ms, {rep['readings']}/{off['readings']} readings, "
+          f"{rep['alarms']} alarms ({'match' if rep['alarms'] == off['alarms'] else 'differ from'} offline)")
+
+if __name__ == "__main__":
+    main()
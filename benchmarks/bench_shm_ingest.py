@@ -0,0 +1,139 @@
+"""
+Multi-process ingestion benchmark: in-process asyncio vs. ShmIngest with 1/2/4
+ingest processes writing into shared-memory rings.
+
+Feeder processes serve N synthetic sensors over TCP and write pre-encoded
+NDJSON blocks as fast as each connection drains, so the ingest side (socket
+reads + parsing) is the bottleneck. For each mode the benchmark reports the
+readings/sec that reach this process and this process's own CPU use; in
+"processes" mode parsing happens in the workers and this process only copies
+records out of the rings. Scaling needs as many free cores as ingest
+processes plus feeders.
+
+Usage:
+    python -m benchmarks.bench_shm_ingest [--sensors 64] [--processes 1 2 4] [--feeders 2] [--duration 5]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BASE_PORT = 16000
+LINES_PER_BLOCK = 256
+
+def _feeder_main(names, ports, ready):
+    blocks = {name: "".join(json.dumps({"sensor": name, "value": 1.0 + i % 7, "status": "OK",
+                                        "timestamp": datetime.now().isoformat()}) + "\n"
+                            for i in range(LINES_PER_BLOCK)).encode() for name in names}
+
+    async def serve():
+        def handler(block):
+            async def on_connect(reader, writer):
+                try:
+                    while True:
+                        writer.write(block)
+                        await writer.drain()
+                except (ConnectionError, OSError):
+                    pass
+            return on_connect
+
+        for name, port in zip(names, ports):
+            await asyncio.start_server(handler(blocks[name]), "127.0.0.1", port, backlog=64)
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+def run_asyncio(config, duration):
+    from app.async_ingest import AsyncIngestEngine
+    counter = {"n": 0}
+    lock = threading.Lock()
+
+    def on_batch(readings):
+        with lock:
+            counter["n"] += len(readings)
+
+    sensors = {name: cfg["port"] for name, cfg in config.items()}
+    engine = AsyncIngestEngine(sensors, lambda reading: on_batch([reading]), on_batch=on_batch)
+    engine.start()
+    try:
+        time.sleep(1.0)  # Let connections settle
+        with lock:
+            counter["n"] = 0
+        cpu0, wall0 = time.process_time(), time.perf_counter()
+        time.sleep(duration)
+        cpu1, wall1 = time.process_time(), time.perf_counter()
+        with lock:
+            delivered = counter["n"]
+    finally:
+        engine.stop()
+    return delivered, cpu1 - cpu0, wall1 - wall0, 0
+
+def run_processes(config, processes, duration, interval):
+    from app.shm_ingest import ShmIngest
+    ingest = ShmIngest(config, processes=processes)
+    ingest.start()
+    try:
+        time.sleep(2.0)  # Spawned interpreters import the app and connect
+        ingest.poll_records()
+        lost0 = ingest.lost
+        delivered = 0
+        cpu0, wall0 = time.process_time(), time.perf_counter()
+        end = wall0 + duration
+        while time.perf_counter() < end:
+            delivered += len(ingest.poll_records())
+            time.sleep(interval)
+        cpu1, wall1 = time.process_time(), time.perf_counter()
+        lost = ingest.lost - lost0
+    finally:
+        ingest.stop()
+    return delivered, cpu1 - cpu0, wall1 - wall0, lost
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sensors", type=int, default=64)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--feeders", type=int, default=2, help="feeder processes serving the sensors")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--interval", type=float, default=0.02, help="ring poll interval in processes mode")
+    args = parser.parse_args()
+
+    import logging
+    from app.logger import logger
+    logger.setLevel(logging.ERROR)
+
+    config = {f"S{i}": {"port": BASE_PORT + i, "unit": ""} for i in range(args.sensors)}
+    names = list(config)
+    feeders = []
+    for k in range(args.feeders):
+        shard = names[k::args.feeders]
+        ready = multiprocessing.Event()
+        proc = multiprocessing.Process(target=_feeder_main, daemon=True,
+                                       args=(shard, [config[n]["port"] for n in shard], ready))
+        proc.start()
+        ready.wait(30)
+        feeders.append(proc)
+
+    print(f"{os.cpu_count()} CPUs, {args.sensors} sensors, {args.feeders} feeder processes")
+    print(f"{'mode':<12} {'readings/s':>12} {'main cpu %':>11} {'lost':>8}")
+    try:
+        runs = [("asyncio", lambda: run_asyncio(config, args.duration))]
+        runs += [(f"processes={n}", lambda n=n: run_processes(config, n, args.duration, args.interval))
+                 for n in args.processes]
+        for label, run in runs:
+            delivered, cpu, wall, lost = run()
+            print(f"{label:<12} {delivered / wall:>12.0f} {100.0 * cpu / wall:>11.1f} {lost:>8}")
+    finally:
+        for proc in feeders:
+            proc.terminate()
+            proc.join()
+
+if __name__ == "__main__":
+    main()
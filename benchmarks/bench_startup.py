@@ -0,0 +1,148 @@
+"""
+Cold-start benchmark: import cost of the entry modules and time to first data.
+
+Every measurement runs in a fresh interpreter, --runs times; medians are reported.
+  1. `python -X importtime -c "import <module>"` for app.core, app.server,
+     app.gui and app.main: total import time, plus the self time summed per
+     top-level package (numpy, flask, PySide6, matplotlib...) of the median run.
+  2. Headless time-to-first-reading: process start until SensorCore has
+     processed the first batch from a local NDJSON sensor.
+  3. With --gui: process start until the dashboard window is shown, and until
+     its plots are built (Qt runs offscreen when there is no display).
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5] [--top 8] [--gui]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ("app.core", "app.server", "app.gui", "app.main")
+
+FIRST_READING = """
+import sys, tempfile, threading
+from app.core import SensorCore
+from app.notifications import NotificationDispatcher, Outbox
+first = threading.Event()
+core = SensorCore({"S": {"port": int(sys.argv[1]), "low": None, "high": None, "unit": ""}}, history=False,
+                  notifier=NotificationDispatcher([], Outbox(tempfile.mkdtemp())))
+core.add_batch_listener(lambda readings, alarms: first.set())
+core.start(rest_api=False, websocket=False)
+first.wait(30)
+print("first", flush=True)
+core.stop()
+"""
+
+FIRST_WINDOW = """
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QTimer
+from app.gui import DashboardWindow
+app = QApplication([])
+window = DashboardWindow()
+window.show()
+print("shown", flush=True)
+def poll():
+    if window.canvases:
+        print("plots", flush=True)
+        app.quit()
+timer = QTimer()
+timer.timeout.connect(poll)
+timer.start(1)
+app.exec()
+"""
+
+def _run(args, env=None):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, env=env, check=True)
+
+def import_profile(module):
+    """(total ms, {top-level package: self ms}) from one -X importtime run."""
+    out = _run(["-X", "importtime", "-c", f"import {module}"]).stderr
+    per_package = defaultdict(float)
+    total = 0.0
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        per_package[package] += int(self_us) / 1000.0
+        if name.strip() == module:
+            total = int(cumulative_us) / 1000.0
+    return total, per_package
+
+def _timed_lines(args, markers, env=None):
+    """Seconds from process start until each marker line appears on stdout."""
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, *args], cwd=ROOT, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, text=True, env=env)
+    times = {}
+    for line in proc.stdout:
+        if line.strip() in markers:
+            times[line.strip()] = time.perf_counter() - start
+    proc.wait()
+    return times
+
+def _feeder():
+    """A local sensor sending one NDJSON reading every 10 ms to each client."""
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(8)
+
+    def client(conn):
+        with conn:
+            try:
+                while True:
+                    line = {"sensor": "S", "value": 1.0, "timestamp": datetime.now().isoformat(), "status": "OK"}
+                    conn.sendall((json.dumps(line) + "\n").encode())
+                    time.sleep(0.01)
+            except OSError:
+                pass
+
+    def accept():
+        while True:
+            conn, _ = listener.accept()
+            threading.Thread(target=client, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    return listener.getsockname()[1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="packages shown per module")
+    parser.add_argument("--gui", action="store_true", help="also time the dashboard window")
+    args = parser.parse_args()
+
+    print(f"Import time (median of {args.runs} cold interpreters)")
+    for module in MODULES:
+        runs = sorted((import_profile(module) for _ in range(args.runs)), key=lambda r: r[0])
+        total, per_package = runs[len(runs) // 2]
+        top = sorted(per_package.items(), key=lambda kv: -kv[1])[:args.top]
+        print(f"  {module:<11} {total:8.1f} ms   " + ", ".join(f"{name} {ms:.0f}" for name, ms in top))
+
+    port = _feeder()
+    times = [_timed_lines(["-c", FIRST_READING, str(port)], {"first"}).get("first") for _ in range(args.runs)]
+    times = [t for t in times if t is not None]
+    if times:
+        print(f"Headless time to first reading: {statistics.median(times) * 1000:8.1f} ms")
+
+    if args.gui:
+        env = dict(os.environ)
+        if not env.get("DISPLAY") and sys.platform.startswith("linux"):
+            env.setdefault("QT_QPA_PLATFORM", "offscreen")
+        runs = [_timed_lines(["-c", FIRST_WINDOW], {"shown", "plots"}, env) for _ in range(args.runs)]
+        for marker, label in (("shown", "window shown"), ("plots", "plots built")):
+            values = [r[marker] for r in runs if marker in r]
+            if values:
+                print(f"GUI time to {label + ':':<14} {statistics.median(values) * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
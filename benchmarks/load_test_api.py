@@ -0,0 +1,127 @@
+"""
+Load test for the REST API: many concurrent local clients polling one endpoint.
+
+Starts the API in a subprocess (Flask development server or the asyncio
+server, seeded with a status snapshot for --sensors sensors), or targets a
+running server with --url, then drives it with --clients concurrent
+keep-alive connections for --duration seconds. Reports requests/sec, errors
+and client-side latency percentiles.
+
+Usage:
+    python -m benchmarks.load_test_api [--modes flask asyncio] [--clients 200] [--duration 10]
+    python -m benchmarks.load_test_api --url http://127.0.0.1:5000/api/status --clients 500
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SERVER_CODE = """
+import sys, time
+from app import api
+for i in range({sensors}):
+    api.latest_data[f"Sensor{{i}}"] = {{"value": 20.0 + i, "timestamp": "2026-01-01T12:00:00",
+                                       "status": "OK", "alarm": None}}
+api.system_status = "OK"
+api.publish_status()
+if "{mode}" == "asyncio":
+    from app.api_server import ApiServer
+    ApiServer(host="127.0.0.1", port={port}, max_connections=100000).start()
+else:
+    import logging, threading
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    threading.Thread(target=lambda: api.app.run(host="127.0.0.1", port={port}, threaded=True), daemon=True).start()
+print("READY", flush=True)
+sys.stdin.read()
+"""
+
+async def client(host, port, path, deadline, latencies, errors):
+    request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept-Encoding: gzip\r\n\r\n".encode()
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            start = time.perf_counter()
+            writer.write(request)
+            head = await reader.readuntil(b"\r\n\r\n")
+            headers = head.decode("latin-1").lower()
+            length = 0
+            for line in headers.split("\r\n"):
+                if line.startswith("content-length:"):
+                    length = int(line.split(":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if not head.startswith(b"HTTP/1.1 2") and not head.startswith(b"HTTP/1.0 2"):
+                errors[0] += 1
+            # Servers without keep-alive (HTTP/1.0) close after every response
+            if head.startswith(b"HTTP/1.0") or "connection: close" in headers:
+                writer.close()
+                reader = writer = None
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            errors[0] += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            await asyncio.sleep(0.01)
+    if writer is not None:
+        writer.close()
+
+async def drive(url, clients, duration):
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    latencies, errors = [], [0]
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(client(parts.hostname, parts.port, path, deadline, latencies, errors)
+                           for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    return latencies, errors[0], elapsed
+
+def report(label, latencies, errors, elapsed):
+    ms = np.array(latencies) * 1000.0
+    if not len(ms):
+        print(f"{label:>10}: no successful requests ({errors} errors)")
+        return
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    print(f"{label:>10}: {len(ms) / elapsed:>9.0f} req/s  errors {errors:>5}  "
+          f"p50 {p50:6.2f} ms  p90 {p90:6.2f} ms  p99 {p99:6.2f} ms  max {ms.max():7.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["flask", "asyncio"], choices=["flask", "asyncio"])
+    parser.add_argument("--url", help="Target a running server instead of starting one")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--sensors", type=int, default=5, help="Sensors in the seeded snapshot")
+    parser.add_argument("--port", type=int, default=15500)
+    args = parser.parse_args()
+
+    print(f"{args.clients} concurrent clients, {args.duration:.0f} s per run")
+    if args.url:
+        report("target", *asyncio.run(drive(args.url, args.clients, args.duration)))
+        return
+
+    for mode in args.modes:
+        code = SERVER_CODE.format(mode=mode, port=args.port, sensors=args.sensors)
+        proc = subprocess.Popen([sys.executable, "-c", code], cwd=ROOT, stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, text=True)
+        try:
+            proc.stdout.readline()  # READY
+            time.sleep(0.5)
+            url = f"http://127.0.0.1:{args.port}/api/status"
+            report(mode, *asyncio.run(drive(url, args.clients, args.duration)))
+        finally:
+            proc.stdin.close()
+            proc.wait(timeout=10)
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,54 @@
+"""
+Sensor simulator.
+
+Default mode: the five SENSORS below, one thread and one client per port,
+a reading every 0.5 s. --mode asyncio (implied by --spec) serves the same
+sensors, or thousands from a JSON spec file, on one event loop: per-sensor
+rates up to kHz on a drift-free schedule, any number of clients per port,
+seeded value sequences, NDJSON lines or binary frames of `batch` samples.
+
+Usage:
+    python simulator/sensor_simulator.py
+    python simulator/sensor_simulator.py --mode asyncio --seed 7
+    python simulator/sensor_simulator.py --spec simulator/load_spec.json [--rate-scale 2] [--duration 60]
+    python simulator/sensor_simulator.py --spec simulator/load_spec.json --print-config
+"""
+import argparse
+import asyncio
 import socket
 import json
+import math
+import struct
+import sys
 import time
 import random
 import threading
 from datetime import datetime
 
-# Local config copy to avoid dependency on app package for the standalone simulator
+# Local config copy to avoid dependency on app package for the standalone simulator.
+# "id" and "protocol" must match SENSORS_CONFIG in app/config.py; "batch" is the
+# number of binary samples packed into each frame (sent every 0.5 s).
 SENSORS = {
-    "Temperature": {"port": 5001, "base": 25.0, "jitter": 2.0, "spike_chance": 0.05, "spike_val": 60.0},
-    "Pressure":    {"port": 5002, "base": 5.0,  "jitter": 0.5, "spike_chance": 0.05, "spike_val": 8.0},
-    "Speed":       {"port": 5003, "base": 1500, "jitter": 50,  "spike_chance": 0.05, "spike_val": 1600},
-    "Vibration":   {"port": 5004, "base": 1.0,  "jitter": 0.2, "spike_chance": 0.10, "spike_val": 4.5}, # High noise
-    "Counter":     {"port": 5005, "base": 0,    "jitter": 1,   "spike_chance": 0.0,  "spike_val": 0}
+    "Temperature": {"port": 5001, "id": 1, "base": 25.0, "jitter": 2.0, "spike_chance": 0.05, "spike_val": 60.0},
+    "Pressure":    {"port": 5002, "id": 2, "base": 5.0,  "jitter": 0.5, "spike_chance": 0.05, "spike_val": 8.0},
+    "Speed":       {"port": 5003, "id": 3, "base": 1500, "jitter": 50,  "spike_chance": 0.05, "spike_val": 1600},
+    "Vibration":   {"port": 5004, "id": 4, "base": 1.0,  "jitter": 0.2, "spike_chance": 0.10, "spike_val": 4.5, # High noise
+                    "protocol": "ndjson", "batch": 1},
+    "Counter":     {"port": 5005, "id": 5, "base": 0,    "jitter": 1,   "spike_chance": 0.0,  "spike_val": 0}
 }
 
+# Binary frame layout, mirrored from app/binary_protocol.py:
+# header (magic b"SW", uint16 count) + count * (uint16 id, float64 value, int64 epoch ns, uint8 status)
+FRAME_HEADER = struct.Struct("<2sH")
+SAMPLE = struct.Struct("<HdqB")
+
+def encode_frame(sensor_id, readings):
+    out = bytearray(FRAME_HEADER.pack(b"SW", len(readings)))
+    for reading, epoch_ns in readings:
+        status = 0 if reading["status"] == "OK" else 1
+        out += SAMPLE.pack(sensor_id, reading["value"], epoch_ns, status)
+    return bytes(out)
+
 class SensorInstance:
     def __init__(self, name, config):
         self.name = name
@@ -58,10 +93,19 @@ class SensorInstance:
                     with conn:
                         print(f"Simulator: {self.name} connected to {addr}")
                         while self.is_running:
-                            reading = self.generate_reading()
-                            msg = json.dumps(reading) + "\n"
+                            if self.config.get("protocol") == "binary":
+                                # Spread the batch's sample times across the send interval
+                                batch = self.config.get("batch", 1)
+                                now_ns = time.time_ns()
+                                step_ns = 500_000_000 // batch
+                                samples = [(self.generate_reading(), now_ns - (batch - 1 - i) * step_ns)
+                                           for i in range(batch)]
+                                payload = encode_frame(self.config["id"], samples)
+                            else:
+                                reading = self.generate_reading()
+                                payload = (json.dumps(reading) + "\n").encode('utf-8')
                             try:
-                                conn.sendall(msg.encode('utf-8'))
+                                conn.sendall(payload)
                             except (BrokenPipeError, ConnectionResetError, socket.error):
                                 print(f"Simulator: {self.name} connection lost.")
                                 break
@@ -69,6 +113,155 @@ class SensorInstance:
             except Exception as e:
                 print(f"Simulator error in {self.name}: {e}")
 
+# --- asyncio load simulator ---------------------------------------------------
+
+# Spec file keys (per sensor or group; missing keys come from "defaults", then here).
+# A group has "count": its "name" is formatted with {i}, and "port"/"id" increase by one
+# per sensor. "mode" is "walk" (random walk with spikes) or "counter".
+SPEC_DEFAULTS = {"rate_hz": 2.0, "protocol": "ndjson", "batch": 1, "mode": "walk", "base": 0.0,
+                 "jitter": 1.0, "spike_chance": 0.0, "spike_val": 0.0, "fault_chance": 0.03}
+CLIENT_BUFFER_LIMIT = 4 * 1024 * 1024  # bytes queued for one client before its samples are dropped
+MAX_FRAME_SAMPLES = 0xFFFF
+
+def builtin_spec():
+    """The five SENSORS above in spec form, at the legacy 2 Hz."""
+    sensors = []
+    for name, cfg in SENSORS.items():
+        entry = {"name": name, "mode": "counter" if name == "Counter" else "walk"}
+        entry.update({k: v for k, v in cfg.items() if k in SPEC_DEFAULTS or k in ("port", "id")})
+        sensors.append(entry)
+    return {"sensors": sensors}
+
+def expand_spec(spec):
+    """Flat list of complete sensor configs, groups expanded."""
+    defaults = dict(SPEC_DEFAULTS, **spec.get("defaults", {}))
+    sensors = []
+    for entry in spec["sensors"]:
+        count = entry.get("count")
+        for i in range(count if count is not None else 1):
+            cfg = dict(defaults, **{k: v for k, v in entry.items() if k != "count"})
+            if count is not None:
+                cfg["name"] = entry["name"].format(i=i)
+                cfg["port"] = entry["port"] + i
+                if "id" in entry:
+                    cfg["id"] = entry["id"] + i
+            sensors.append(cfg)
+    for key in ("name", "port"):
+        values = [cfg[key] for cfg in sensors]
+        if len(set(values)) != len(values):
+            raise ValueError(f"Duplicate sensor {key} in spec")
+    for cfg in sensors:
+        if cfg["protocol"] == "binary" and "id" not in cfg:
+            raise ValueError(f"Binary sensor {cfg['name']} needs an id")
+    return sensors
+
+class AsyncSensor:
+    """
+    One simulated sensor on the event loop. Sample k is stamped t0 + k / rate
+    and its value depends only on the seed, the sensor name and k, so the
+    schedule never drifts and every client of every run sees the same data.
+    """
+    def __init__(self, cfg, seed):
+        self.cfg = cfg
+        self.name = cfg["name"]
+        self.rate = float(cfg["rate_hz"])
+        self.batch = max(1, min(int(cfg["batch"]), MAX_FRAME_SAMPLES))
+        self.rng = random.Random(f"{seed}:{self.name}")
+        self.value = float(cfg["base"])
+        self.clients = set()
+        self.sent = 0  # samples generated
+        self.dropped = 0  # samples not queued for a client that was too far behind
+        self.lag = 0.0  # seconds the last wake-up was late
+
+    def next_sample(self):
+        cfg, rng = self.cfg, self.rng
+        status = "Faulty Sensor" if rng.random() < cfg["fault_chance"] else "OK"
+        if cfg["mode"] == "counter":
+            self.value += 1
+        else:
+            self.value += rng.uniform(-cfg["jitter"], cfg["jitter"])
+            if rng.random() < cfg["spike_chance"]:
+                self.value += cfg["spike_val"]
+        return round(self.value, 2), status
+
+    def encode(self, first, n, t0):
+        """Samples first..first+n-1 as NDJSON lines or binary frames of up to `batch` samples."""
+        period = 1.0 / self.rate
+        samples = [(self.next_sample(), t0 + (first + j) * period) for j in range(n)]
+        if self.cfg["protocol"] == "binary":
+            return b"".join(encode_frame(self.cfg["id"], [({"value": v, "status": s}, round(t * 1e9))
+                                                         for (v, s), t in samples[i:i + self.batch]])
+                            for i in range(0, n, self.batch))
+        return "".join(json.dumps({"sensor": self.name, "value": v, "timestamp": datetime.fromtimestamp(t).isoformat(),
+                                   "status": s}) + "\n" for (v, s), t in samples).encode()
+
+    async def on_connect(self, reader, writer):
+        self.clients.add(writer)
+        try:
+            await reader.read()  # until the client disconnects
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    async def run(self, t0_wall, t0_loop, tick):
+        """Sends every complete batch that is due, waking at most once per `tick` seconds."""
+        loop = asyncio.get_running_loop()
+        last_wake = t0_loop
+        while True:
+            wake = max(t0_loop + (self.sent + self.batch) / self.rate, last_wake + tick)
+            await asyncio.sleep(wake - loop.time())
+            last_wake = now = loop.time()
+            self.lag = now - wake
+            due = math.floor((now - t0_loop) * self.rate + 1e-9) - self.sent
+            due -= due % self.batch  # whole batches only; a late wake-up sends several
+            if due <= 0:
+                continue
+            payload = self.encode(self.sent, due, t0_wall)
+            self.sent += due
+            for writer in list(self.clients):
+                if writer.transport.get_write_buffer_size() > CLIENT_BUFFER_LIMIT:
+                    self.dropped += due
+                else:
+                    writer.write(payload)
+
+def _raise_fd_limit(needed):
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft < needed:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard if hard != resource.RLIM_INFINITY else needed, hard))
+    except (ImportError, ValueError, OSError):
+        pass
+
+async def run_async_simulator(sensors, seed=0, host="127.0.0.1", tick=0.005, duration=None, stats_interval=5.0):
+    _raise_fd_limit(4 * len(sensors) + 256)
+    instances = [AsyncSensor(cfg, seed) for cfg in sensors]
+    servers = []
+    for sensor in instances:
+        servers.append(await asyncio.start_server(sensor.on_connect, host, sensor.cfg["port"],
+                                                  reuse_address=True, backlog=128))
+    loop = asyncio.get_running_loop()
+    t0_wall, t0_loop = time.time(), loop.time()
+    tasks = [asyncio.create_task(sensor.run(t0_wall, t0_loop, tick)) for sensor in instances]
+    total_rate = sum(sensor.rate for sensor in instances)
+    print(f"Simulator: {len(instances)} sensors on {host}, {total_rate:.0f} samples/s scheduled, seed {seed}")
+    try:
+        start, last_sent, last_t = loop.time(), 0, loop.time()
+        while duration is None or loop.time() - start < duration:
+            await asyncio.sleep(stats_interval if duration is None else min(stats_interval, duration))
+            now, sent = loop.time(), sum(sensor.sent for sensor in instances)
+            clients = sum(len(sensor.clients) for sensor in instances)
+            print(f"Simulator: {(sent - last_sent) / (now - last_t):.0f} samples/s, {clients} clients, "
+                  f"{sum(s.dropped for s in instances)} dropped, max lag {max(s.lag for s in instances) * 1000:.1f} ms")
+            last_sent, last_t = sent, now
+    finally:
+        for task in tasks:
+            task.cancel()
+        for server in servers:
+            server.close()
+
 def run_simulator():
     threads = []
     for name, config in SENSORS.items():
@@ -84,5 +277,42 @@ def run_simulator():
     except KeyboardInterrupt:
         print("Stopping simulators...")
 
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["threads", "asyncio"], default=None,
+                        help="threads (default) or asyncio; --spec implies asyncio")
+    parser.add_argument("--spec", help="JSON spec file of sensors and sensor groups")
+    parser.add_argument("--seed", type=int, default=None, help="value sequence seed (default: spec's seed or 0)")
+    parser.add_argument("--host", default=None, help="listen address (default: spec's host or 127.0.0.1)")
+    parser.add_argument("--rate-scale", type=float, default=1.0, help="multiply every sensor's rate")
+    parser.add_argument("--tick-ms", type=float, default=5.0, help="shortest wake-up interval per sensor")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    parser.add_argument("--print-config", action="store_true",
+                        help="print the matching SENSORS_CONFIG entries as JSON and exit")
+    args = parser.parse_args()
+
+    if args.spec is None and args.mode != "asyncio" and not args.print_config:
+        run_simulator()
+        return
+    spec = builtin_spec()
+    if args.spec:
+        with open(args.spec) as f:
+            spec = json.load(f)
+    sensors = expand_spec(spec)
+    for cfg in sensors:
+        cfg["rate_hz"] *= args.rate_scale
+    if args.print_config:
+        config = {cfg["name"]: {k: cfg[k] for k in ("port", "id", "protocol", "low", "high", "unit") if k in cfg}
+                  for cfg in sensors}
+        json.dump(config, sys.stdout, indent=1, ensure_ascii=False)
+        print()
+        return
+    seed = args.seed if args.seed is not None else spec.get("seed", 0)
+    host = args.host or spec.get("host", "127.0.0.1")
+    try:
+        asyncio.run(run_async_simulator(sensors, seed, host, args.tick_ms / 1000.0, args.duration))
+    except KeyboardInterrupt:
+        print("Stopping simulators...")
+
 if __name__ == "__main__":
-    run_simulator()
+    main()
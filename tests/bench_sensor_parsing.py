@@ -0,0 +1,63 @@
+"""
+Parse-throughput benchmark for sensor packets.
+
+Compares the legacy json.loads + SensorReading.from_dict path with
+ReadingParser on every available JSON backend. Not collected by pytest.
+
+Usage:
+    python -m tests.bench_sensor_parsing [--packets 200000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import parser as parser_module
+from app.data_models import SensorReading
+from app.parser import ReadingParser, _load_backend
+
+def make_lines(n, rate_hz):
+    start = datetime(2026, 1, 1, 12, 0, 0)
+    step = timedelta(seconds=1.0 / rate_hz)
+    # Millisecond resolution like most plant gateways: fast streams repeat timestamps
+    return [json.dumps({"sensor": "Vibration", "value": 1.0 + i * 1e-3,
+                        "timestamp": (start + i * step).isoformat(timespec="milliseconds"),
+                        "status": "OK"}).encode() for i in range(n)]
+
+def legacy(lines):
+    for line in lines:
+        SensorReading.from_dict(json.loads(line))
+
+def fast(lines):
+    parse = ReadingParser().parse
+    for line in lines:
+        parse(line)
+
+def timed(fn, lines):
+    t0 = time.perf_counter()
+    fn(lines)
+    return len(lines) / (time.perf_counter() - t0)
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--packets", type=int, default=200000)
+    ap.add_argument("--rate", type=float, default=5000.0, help="Simulated sample rate for timestamps")
+    args = ap.parse_args()
+
+    lines = make_lines(args.packets, args.rate)
+    print(f"{'path':<28} {'packets/s':>12}")
+    print(f"{'json + from_dict (legacy)':<28} {timed(legacy, lines):>12,.0f}")
+    for name in ("json", "msgspec", "orjson"):
+        try:
+            parser_module.BACKEND, parser_module._decode = _load_backend(name)
+        except ValueError:
+            print(f"{'ReadingParser/' + name:<28} {'not installed':>12}")
+            continue
+        print(f"{'ReadingParser/' + name:<28} {timed(fast, lines):>12,.0f}")
+
+if __name__ == "__main__":
+    main()
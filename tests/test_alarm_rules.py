@@ -0,0 +1,127 @@
+import numpy as np
+from datetime import datetime, timedelta
+from app import alarm_rules
+from app.alarm_manager import AlarmManager
+from app.alarm_rules import RuleTable, STATE_NORMAL, STATE_HIGH, STATE_ROC, STATE_FAULTY
+from app.data_models import SensorReading
+
+CONFIG = {
+    "Vibration": {"low": 0.0, "high": 5.0, "deadband": 0.5, "on_delay": 2, "off_delay": 2, "unit": "mm/s"},
+    "Flow": {"low": None, "high": 10.0, "max_rate": 1.0, "unit": "l/s"},
+}
+
+def _run(table, sensor, values, start=0.0):
+    idx = np.full(len(values), table.index[sensor])
+    times = start + np.arange(len(values), dtype=np.float64)
+    return table.evaluate(idx, np.array(values, dtype=np.float64), times, np.ones(len(values), dtype=bool))
+
+def test_on_delay_deadband_and_off_delay():
+    table = RuleTable(CONFIG)
+    # A single spike is ignored; two in a row raise the alarm
+    pos, _, _, new = _run(table, "Vibration", [5.1, 4.0, 5.2, 5.3])
+    assert pos.tolist() == [3] and new.tolist() == [STATE_HIGH]
+    # Chatter just under the limit stays inside the deadband: still HIGH
+    _run(table, "Vibration", [4.9, 4.8, 5.1, 4.7], start=4)
+    assert table.state[table.index["Vibration"]] == STATE_HIGH
+    # Clears only after off_delay samples below high - deadband
+    pos, _, old, new = _run(table, "Vibration", [4.2, 4.1], start=8)
+    assert pos.tolist() == [1] and old.tolist() == [STATE_HIGH] and new.tolist() == [STATE_NORMAL]
+
+def test_rate_of_change_and_faulty():
+    table = RuleTable(CONFIG)
+    _, _, _, new = _run(table, "Flow", [1.0, 1.5, 4.0])  # 2.5/s > max_rate 1/s
+    assert new.tolist() == [STATE_ROC]
+    idx = np.array([table.index["Flow"]])
+    _, _, _, new = table.evaluate(idx, np.array([4.0]), np.array([3.0]), np.array([False]))
+    assert new.tolist() == [STATE_FAULTY]
+
+def test_interleaved_batch_matches_sequential():
+    rng = np.random.default_rng(1)
+    idx = rng.integers(0, 2, 400)
+    values = rng.normal(5.0, 1.0, 400)
+    times = np.arange(400, dtype=np.float64)
+    ok = rng.random(400) > 0.05
+
+    batched = RuleTable(CONFIG)
+    pos, sensors, _, new = batched.evaluate(idx, values, times, ok)
+
+    sequential = RuleTable(CONFIG)
+    expected = []
+    for p in range(400):
+        p_pos, _, _, p_new = sequential.evaluate(idx[p:p + 1], values[p:p + 1], times[p:p + 1], ok[p:p + 1])
+        expected += [(p, int(s)) for s in p_new]
+    assert list(zip(pos.tolist(), new.tolist())) == expected
+    assert (batched.state == sequential.state).all()
+
+def test_scalar_runs_match_vectorized_rounds(monkeypatch):
+    """Long runs and small batches go through the scalar path; the result must not change."""
+    config = {f"S{k}": {"low": 0.0, "high": 10.0, "deadband": 1.0, "on_delay": 1 + k % 3, "off_delay": 2,
+                        "max_rate": 4.0} for k in range(41)}
+    rng = np.random.default_rng(7)
+    n = 500
+    idx = np.where(rng.random(n) < 0.8, 0, rng.integers(1, 41, n))  # one long run, many short ones
+    values = rng.normal(5.0, 4.0, n)
+    times = np.arange(n, dtype=np.float64) / 2
+    ok = rng.random(n) > 0.05
+
+    mixed = RuleTable(config)
+    result = [column.tolist() for column in mixed.evaluate(idx, values, times, ok)]
+    small = RuleTable(config)
+    pieces = [small.evaluate(idx[k:k + 7], values[k:k + 7], times[k:k + 7], ok[k:k + 7]) for k in range(0, n, 7)]
+    small_pos = [p + k for k, piece in zip(range(0, n, 7), pieces) for p in piece[0].tolist()]
+
+    monkeypatch.setattr(alarm_rules, "SCALAR_MAX_BATCH", 0)
+    monkeypatch.setattr(alarm_rules, "SCALAR_MIN_RUN", n + 1)
+    vectorized = RuleTable(config)
+    expected = [column.tolist() for column in vectorized.evaluate(idx, values, times, ok)]
+
+    assert result == expected and small_pos == expected[0]
+    for table in (mixed, small):
+        for column in ("state", "candidate", "count", "last_value", "last_time"):
+            assert np.array_equal(getattr(table, column), getattr(vectorized, column), equal_nan=True)
+        assert (table.state_counts == vectorized.state_counts).all()
+
+def test_check_reading_matches_check_batch():
+    t0 = datetime(2026, 1, 1, 12, 0, 0)
+    readings = [SensorReading("Vibration" if i % 3 else "Flow", v, t0 + timedelta(seconds=i), "OK")
+                for i, v in enumerate([6.0, 6.5, 7.0, 12.0, 4.0, 1.0, 3.0, 20.0, 9.0])]
+    single, batched = AlarmManager(CONFIG), AlarmManager(CONFIG)
+    one_by_one = [single.check_reading(r) for r in readings]
+    alarms = batched.check_batch(readings)
+    assert len(alarms) >= 2
+    assert [(a.sensor_name, a.alarm_type) for a in one_by_one if a] == [(a.sensor_name, a.alarm_type) for a in alarms]
+    assert dict(single.active_alarms) == dict(batched.active_alarms)
+
+def test_manager_batch_events():
+    manager = AlarmManager(CONFIG)
+    t0 = datetime(2026, 1, 1, 12, 0, 0)
+    readings = [SensorReading("Vibration", v, t0 + timedelta(seconds=i), "OK") for i, v in enumerate([6.0, 6.5, -1.0])]
+    readings.append(SensorReading("Unknown", 1.0, t0, "OK"))
+    alarms = manager.check_batch(readings)
+    assert [a.alarm_type for a in alarms] == ["HIGH"]
+    assert alarms[0].value == 6.5
+    assert manager.active_alarms["Vibration"] == "ALARM_HIGH"
+    assert dict(manager.active_alarms) == {"Vibration": "ALARM_HIGH", "Flow": None}
+
+def test_state_counts_and_status_listener():
+    manager = AlarmManager(CONFIG)
+    changes = []
+    manager.add_status_listener(lambda old, new: changes.append((old, new)))
+    t0 = datetime(2026, 1, 1, 12, 0, 0)
+
+    def feed(sensor, values, status="OK", start=0):
+        manager.check_batch([SensorReading(sensor, v, t0 + timedelta(seconds=start + i), status)
+                             for i, v in enumerate(values)])
+
+    assert manager.get_system_status() == "OK" and manager.ok_count == 2
+    feed("Flow", [1.0], status="ERROR")
+    assert manager.faulty_count == 1 and manager.get_system_status() == "DEGRADED"
+    feed("Vibration", [6.0, 6.5, 7.0], start=1)
+    assert manager.alarm_count == 1 and manager.is_alarm("Vibration") and not manager.is_alarm("Flow")
+    # Further readings that keep the same states do not notify again
+    feed("Vibration", [7.5, 8.0], start=4)
+    feed("Vibration", [1.0, 1.0], start=6)
+    feed("Flow", [1.0], start=8)
+    assert manager.alarm_count == 0 and manager.faulty_count == 0
+    assert changes == [("OK", "DEGRADED"), ("DEGRADED", "ALARM"), ("ALARM", "DEGRADED"), ("DEGRADED", "OK")]
+    assert list(manager.rules.state_counts) == [2, 0, 0, 0, 0]
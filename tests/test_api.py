@@ -1,7 +1,11 @@
 import pytest
+import gzip
 import json
 import time
 import threading
+import numpy as np
+from app.history_store import HistoryStore, RECORD_DTYPE
+from app.rollups import RollupEngine
 from app.api import app, latest_data, system_status
 
 @pytest.fixture
@@ -36,6 +40,7 @@ def test_api_status_data(client):
     from app import api
     api.system_status = "ALARM"
     api.latest_data["Temperature"] = latest_data["Temperature"]
+    api.publish_status()
 
     response = client.get('/api/status')
     data = response.get_json()
@@ -43,3 +48,87 @@ def test_api_status_data(client):
     assert data["status"] == "ALARM"
     assert data["sensors"]["Temperature"]["value"] == 25.5
     assert data["sensors"]["Temperature"]["status"] == "OK"
+
+def test_api_status_etag_and_gzip(client):
+    """Unchanged snapshots answer 304; large ones are served gzipped on request."""
+    from app import api
+    api.publish_status()
+    first = client.get('/api/status')
+    etag = first.headers["ETag"]
+    assert client.get('/api/status', headers={"If-None-Match": etag}).status_code == 304
+
+    for i in range(40):
+        api.latest_data[f"Sensor{i}"] = {"value": i, "timestamp": "2026-01-01T12:00:00", "status": "OK", "alarm": None}
+    api.publish_status()
+    response = client.get('/api/status', headers={"If-None-Match": etag, "Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.data))["sensors"]["Sensor39"]["value"] == 39
+    for i in range(40):
+        del api.latest_data[f"Sensor{i}"]
+
+def test_api_status_long_poll(client):
+    from app import api
+    version = api.publish_status().version
+    # Already newer: returns immediately
+    assert client.get(f'/api/status?since_version={version - 1}').get_json()["version"] == version
+    # Nothing new within the timeout: returns the current snapshot
+    assert client.get(f'/api/status?since_version={version}&timeout=0.05').get_json()["version"] == version
+
+    threading.Timer(0.1, api.publish_status).start()
+    start = time.time()
+    data = client.get(f'/api/status?since_version={version}&timeout=5').get_json()
+    assert data["version"] == version + 1 and time.time() - start < 2
+    assert client.get('/api/status?since_version=abc').status_code == 400
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    """Seeds one day of Temperature history at 1 sample/10 s into temporary stores."""
+    from app import api
+    store = HistoryStore(str(tmp_path / "history"))
+    rollups = RollupEngine(str(tmp_path / "rollups"))
+    start = 1_700_000_000
+    rec = np.zeros(8640, dtype=RECORD_DTYPE)
+    rec["t"] = (start + np.arange(8640) * 10) * 1_000_000_000
+    rec["v"] = np.arange(8640) % 100
+    rec["s"][5] = 1
+    store.append("Temperature", rec)
+    for t, v in zip(rec["t"] / 1e9, rec["v"]):
+        rollups.add_sample("Temperature", t, v)
+    rollups.flush()
+    monkeypatch.setattr(api, "history_store", store)
+    monkeypatch.setattr(api, "rollup_engine", rollups)
+    return start
+
+def _ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+def test_history_raw_range(client, history):
+    response = client.get(f'/api/history/Temperature?from={history}&to={history + 99}')
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = _ndjson(response)
+    assert lines[0] == {"sensor": "Temperature", "resolution": "raw", "agg": "raw"}
+    assert [row["value"] for row in lines[1:]] == [float(i) for i in range(10)]
+    assert lines[6]["status"] == "Faulty Sensor"
+
+def test_history_downsamples_to_budget(client, history):
+    # A whole day does not fit 200 points: "auto" switches to rollup buckets
+    lines = _ndjson(client.get(f'/api/history/Temperature?from={history}&to={history + 86400}&max_points=200'))
+    assert lines[0]["resolution"] == "1h" and lines[0]["agg"] == "stats"
+    assert 1 < len(lines) - 1 <= 200
+    assert sum(row["count"] for row in lines[1:]) == 8640
+
+    lines = _ndjson(client.get(f'/api/history/Temperature?from={history}&to={history + 86400}&max_points=200&agg=raw'))
+    values = [row["value"] for row in lines[1:]]
+    assert len(values) <= 210 and min(values) == 0.0 and max(values) == 99.0
+
+def test_history_bulk_and_errors(client, history):
+    lines = _ndjson(client.get(f'/api/history?sensors=Temperature,Pressure&from={history}&to={history + 3600}&agg=mean'))
+    headers = [line["sensor"] for line in lines if "sensor" in line]
+    assert headers == ["Temperature", "Pressure"]
+    assert client.get('/api/history/Nope').status_code == 404
+    assert client.get('/api/history/Temperature?agg=median').status_code == 400
+    assert client.get('/api/history/Temperature?from=2026-01-02&to=2026-01-01').status_code == 400
+    for bad in ("from=inf", "to=1e300", "from=-1e300", "to=nan", "from=9999-12-31"):
+        assert client.get(f'/api/history/Temperature?{bad}').status_code == 400
@@ -0,0 +1,117 @@
+import gzip
+import http.client
+import json
+import socket
+import threading
+import time
+import numpy as np
+import pytest
+from app.history_store import HistoryStore, RECORD_DTYPE
+from app.api_server import ApiServer
+from app.snapshot import SnapshotPublisher
+
+@pytest.fixture
+def server():
+    snapshots = SnapshotPublisher(gzip_min_bytes=64)
+    snapshots.publish({"status": "OK", "sensors": {"Temperature": {"value": 21.5}}})
+    srv = ApiServer(host="127.0.0.1", port=0, snapshots=snapshots, max_connections=2, keepalive_timeout=2)
+    srv.start()
+    yield srv
+    srv.stop()
+
+def test_status_keepalive_and_etag(server):
+    conn = http.client.HTTPConnection("127.0.0.1", server.port)
+    conn.request("GET", "/api/status")
+    response = conn.getresponse()
+    body = json.loads(response.read())
+    assert response.status == 200
+    assert body["sensors"]["Temperature"]["value"] == 21.5
+    etag = response.getheader("ETag")
+
+    # Same connection: keep-alive, then a conditional request
+    conn.request("GET", "/api/status", headers={"If-None-Match": etag})
+    response = conn.getresponse()
+    response.read()
+    assert response.status == 304
+
+    conn.request("GET", "/api/status", headers={"Accept-Encoding": "gzip"})
+    response = conn.getresponse()
+    assert response.getheader("Content-Encoding") == "gzip"
+    assert json.loads(gzip.decompress(response.read()))["status"] == "OK"
+    assert server.connections == 1
+    conn.close()
+
+    for _ in range(50):  # counters update just after the response is written
+        if server.requests == 3:
+            break
+        time.sleep(0.01)
+    stats = server.stats()
+    assert stats["requests"] == 3 and stats["latency_ms"]["samples"] == 3
+    assert stats["latency_ms"]["p50"] <= stats["latency_ms"]["p99"]
+
+def test_long_poll_wakes_on_publish(server):
+    version = server.snapshots.current.version
+    threading.Timer(0.1, server.snapshots.publish, args=({"status": "ALARM", "sensors": {}},)).start()
+    conn = http.client.HTTPConnection("127.0.0.1", server.port)
+    start = time.time()
+    conn.request("GET", f"/api/status?since_version={version}&timeout=5")
+    body = json.loads(conn.getresponse().read())
+    assert body["version"] == version + 1 and body["status"] == "ALARM"
+    assert time.time() - start < 2
+    conn.close()
+
+def test_connection_limit(server):
+    held = [socket.create_connection(("127.0.0.1", server.port)) for _ in range(2)]
+    time.sleep(0.1)
+    conn = http.client.HTTPConnection("127.0.0.1", server.port)
+    conn.request("GET", "/api/status")
+    assert conn.getresponse().status == 503
+    assert server.rejected == 1
+    for s in held:
+        s.close()
+
+def test_other_routes_stream_through_flask(server, tmp_path, monkeypatch):
+    from app import api
+    store = HistoryStore(str(tmp_path))
+    rec = np.zeros(5000, dtype=RECORD_DTYPE)
+    rec["t"] = (1_700_000_000 + np.arange(5000)) * 1_000_000_000
+    store.append("Temperature", rec)
+    monkeypatch.setattr(api, "history_store", store)
+
+    conn = http.client.HTTPConnection("127.0.0.1", server.port)
+    conn.request("GET", "/api/history/Temperature?from=1700000000&to=1700005000&agg=raw&max_points=10000")
+    response = conn.getresponse()
+    assert response.status == 200
+    assert response.getheader("Transfer-Encoding") == "chunked"
+    assert len(response.read().splitlines()) == 5001
+    conn.request("GET", "/api/history/Nope")
+    response = conn.getresponse()
+    response.read()
+    assert response.status == 404
+    conn.request("GET", "/api/server-stats")
+    assert json.loads(conn.getresponse().read())["mode"] == "asyncio"
+    conn.close()
+
+def test_bad_content_length_gets_400(server):
+    for length in ("abc", "-5"):
+        with socket.create_connection(("127.0.0.1", server.port), timeout=5) as s:
+            s.sendall(f"POST /api/status HTTP/1.1\r\nHost: x\r\nContent-Length: {length}\r\n\r\n".encode())
+            assert s.recv(1024).startswith(b"HTTP/1.1 400 ")
+
+def test_head_of_chunked_route_keeps_connection_usable(server, tmp_path, monkeypatch):
+    from app import api
+    store = HistoryStore(str(tmp_path))
+    rec = np.zeros(10, dtype=RECORD_DTYPE)
+    rec["t"] = (1_700_000_000 + np.arange(10)) * 1_000_000_000
+    store.append("Temperature", rec)
+    monkeypatch.setattr(api, "history_store", store)
+
+    with socket.create_connection(("127.0.0.1", server.port), timeout=5) as s:
+        s.sendall(b"HEAD /api/history/Temperature?from=1700000000&to=1700000010&agg=raw HTTP/1.1\r\nHost: x\r\n\r\n")
+        head = b""
+        while not head.endswith(b"\r\n\r\n"):
+            head += s.recv(1)
+        assert head.startswith(b"HTTP/1.1 200 ")
+        # Nothing may follow the headers: a stray chunk terminator would corrupt the next response
+        s.sendall(b"GET /api/server-stats HTTP/1.1\r\nHost: x\r\n\r\n")
+        assert s.recv(1024).startswith(b"HTTP/1.1 200 ")
@@ -0,0 +1,82 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+from app.async_ingest import AsyncIngestEngine, shard_sensors
+
+def test_shard_sensors_round_robin():
+    config = {f"S{i}": {"port": 6000 + i} for i in range(5)}
+    shards = shard_sensors(config, 2)
+    assert shards == [{"S0": 6000, "S2": 6002, "S4": 6004}, {"S1": 6001, "S3": 6003}]
+    assert shard_sensors(config, 10) == [{f"S{i}": 6000 + i} for i in range(5)]
+
+def test_engine_receives_readings():
+    packets = [
+        {"sensor": "Pressure", "value": 5.5, "timestamp": "2026-01-01T12:00:00", "status": "OK"},
+        {"sensor": "Pressure", "value": 6.5, "timestamp": "2026-01-01T12:00:01", "status": "OK"},
+    ]
+    payload = "".join(json.dumps(p) + "\n" for p in packets).encode()
+
+    async def scenario():
+        received = []
+
+        async def serve(reader, writer):
+            # Split mid-line to exercise reassembly across chunks
+            writer.write(payload[:30])
+            await writer.drain()
+            await asyncio.sleep(0.05)
+            writer.write(payload[30:] + b"not json\n")
+            await writer.drain()
+
+        server = await asyncio.start_server(serve, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        engine = AsyncIngestEngine({"Pressure": port}, received.append)
+        task = asyncio.create_task(engine.run())
+        for _ in range(100):
+            if len(received) >= 2:
+                break
+            await asyncio.sleep(0.02)
+        engine.running = False
+        engine._stop_event.set()
+        await task
+        server.close()
+        return received
+
+    received = asyncio.run(scenario())
+    assert [r.value for r in received] == [5.5, 6.5]
+
+def test_threaded_worker_survives_oversized_line():
+    """An oversized line is a parse error; the SensorWorker keeps its connection and the next line."""
+    from app.config import MAX_LINE_BYTES
+    from app.sensor_worker import SensorWorker
+
+    packet = {"sensor": "Pressure", "value": 7.5, "timestamp": "2026-01-01T12:00:00", "status": "OK"}
+    listener = socket.create_server(("127.0.0.1", 0))
+    port = listener.getsockname()[1]
+
+    worker = SensorWorker("Pressure", port, batch=False)
+
+    def serve():
+        conn, _ = listener.accept()
+        with conn:
+            conn.sendall(b"x" * (MAX_LINE_BYTES + 1))
+            time.sleep(0.2)  # let the worker hit the limit before the newline arrives
+            conn.sendall(b"\n" + json.dumps(packet).encode() + b"\n")
+            time.sleep(1.0)
+        worker.running = False  # watchdog: never left running if the reading does not arrive
+
+    threading.Thread(target=serve, daemon=True).start()
+    received, statuses = [], []
+    errors = worker._m_errors.value
+
+    def on_reading(reading):
+        received.append(reading)
+        worker.running = False
+
+    worker.data_received.connect(on_reading)
+    worker.connection_status.connect(lambda name, up: statuses.append(up))
+    worker.run()  # on this thread: returns once a reading stopped it
+    listener.close()
+    assert [r.value for r in received] == [7.5]
+    assert statuses == [True] and worker._m_errors.value > errors
@@ -0,0 +1,47 @@
+import time
+import pytest
+from app.binary_protocol import encode_frame, BinaryFramer, FRAME_HEADER, SAMPLE, SENSOR_IDS, sensor_ids
+from app.parser import StreamDecoder
+
+def feed(framer, data):
+    window = framer.writable()
+    window[:len(data)] = data
+    framer.commit(len(data))
+
+def test_frame_roundtrip_across_chunks():
+    samples = [(SENSOR_IDS["Vibration"], 1.5 + i, 1_700_000_000_000_000_000 + i, 0) for i in range(10)]
+    data = encode_frame(samples[:4]) + encode_frame(samples[4:])
+    assert len(data) == 2 * FRAME_HEADER.size + 10 * SAMPLE.size
+
+    framer = BinaryFramer(recv_size=16)
+    received = []
+    for i in range(0, len(data), 7):
+        feed(framer, data[i:i + 7])
+        received += framer.samples()
+    assert received == samples
+
+def test_decoder_converts_samples_to_readings():
+    now_ns = time.time_ns()
+    decoder = StreamDecoder("binary")
+    feed(decoder.framer, encode_frame([(SENSOR_IDS["Pressure"], 7.25, now_ns, 1), (999, 1.0, now_ns, 0)]))
+    errors = []
+    decoder.on_error = errors.append
+
+    readings = decoder.readings()
+    assert len(readings) == 1 and len(errors) == 1
+    assert readings[0].sensor_name == "Pressure"
+    assert readings[0].value == 7.25
+    assert readings[0].status == "Faulty Sensor"
+    assert abs(readings[0].timestamp.timestamp() * 1e9 - now_ns) < 1e4
+
+def test_invalid_magic():
+    framer = BinaryFramer()
+    feed(framer, b"XX\x01\x00" + bytes(SAMPLE.size))
+    with pytest.raises(ValueError):
+        framer.samples()
+
+def test_sensor_ids_only_required_for_binary_sensors():
+    assert sensor_ids({"Temperature": {"port": 5001}, "Vibration": {"port": 5005, "id": 5, "protocol": "binary"}}) \
+        == {"Vibration": 5}
+    with pytest.raises(ValueError):
+        sensor_ids({"Vibration": {"port": 5005, "protocol": "binary"}})
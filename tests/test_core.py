@@ -0,0 +1,73 @@
+import json
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from app import api
+from app.core import SensorCore
+from app.data_models import SensorReading
+from app.notifications import NotificationDispatcher, Outbox
+
+CONFIG = {"Pressure": {"port": 0, "low": None, "high": 12.0, "unit": "bar"}}
+
+def _core(tmp_path, config=CONFIG):
+    return SensorCore(config, history=False, notifier=NotificationDispatcher([], Outbox(str(tmp_path))),
+                      tick_interval=0.02)
+
+def test_process_updates_api_state_and_listeners(tmp_path):
+    core = _core(tmp_path)
+    batches, statuses = [], []
+    core.add_batch_listener(lambda readings, alarms: batches.append((len(readings), [a.alarm_type for a in alarms])))
+    core.alarms.add_status_listener(lambda old, new: statuses.append(new))
+    t0 = datetime(2026, 1, 1, 12, 0, 0)
+    core.process([SensorReading("Pressure", v, t0 + timedelta(seconds=i), "OK") for i, v in enumerate([10.0, 13.0])])
+    assert batches == [(2, ["HIGH"])] and statuses == ["ALARM"]
+    assert api.latest_data["Pressure"]["alarm"] == "ALARM_HIGH" and api.system_status == "ALARM"
+    version = api.snapshots.current.version
+    core.tick()
+    assert api.snapshots.current.version == version + 1
+    core.tick()  # nothing changed: no new snapshot
+    assert api.snapshots.current.version == version + 1
+    api.latest_data.pop("Pressure")
+
+def test_headless_ingest_end_to_end(tmp_path):
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+
+    def serve():
+        conn, _ = listener.accept()
+        with conn:
+            for i in range(5):
+                line = {"sensor": "Pressure", "value": 5.0 + i, "timestamp": datetime.now().isoformat(), "status": "OK"}
+                conn.sendall((json.dumps(line) + "\n").encode())
+            time.sleep(1.0)
+
+    threading.Thread(target=serve, daemon=True).start()
+    core = _core(tmp_path, {"Pressure": {**CONFIG["Pressure"], "port": listener.getsockname()[1]}})
+    seen = []
+    core.add_batch_listener(lambda readings, alarms: seen.extend(r.value for r in readings))
+    core.start(rest_api=False, websocket=False)
+    try:
+        deadline = time.monotonic() + 5.0
+        while len(seen) < 5 and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        core.stop()
+        listener.close()
+    assert seen == [5.0, 6.0, 7.0, 8.0, 9.0]
+    assert api.latest_data["Pressure"]["value"] == 9.0
+    api.latest_data.pop("Pressure")
+
+def test_server_imports_without_qt():
+    code = "import sys, app.server; print(any(m.split('.')[0] in ('PySide6', 'matplotlib') for m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+def test_heavy_dependencies_load_lazily():
+    code = ("import sys, app.gui, app.core; "
+            "print(sorted({m.split('.')[0] for m in sys.modules} & {'matplotlib', 'requests', 'smtplib', 'plyer'}))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
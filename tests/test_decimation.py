@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from app.decimation import decimate, lttb_indices
+
+def signal(n=100_000, spike_at=54_321):
+    x = np.arange(n, dtype=np.float64) * 0.01
+    y = np.sin(x) + np.random.default_rng(0).normal(0, 0.05, n)
+    y[spike_at] = 9.0
+    return x, y
+
+@pytest.mark.parametrize("mode", ["minmax", "lttb"])
+def test_output_bounded_by_pixel_width(mode):
+    x, y = signal()
+    dx, dy = decimate(x, y, 300, mode)
+    assert len(dx) <= 2 * 300 + 2
+    assert dx[0] == x[0] and dx[-1] == x[-1]
+    assert np.all(np.diff(dx) > 0)
+
+@pytest.mark.parametrize("mode", ["minmax", "lttb"])
+def test_alarm_spike_survives(mode):
+    x, y = signal()
+    dx, dy = decimate(x, y, 300, mode, low=-5.0, high=5.0)
+    assert 9.0 in dy
+    assert x[54_321] in dx
+
+def test_small_input_passthrough():
+    x = np.arange(10.0)
+    y = x * 2
+    dx, dy = decimate(x, y, 300, "lttb")
+    assert dx is x and dy is y
+
+def test_lttb_one_pixel_canvas():
+    x, y = signal(1000, spike_at=500)
+    with np.errstate(all="raise"):
+        assert lttb_indices(x, y, 2).tolist() == [0, 999]
+        dx, dy = decimate(x, y, 1, "lttb")
+    assert dx.tolist() == [x[0], x[-1]]
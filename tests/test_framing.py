@@ -0,0 +1,37 @@
+import pytest
+from app.framing import LineFramer
+
+def feed(framer, chunk):
+    window = framer.writable()
+    window[:len(chunk)] = chunk
+    framer.commit(len(chunk))
+    return framer.lines()
+
+def test_lines_across_chunks():
+    framer = LineFramer(recv_size=16)
+    assert feed(framer, b'{"a": 1}\n{"b"') == [b'{"a": 1}']
+    assert feed(framer, b': 2}\n\n{"c": 3}\n') == [b'{"b": 2}', b'', b'{"c": 3}']
+    assert framer.start == framer.end
+
+def test_multibyte_character_split_across_chunks():
+    framer = LineFramer(recv_size=16)
+    data = '{"unit": "°C"}\n'.encode("utf-8")
+    split = data.index(b"\xb0")  # second byte of the two-byte '°'
+    assert feed(framer, data[:split]) == []
+    assert feed(framer, data[split:]) == [data[:-1]]
+    assert data[:-1].decode("utf-8") == '{"unit": "°C"}'
+
+def test_long_line_grows_buffer():
+    framer = LineFramer(recv_size=8)
+    payload = b"x" * 100
+    lines = []
+    for i in range(0, len(payload), 8):
+        lines += feed(framer, payload[i:i + 8])
+    lines += feed(framer, b"\n")
+    assert lines == [payload]
+
+def test_line_limit():
+    framer = LineFramer(recv_size=8, max_line=20)
+    with pytest.raises(ValueError):
+        for _ in range(4):
+            feed(framer, b"y" * 8)
@@ -0,0 +1,98 @@
+import os
+import sys
+import threading
+import numpy as np
+from datetime import datetime
+from app.data_models import SensorReading
+from app.history_store import HistoryStore, HistoryWriter, RECORD_DTYPE
+
+S = 1_000_000_000  # ns per second
+
+def _records(start_s, count, value=0.0):
+    rec = np.zeros(count, dtype=RECORD_DTYPE)
+    rec["t"] = (start_s + np.arange(count)) * S
+    rec["v"] = value + np.arange(count)
+    return rec
+
+def test_range_query_across_segments(tmp_path):
+    store = HistoryStore(str(tmp_path), segment_seconds=10)
+    for start in range(0, 40, 5):
+        store.append("Temperature", _records(start, 5, value=start))
+
+    assert len(os.listdir(tmp_path / "Temperature")) == 4  # rolled over every 10 s
+    out = store.query("Temperature", 8 * S, 23 * S)
+    assert (out["t"] // S).tolist() == list(range(8, 24))
+    assert out["v"].tolist() == [float(i) for i in range(8, 24)]
+    assert len(store.query("Temperature", 100 * S, 200 * S)) == 0
+    assert len(store.query("Unknown", 0, 200 * S)) == 0
+
+def test_reopen_and_torn_record(tmp_path):
+    store = HistoryStore(str(tmp_path), segment_seconds=3600)
+    store.append("Pressure", _records(0, 3))
+    segment = tmp_path / "Pressure" / os.listdir(tmp_path / "Pressure")[0]
+    with open(segment, "ab") as f:
+        f.write(b"\x01\x02\x03")  # partial record from a crash mid-write
+
+    reopened = HistoryStore(str(tmp_path), segment_seconds=3600)
+    assert len(reopened.query("Pressure", 0, 10 * S)) == 3
+    reopened.append("Pressure", _records(3, 2))
+    assert (reopened.query("Pressure", 0, 10 * S)["t"] // S).tolist() == [0, 1, 2, 3, 4]
+
+def test_retention_keeps_active_segment(tmp_path):
+    store = HistoryStore(str(tmp_path), segment_seconds=10, retention_seconds=15)
+    for start in (0, 10, 20, 30):
+        store.append("Flow", _records(start, 10))
+
+    store.enforce_retention(now_ns=40 * S)
+    assert sorted(os.listdir(tmp_path / "Flow")) == [f"{20 * S}.seg", f"{30 * S}.seg"]
+    store.enforce_retention(now_ns=1000 * S)
+    assert os.listdir(tmp_path / "Flow") == [f"{30 * S}.seg"]
+
+def test_writer_batches_readings(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    writer = HistoryWriter(store, flush_interval=60)
+    base = datetime(2026, 1, 1, 12, 0, 0)
+    writer.submit_many([
+        SensorReading("Level", 1.5, base, "OK"),
+        SensorReading("Level", 2.5, base.replace(second=1), "Faulty Sensor"),
+    ])
+    writer.flush()
+
+    t0 = int(base.timestamp()) * S
+    out = store.query("Level", t0, t0 + 10 * S)
+    assert out["v"].tolist() == [1.5, 2.5]
+    assert out["s"].tolist() == [0, 1]
+
+def test_concurrent_readers_never_lose_a_segment(tmp_path):
+    """Readers remapping a growing segment at once must each see every record appended before them."""
+    store = HistoryStore(str(tmp_path), segment_seconds=3600)
+    store.append("Flow", _records(0, 1))
+    written = [1]
+    failures = []
+    old_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+
+    def read():
+        for _ in range(300):
+            before = written[0]
+            try:
+                seen = store.count("Flow", 0, 10_000 * S)
+            except Exception as e:
+                failures.append(repr(e))
+                return
+            if seen < before:
+                failures.append(f"saw {seen} of {before} records")
+                return
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    try:
+        for reader in readers:
+            reader.start()
+        for i in range(1, 300):
+            store.append("Flow", _records(i, 1))
+            written[0] += 1
+        for reader in readers:
+            reader.join()
+    finally:
+        sys.setswitchinterval(old_interval)
+    assert failures == []
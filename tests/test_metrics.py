@@ -0,0 +1,63 @@
+import pytest
+from datetime import datetime
+from app.metrics import MetricsRegistry, bucket_quantile
+from app.alarm_manager import AlarmManager
+from app.data_models import SensorReading
+from app.api import app
+
+def test_render_prometheus_text():
+    """Counters, gauges and histograms render in the Prometheus text format."""
+    registry = MetricsRegistry()
+    readings = registry.counter("readings_total", "Readings", ["sensor"])
+    readings.labels("A").inc(3)
+    readings.labels('B"1').inc()
+    registry.gauge("queue_depth", "Depth").set_function(lambda: 7)
+    latency = registry.histogram("tick_seconds", "Tick", buckets=(0.01, 0.1))
+    for value in (0.005, 0.01, 0.05, 2.0):
+        latency.observe(value)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE readings_total counter" in lines
+    assert 'readings_total{sensor="A"} 3' in lines
+    assert 'readings_total{sensor="B\\"1"} 1' in lines
+    assert "queue_depth 7" in lines
+    # Buckets are cumulative and upper bounds inclusive
+    assert 'tick_seconds_bucket{le="0.01"} 2' in lines
+    assert 'tick_seconds_bucket{le="0.1"} 3' in lines
+    assert 'tick_seconds_bucket{le="+Inf"} 4' in lines
+    assert "tick_seconds_count 4" in lines
+    assert "tick_seconds_sum 2.065" in lines
+
+def test_registry_reuses_names_and_checks_labels():
+    registry = MetricsRegistry()
+    counter = registry.counter("x_total", "X", ["sensor"])
+    assert registry.total("x_total") is None
+    assert registry.counter("x_total", "X", ["sensor"]) is counter
+    assert counter.labels("A") is counter.labels("A")
+    with pytest.raises(ValueError):
+        registry.gauge("x_total", "X")
+    with pytest.raises(ValueError):
+        counter.labels("A", "B")
+    counter.labels("A").inc(2)
+    counter.labels("B").inc(5)
+    assert registry.total("x_total") == 7
+
+def test_bucket_quantile():
+    bounds = (1.0, 2.0, 4.0)
+    assert bucket_quantile(bounds, [0, 0, 0, 0], 0.5) is None
+    assert bucket_quantile(bounds, [0, 10, 0, 0], 0.5) == pytest.approx(1.5)
+    assert bucket_quantile(bounds, [0, 0, 0, 3], 0.99) == 4.0
+
+def test_metrics_endpoint_reports_alarms():
+    """/api/metrics serves the shared registry, including alarm counts and check latency."""
+    config = {"T": {"port": 0, "low": 0.0, "high": 10.0, "unit": "C"}}
+    AlarmManager(config).check_batch([SensorReading("T", 50.0, datetime.now(), "OK")])
+
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        response = client.get('/api/metrics')
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    body = response.get_data(as_text=True)
+    assert '# TYPE alarm_check_seconds histogram' in body
+    assert 'alarms_raised_total{type="HIGH"}' in body
@@ -0,0 +1,157 @@
+import json
+import socketserver
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from app.data_models import AlarmEvent
+from app.notifications import EmailChannel, NotificationDispatcher, Outbox, RateLimiter, WebhookChannel
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept mail: records each message body."""
+    def handle(self):
+        self.server.connections += 1
+        self.wfile.write(b"220 stand-in ESMTP\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            cmd = line[:4].upper()
+            if cmd == b"DATA":
+                self.wfile.write(b"354 go ahead\r\n")
+                data = []
+                for body_line in iter(self.rfile.readline, b""):
+                    if body_line == b".\r\n":
+                        break
+                    data.append(body_line)
+                self.server.messages.append(b"".join(data).decode())
+                self.wfile.write(b"250 queued\r\n")
+            elif cmd == b"QUIT":
+                self.wfile.write(b"221 bye\r\n")
+                return
+            elif cmd == b"EHLO":
+                self.wfile.write(b"250 stand-in\r\n")
+            else:
+                self.wfile.write(b"250 ok\r\n")
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        server.connections.add(self.client_address)
+        status = 500 if server.fail_next > 0 else 200
+        server.fail_next -= 1
+        if status == 200:
+            server.bodies.append(body)
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def smtp_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPHandler)
+    server.daemon_threads = True
+    server.connections, server.messages = 0, []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def http_server():
+    server = HTTPServer(("127.0.0.1", 0), _HTTPHandler)
+    server.connections, server.bodies, server.fail_next = set(), [], 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def _alarm(sensor="Pressure", value=13.0):
+    return AlarmEvent(datetime(2026, 1, 1, 12, 0, 0), sensor, value, "HIGH", f"{sensor} HIGH limit violation: {value:.2f}")
+
+def _wait(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+def test_email_reuses_connection_and_digests(smtp_server, tmp_path):
+    email = EmailChannel("127.0.0.1", smtp_server.server_address[1], user="alerts@example.com", password="",
+                         recipient="ops@example.com", use_tls=False)
+    dispatcher = NotificationDispatcher([email], Outbox(str(tmp_path)), digest_window=0.3, rate_limit=100)
+    dispatcher.start()
+    try:
+        dispatcher.notify(_alarm())
+        assert _wait(lambda: len(smtp_server.messages) == 1)
+        # A storm inside the digest window becomes a single email
+        for i in range(20):
+            dispatcher.notify(_alarm(f"S{i}"))
+        assert _wait(lambda: len(smtp_server.messages) == 2)
+    finally:
+        dispatcher.stop()
+    assert "Subject: INDUSTRIAL ALARM: Pressure" in smtp_server.messages[0]
+    assert "INDUSTRIAL ALARMS: 20 alarms" in smtp_server.messages[1]
+    assert smtp_server.connections == 1 and email.connections == 1
+    assert dispatcher.stats()["sent"] == 2 and list(tmp_path.glob("*.json")) == []
+
+def test_webhook_retries_from_outbox(http_server, tmp_path):
+    http_server.fail_next = 2
+    url = f"http://127.0.0.1:{http_server.server_address[1]}/hook"
+    dispatcher = NotificationDispatcher([WebhookChannel(url)], Outbox(str(tmp_path)),
+                                        digest_window=0.0, backoff=0.05, tick=0.01)
+    dispatcher.start()
+    try:
+        dispatcher.notify(_alarm())
+        assert _wait(lambda: len(http_server.bodies) == 1)
+    finally:
+        dispatcher.stop()
+    assert http_server.bodies[0]["sensor"] == "Pressure"
+    assert dispatcher.stats() == {"sent": 1, "retried": 2, "failed": 0, "pending": 0}
+    assert len(http_server.connections) == 1  # one kept-alive connection for all three attempts
+
+def test_outbox_survives_restart_and_dead_letters(tmp_path):
+    class Down:
+        name = "webhook"
+        calls = 0
+
+        def send(self, payloads):
+            Down.calls += 1
+            raise ConnectionError("unreachable")
+
+        def close_idle(self, now):
+            pass
+
+        def close(self):
+            pass
+
+    # Alarms queued at shutdown are kept on disk...
+    dispatcher = NotificationDispatcher([Down()], Outbox(str(tmp_path)), digest_window=60.0)
+    dispatcher.notify(_alarm())
+    dispatcher.notify(_alarm("Flow"))
+    dispatcher.stop()
+    assert len(list(tmp_path.glob("*.json"))) == 1
+    # ...and retried by the next dispatcher until max_attempts, then moved to failed/
+    dispatcher = NotificationDispatcher([Down()], Outbox(str(tmp_path)), max_attempts=3, backoff=0.01, tick=0.01)
+    assert dispatcher.pending() == 1
+    dispatcher.start()
+    try:
+        assert _wait(lambda: dispatcher.failed == 1)
+    finally:
+        dispatcher.stop()
+    assert Down.calls == 3
+    failed = list((tmp_path / "failed").glob("*.json"))
+    assert len(failed) == 1 and len(json.loads(failed[0].read_text())["payloads"]) == 2
+    assert list(tmp_path.glob("*.json")) == []
+
+def test_rate_limiter():
+    limiter = RateLimiter(rate=2, period=10.0)
+    t = limiter.updated
+    assert limiter.take(t) and limiter.take(t)
+    assert not limiter.take(t + 1.0)
+    assert limiter.take(t + 5.0)  # one token refilled every 5 s
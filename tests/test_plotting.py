@@ -0,0 +1,71 @@
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from PySide6.QtWidgets import QApplication
+from app.data_models import SensorReading
+
+@pytest.fixture(scope="module")
+def qapp():
+    return QApplication.instance() or QApplication([])
+
+def test_steady_signal_blits_and_limit_change_redraws(qapp):
+    from app.plotting import MplCanvas
+    canvas = MplCanvas("Temperature", "C", width=3, height=2, blit=True)
+    canvas.show()
+    qapp.processEvents()
+    x = np.arange(100) / 10.0
+    y = np.sin(x)
+    canvas.update_plot(x, y)  # first frame: limits and background
+    redraws = canvas.full_redraws
+    blits = canvas.blits
+
+    for i in range(5):
+        canvas.update_plot(x, y + 0.01 * i)
+    assert canvas.full_redraws == redraws and canvas.blits == blits + 5
+
+    # Data leaving the view changes the axis limits: one full redraw
+    canvas.update_plot(x, y * 10.0)
+    assert canvas.full_redraws == redraws + 1 and canvas.blits == blits + 5
+    canvas.update_plot(x, y * 10.0)
+    assert canvas.blits == blits + 6
+
+def test_hidden_tab_skips_drawing_until_shown(qapp):
+    from app.gui import DashboardWindow
+    window = DashboardWindow()
+    window.show()
+    window.create_plots()
+    qapp.processEvents()
+    name = next(iter(window.readings))
+    canvas = window.canvases[name]
+    start = datetime.now()
+
+    def feed(k):
+        for i in range(k * 10, k * 10 + 10):
+            window.readings[name].append(SensorReading(name, float(i % 7), start + timedelta(seconds=i / 10), "OK"))
+
+    def drawn():
+        return canvas.full_redraws + canvas.blits
+
+    feed(0)
+    window.update_plots()
+    assert drawn() == 1
+
+    window.tabs.setCurrentWidget(window.maintenance_tab)
+    qapp.processEvents()
+    assert not canvas.is_on_screen()
+    feed(1)
+    skipped = window.skipped_plots
+    window.update_plots()
+    assert drawn() == 1 and window.skipped_plots == skipped + 1
+
+    # Back on the dashboard, the pending samples are drawn on the next tick
+    window.tabs.setCurrentWidget(window.dashboard_tab)
+    qapp.processEvents()
+    window.update_plots()
+    assert drawn() == 2
+    # Idle: nothing new, nothing drawn
+    window.update_plots()
+    assert drawn() == 2
+    window.close()
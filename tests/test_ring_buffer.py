@@ -0,0 +1,36 @@
+import numpy as np
+from datetime import datetime
+from app.data_models import SensorReading
+from app.ring_buffer import SensorRingBuffer
+
+def test_wraparound_keeps_contiguous_views():
+    buf = SensorRingBuffer(4)
+    for i in range(10):
+        buf.append_sample(float(i), i * 10.0, i % 2)
+
+    assert len(buf) == 4
+    assert buf.times.tolist() == [6.0, 7.0, 8.0, 9.0]
+    assert buf.values.tolist() == [60.0, 70.0, 80.0, 90.0]
+    assert buf.status.tolist() == [0, 1, 0, 1]
+    # Views share memory with the buffer (zero-copy)
+    assert np.shares_memory(buf.times, buf._t)
+
+def test_append_reading_and_window():
+    buf = SensorRingBuffer.for_rate(window_seconds=20, rate_hz=2)
+    start = datetime(2026, 1, 1, 12, 0, 0).timestamp()
+    for i in range(10):
+        buf.append_sample(start + i, float(i))
+    buf.append(SensorReading("Pressure", 99.0, datetime.fromtimestamp(start + 10), "Faulty Sensor"))
+
+    t, v, s = buf.window(3)
+    assert (t - start).tolist() == [7.0, 8.0, 9.0, 10.0]
+    assert v[-1] == 99.0 and s[-1] == 1
+
+def test_grows_when_rate_exceeds_sizing():
+    buf = SensorRingBuffer.for_rate(window_seconds=1, rate_hz=2, max_capacity=64)
+    initial = buf.capacity
+    for i in range(40):
+        buf.append_sample(i * 0.01, float(i))  # 100 Hz, 0.4 s of data
+
+    assert buf.capacity > initial
+    assert buf.values.tolist() == [float(i) for i in range(40)]
@@ -0,0 +1,74 @@
+import numpy as np
+from app.rollups import RollupEngine, merge_buckets, bucket_stats
+
+S = 1_000_000_000  # ns per second
+
+def _engine(tmp_path):
+    return RollupEngine(str(tmp_path), resolutions={"1s": 1, "1m": 60, "1h": 3600})
+
+def test_buckets_aggregate_and_flush(tmp_path):
+    engine = _engine(tmp_path)
+    for i in range(120):  # one minute at 2 Hz
+        engine.add_sample("Temperature", 1000 * 60 + i / 2, float(i))
+    engine.flush()
+
+    label, rec = engine.query("Temperature", 60000 * S, 60060 * S, max_points=100)
+    assert label == "1s"
+    assert rec["count"].tolist()[:2] == [2, 2]
+    assert rec["min"][0] == 0.0 and rec["max"][0] == 1.0 and rec["sum"][0] == 1.0
+
+    label, rec = engine.query("Temperature", 60000 * S, 60119 * S, max_points=10)
+    assert label == "1m"
+    # The minute bucket is still open, but queries include it
+    assert rec["count"].tolist() == [120]
+    mean, std = bucket_stats(rec)
+    assert np.isclose(mean[0], 59.5) and np.isclose(std[0], np.std(np.arange(120.0)))
+
+def test_picks_coarsest_needed_resolution(tmp_path):
+    engine = _engine(tmp_path)
+    day = 86400
+    for h in range(30 * 24):  # 30 days, one sample per 10 minutes
+        for m in range(6):
+            engine.add_sample("Pressure", h * 3600 + m * 600, float(h))
+    engine.close_all()
+    engine.flush()
+
+    label, rec = engine.query("Pressure", 0, 30 * day * S, max_points=1000)
+    assert label == "1h" and len(rec) == 720
+    label, rec = engine.query("Pressure", 0, 30 * day * S, max_points=100)
+    assert label == "1h" and len(rec) <= 100
+    assert rec["count"].sum() == 30 * 24 * 6
+    label, _ = engine.query("Pressure", 0, 3600 * S, max_points=100)
+    assert label == "1m"
+
+def test_merge_buckets_preserves_totals():
+    rec = np.zeros(10, dtype=[("t", "<i8"), ("count", "<u4"), ("min", "<f8"), ("max", "<f8"),
+                              ("sum", "<f8"), ("sumsq", "<f8")])
+    rec["t"] = np.arange(10)
+    rec["count"] = 1
+    rec["min"] = rec["max"] = rec["sum"] = np.arange(10.0)
+    merged = merge_buckets(rec, 3)
+    assert len(merged) == 3
+    assert merged["count"].sum() == 10 and merged["sum"].sum() == 45.0
+    assert merged["min"][0] == 0.0 and merged["max"][-1] == 9.0
+
+def test_restart_within_a_bucket_does_not_duplicate_rows(tmp_path):
+    """A partial bucket stored at shutdown and its continuation after a restart read back as one."""
+    first = _engine(tmp_path)
+    for i in range(30):
+        first.add_sample("Flow", 60 * 60 + i, float(i))
+    first.close_all()
+    first.flush()
+
+    restarted = _engine(tmp_path)
+    for i in range(30, 50):
+        restarted.add_sample("Flow", 60 * 60 + i, float(i))
+    label, rec = restarted.query("Flow", 3600 * S, 3659 * S, max_points=10)
+    assert label == "1m" and rec["t"].tolist() == [3600 * S]
+    assert rec["count"].tolist() == [50] and rec["max"][0] == 49.0 and rec["sum"][0] == sum(range(50))
+
+    # Stopped again in the same minute: both stored parts combine
+    restarted.close_all()
+    restarted.flush()
+    label, rec = _engine(tmp_path).query("Flow", 3600 * S, 3659 * S, max_points=10)
+    assert rec["count"].tolist() == [50] and rec["min"][0] == 0.0
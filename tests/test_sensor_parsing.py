@@ -22,3 +22,36 @@ def test_parsing_missing_keys():
     data = json.loads(raw)
     with pytest.raises(KeyError):
         SensorReading.from_dict(data)
+
+def test_fast_parser_matches_from_dict():
+    from app.parser import ReadingParser
+    raw = b'{"sensor": "Pressure", "value": 10.5, "timestamp": "2023-10-27T10:00:00.123456", "status": "OK"}'
+    reading = ReadingParser().parse(raw)
+
+    assert reading == SensorReading.from_dict(json.loads(raw))
+
+def test_fast_parser_reuses_repeated_timestamp():
+    from app.parser import ReadingParser
+    parser = ReadingParser()
+    first = parser.parse(b'{"sensor": "Speed", "value": 1, "timestamp": "2023-10-27T10:00:00.5", "status": "OK"}')
+    second = parser.parse(b'{"sensor": "Speed", "value": 2, "timestamp": "2023-10-27T10:00:00.5", "status": "OK"}')
+    third = parser.parse(b'{"sensor": "Speed", "value": 3, "timestamp": "2023-10-27T11:00:00", "status": "OK"}')
+
+    assert second.timestamp is first.timestamp
+    assert third.timestamp == datetime(2023, 10, 27, 11, 0, 0)
+
+def test_fast_parser_errors():
+    from app.parser import ReadingParser
+    parser = ReadingParser()
+    with pytest.raises(ValueError):
+        parser.parse(b'{"invalid": json')
+    with pytest.raises(ValueError):
+        parser.parse(b'[1, 2]')
+    with pytest.raises(KeyError):
+        parser.parse(b'{"sensor": "Pressure"}')
+
+def test_stdlib_backend_fallback():
+    from app.parser import _load_backend
+    name, decode = _load_backend("json")
+    assert name == "json"
+    assert decode(b'{"value": 1}') == {"value": 1}
@@ -0,0 +1,78 @@
+import json
+import socket
+import threading
+import time
+from datetime import datetime
+import numpy as np
+from app.shm_ingest import ShmIngest, ShmRing, SHM_RECORD_DTYPE
+
+def _records(values, sensor=0):
+    records = np.zeros(len(values), dtype=SHM_RECORD_DTYPE)
+    records["v"] = values
+    records["sensor"] = sensor
+    return records
+
+def test_ring_wraparound_and_overrun():
+    ring = ShmRing.create(8)
+    try:
+        ring.write(_records([1, 2, 3, 4, 5]))
+        assert ring.read()["v"].tolist() == [1, 2, 3, 4, 5]
+        assert len(ring.read()) == 0
+        ring.write(_records([6, 7, 8, 9, 10, 11]))  # wraps around the end
+        assert ring.read()["v"].tolist() == [6, 7, 8, 9, 10, 11]
+        # The writer never waits: a reader lapped by 4 records loses the oldest 4
+        ring.write(_records(range(12, 24)))
+        assert ring.read()["v"].tolist() == list(range(16, 24)) and ring.lost == 4
+    finally:
+        ring.close()
+        ring.shm.unlink()
+
+def test_reader_drops_slots_being_overwritten():
+    ring = ShmRing.create(8)
+    try:
+        ring.write(_records([1, 2, 3, 4, 5, 6]))
+        # A writer midway through its next batch of 4: slots reserved and partly
+        # filled, count not yet published. Slots 0 and 1 already hold new data.
+        ring._reserved[0] = 10
+        ring.records[6:8] = _records([7, 8])
+        ring.records[0:2] = _records([9, 10])
+        out = ring.read()
+        assert out["v"].tolist() == [3, 4, 5, 6] and ring.lost == 2
+    finally:
+        ring.close()
+        ring.shm.unlink()
+
+def _sensor_server(name, count):
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+
+    def serve():
+        conn, _ = listener.accept()
+        with conn:
+            lines = [json.dumps({"sensor": name, "value": float(i), "timestamp": datetime.now().isoformat(),
+                                 "status": "OK" if i % 10 else "Faulty Sensor"}) for i in range(count)]
+            conn.sendall(("\n".join(lines) + "\n").encode())
+            time.sleep(3.0)
+        listener.close()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return listener.getsockname()[1]
+
+def test_process_pool_delivers_through_shared_memory():
+    config = {name: {"port": _sensor_server(name, 500), "unit": ""} for name in ("A", "B", "C")}
+    ingest = ShmIngest(config, processes=2, interval=0.01)
+    ingest.start()
+    readings = []
+    try:
+        deadline = time.monotonic() + 20.0
+        while len(readings) < 1500 and time.monotonic() < deadline:
+            readings += ingest.poll()
+            time.sleep(0.02)
+    finally:
+        ingest.stop()
+    assert len(ingest.workers) == 0 and ingest.lost == 0
+    for name in ("A", "B", "C"):
+        mine = [r for r in readings if r.sensor_name == name]
+        assert [r.value for r in mine] == [float(i) for i in range(500)]
+        assert mine[10].status == "Faulty Sensor" and mine[11].status == "OK"
@@ -0,0 +1,70 @@
+import asyncio
+import importlib.util
+import json
+import os
+from datetime import datetime
+import pytest
+from app.binary_protocol import BinaryFramer
+
+_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "simulator", "sensor_simulator.py")
+_spec = importlib.util.spec_from_file_location("sensor_simulator", _path)
+sim = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(sim)
+
+def test_spec_groups_expand_with_defaults():
+    sensors = sim.expand_spec({"defaults": {"rate_hz": 50},
+                               "sensors": [{"name": "Temp", "port": 7000},
+                                           {"name": "Line{i}", "count": 3, "port": 7100, "id": 10, "protocol": "binary"}]})
+    assert [(s["name"], s["port"], s.get("id"), s["rate_hz"]) for s in sensors] == [
+        ("Temp", 7000, None, 50), ("Line0", 7100, 10, 50), ("Line1", 7101, 11, 50), ("Line2", 7102, 12, 50)]
+    with pytest.raises(ValueError):
+        sim.expand_spec({"sensors": [{"name": "A", "port": 7000}, {"name": "B", "port": 7000}]})
+
+def test_seeded_values_repeat():
+    cfg = sim.expand_spec({"sensors": [{"name": "A", "port": 1, "spike_chance": 0.2, "spike_val": 5}]})[0]
+    a, b, c = sim.AsyncSensor(cfg, 7), sim.AsyncSensor(cfg, 7), sim.AsyncSensor(cfg, 8)
+    first = [a.next_sample() for _ in range(50)]
+    assert first == [b.next_sample() for _ in range(50)]
+    assert first != [c.next_sample() for _ in range(50)]
+
+def test_clients_share_a_drift_free_stream():
+    async def scenario():
+        sensors = sim.expand_spec({"sensors": [
+            {"name": "Fast", "port": 1, "rate_hz": 1000},
+            {"name": "Frames", "port": 2, "id": 1, "rate_hz": 500, "protocol": "binary", "batch": 50}]})
+        fast, frames = (sim.AsyncSensor(cfg, 3) for cfg in sensors)
+        servers = [await asyncio.start_server(s.on_connect, "127.0.0.1", 0) for s in (fast, frames)]
+        ports = [srv.sockets[0].getsockname()[1] for srv in servers]
+        clients = [await asyncio.open_connection("127.0.0.1", ports[0]) for _ in range(2)]
+        binary_reader, _ = await asyncio.open_connection("127.0.0.1", ports[1])
+        await asyncio.sleep(0.05)  # let the server register every client
+        loop = asyncio.get_running_loop()
+        t0 = datetime.now().timestamp()
+        tasks = [asyncio.create_task(s.run(t0, loop.time(), 0.005)) for s in (fast, frames)]
+        await asyncio.sleep(0.5)
+        for task in tasks:
+            task.cancel()
+        streams = []
+        for reader, writer in clients:
+            data = b""
+            while data.count(b"\n") < fast.sent:
+                data += await asyncio.wait_for(reader.read(65536), 2)
+            streams.append([json.loads(line) for line in data.splitlines()])
+            writer.close()
+        framer, samples = BinaryFramer(), []
+        while len(samples) < frames.sent:
+            chunk = await asyncio.wait_for(binary_reader.read(framer.recv_size), 2)
+            framer.writable()[:len(chunk)] = chunk
+            framer.commit(len(chunk))
+            samples += framer.samples()
+        for srv in servers:
+            srv.close()
+        return fast.sent, streams, frames.sent, samples, t0
+
+    sent, streams, frame_sent, samples, t0 = asyncio.run(scenario())
+    assert sent >= 400 and streams[0] == streams[1] and len(streams[0]) == sent
+    # Sample k is stamped t0 + k / rate, however the wake-ups fell
+    for k in (0, 1, sent // 2, sent - 1):
+        assert abs(datetime.fromisoformat(streams[0][k]["timestamp"]).timestamp() - (t0 + k / 1000)) < 1e-5
+    assert frame_sent % 50 == 0 and len(samples) == frame_sent
+    assert [s[2] for s in samples[:3]] == [round((t0 + k / 500) * 1e9) for k in range(3)]
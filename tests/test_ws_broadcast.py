@@ -0,0 +1,162 @@
+import asyncio
+import json
+import socket
+import time
+from app.ws_server import WebSocketServer, _WsClient
+
+class FakeWebSocket:
+    """Never drains (no sender task), records close()."""
+    remote_address = ("127.0.0.1", 1)
+
+    def __init__(self):
+        self.closed_with = None
+
+    async def close(self, code=1000, reason=""):
+        self.closed_with = code
+
+def test_drop_oldest_and_eviction():
+    async def scenario():
+        srv = WebSocketServer("127.0.0.1", 0, batch_interval_ms=0, queue_frames=2, evict_after=0.05)
+        srv.loop = asyncio.get_running_loop()
+        ws = FakeWebSocket()
+        client = srv.clients[ws] = _WsClient(ws, 2)
+        for i in range(5):
+            srv._enqueue([{"i": i}, {"i": i}])
+            srv._flush()
+
+        assert len(client.queue) == 2 and client.dropped == 6
+        assert [json.loads(b.frame)["messages"][0]["i"] for b in client.queue] == [3, 4]
+        assert srv.stats()["dropped_messages"] == 6 and srv.stats()["queue_depth_max"] == 2
+
+        await asyncio.sleep(0.1)  # still behind past the threshold
+        srv._enqueue([{"i": 5}])
+        srv._flush()
+        await asyncio.sleep(0)
+        assert ws.closed_with == 1013 and srv.evictions == 1
+    asyncio.run(scenario())
+
+def test_batches_serialized_once_and_coalesced():
+    async def scenario():
+        srv = WebSocketServer("127.0.0.1", 0, batch_interval_ms=0)
+        srv.loop = asyncio.get_running_loop()
+        a, b = FakeWebSocket(), FakeWebSocket()
+        srv.clients[a] = _WsClient(a, 10)
+        srv.clients[b] = _WsClient(b, 10)
+        srv._enqueue([{"sensor": "Temperature", "value": 1.0}, {"sensor": "Pressure", "value": 2.0}])
+        srv._flush()
+        # Both clients share the same batch (and so the same encoded frame)
+        assert srv.clients[a].queue[0] is srv.clients[b].queue[0]
+        frame = json.loads(srv.clients[a].queue[0].frame)
+        assert frame["type"] == "batch" and [m["sensor"] for m in frame["messages"]] == ["Temperature", "Pressure"]
+    asyncio.run(scenario())
+
+def test_live_client_receives_batch_frames():
+    from websockets.sync.client import connect
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    srv = WebSocketServer("127.0.0.1", port, batch_interval_ms=50)
+    srv.start()
+    for _ in range(50):
+        if srv.loop:
+            break
+        time.sleep(0.05)
+    with connect(f"ws://127.0.0.1:{port}", open_timeout=5) as ws:
+        time.sleep(0.2)
+        srv.broadcast_many([{"type": "reading", "sensor": "Temperature", "value": float(i)} for i in range(3)])
+        srv.broadcast({"type": "reading", "sensor": "Pressure", "value": 9.0})
+        frame = json.loads(ws.recv(timeout=5))
+    assert [m["value"] for m in frame["messages"]] == [0.0, 1.0, 2.0, 9.0]
+    assert srv.stats()["frames_out"] == 1
+
+def _reading(sensor, value, status="OK"):
+    return {"type": "reading", "sensor": sensor, "value": value, "status": status}
+
+def test_subscription_filter_and_delta():
+    async def scenario():
+        srv = WebSocketServer("127.0.0.1", 0, batch_interval_ms=0)
+        srv.loop = asyncio.get_running_loop()
+        ws = FakeWebSocket()
+        client = srv.clients[ws] = _WsClient(ws, 10)
+        reply = srv._subscribe(client, {"type": "subscribe", "sensors": ["Pressure"], "delta": True})
+        assert reply == {"type": "subscribed", "sensors": ["Pressure"], "max_rate_hz": None, "delta": True}
+
+        srv._enqueue([_reading("Temperature", 1.0), _reading("Pressure", 2.0)])
+        srv._flush()
+        srv._enqueue([_reading("Pressure", 3.0), _reading("Pressure", 3.0, "Faulty Sensor")])
+        srv._flush()
+        first, second = [json.loads(b.frame)["messages"] for b in client.queue]
+        assert first == [_reading("Pressure", 2.0)]
+        assert second == [{"type": "delta", "sensor": "Pressure", "value": 3.0},
+                          {"type": "delta", "sensor": "Pressure", "status": "Faulty Sensor"}]
+        assert srv.stats()["filtered_clients"] == 1 and srv.stats()["delta_clients"] == 1
+    asyncio.run(scenario())
+
+def test_rate_limit_sends_latest_values():
+    async def scenario():
+        srv = WebSocketServer("127.0.0.1", 0, batch_interval_ms=0)
+        srv.loop = asyncio.get_running_loop()
+        ws = FakeWebSocket()
+        client = srv.clients[ws] = _WsClient(ws, 10)
+        srv._subscribe(client, {"type": "subscribe", "max_rate_hz": 10})
+        for i in range(20):
+            srv._enqueue([_reading("Temperature", float(i)), _reading("Pressure", float(i))])
+            srv._flush()
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.15)
+
+        frames = [json.loads(b.frame)["messages"] for b in client.queue]
+        assert 2 <= len(frames) <= 8  # ~0.35 s at 10 frames/s instead of 20 batches
+        last = {m["sensor"]: m["value"] for m in frames[-1]}
+        assert last == {"Temperature": 19.0, "Pressure": 19.0}
+    asyncio.run(scenario())
+
+def test_subscribe_errors_are_reported():
+    async def scenario():
+        srv = WebSocketServer("127.0.0.1", 0)
+        srv.loop = asyncio.get_running_loop()
+        sent = []
+
+        class Recorder(FakeWebSocket):
+            async def send(self, text):
+                sent.append(json.loads(text))
+        client = _WsClient(Recorder(), 10)
+        await srv._command(client, "not json")
+        await srv._command(client, json.dumps({"type": "subscribe", "sensors": 5}))
+        await srv._command(client, json.dumps({"type": "unsubscribe", "sensors": ["Flow"]}))
+        assert [m["type"] for m in sent] == ["error", "error", "subscribed"]
+    asyncio.run(scenario())
+
+def test_unsubscribe_from_all_keeps_new_sensors():
+    async def scenario():
+        srv = WebSocketServer("127.0.0.1", 0, batch_interval_ms=0)
+        srv.loop = asyncio.get_running_loop()
+        ws = FakeWebSocket()
+        client = srv.clients[ws] = _WsClient(ws, 10)
+        reply = srv._unsubscribe(client, {"type": "unsubscribe", "sensors": ["Pressure"]})
+        assert reply["sensors"] == "*" and reply["excluded"] == ["Pressure"]
+
+        # Neither sensor had reported before the unsubscribe
+        srv._enqueue([_reading("Temperature", 1.0), _reading("Pressure", 2.0)])
+        srv._flush()
+        assert [m["sensor"] for m in json.loads(client.queue[0].frame)["messages"]] == ["Temperature"]
+        assert srv.stats()["filtered_clients"] == 1
+    asyncio.run(scenario())
+
+def test_delta_client_gets_full_message_after_drop():
+    async def scenario():
+        srv = WebSocketServer("127.0.0.1", 0, batch_interval_ms=0)
+        srv.loop = asyncio.get_running_loop()
+        ws = FakeWebSocket()
+        client = srv.clients[ws] = _WsClient(ws, 1)
+        srv._subscribe(client, {"type": "subscribe", "delta": True})
+        srv._enqueue([_reading("Pressure", 1.0)])
+        srv._flush()
+        # The queue holds one frame: this one replaces the first, which the client never sees
+        srv._enqueue([_reading("Pressure", 2.0, "Faulty Sensor")])
+        srv._flush()
+        srv._enqueue([_reading("Pressure", 3.0, "Faulty Sensor")])
+        srv._flush()
+        assert client.dropped == 2
+        assert json.loads(client.queue[0].frame)["messages"] == [_reading("Pressure", 3.0, "Faulty Sensor")]
+    asyncio.run(scenario())